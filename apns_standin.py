@@ -0,0 +1,134 @@
+"""APNs 대신 쓰는 로컬 HTTP/2(TLS) 서버입니다. 승인 알림 발송 속도를 실제 Apple 서버 없이 잴 때 씁니다.
+사용: python3 apns_standin.py [포트] [왕복지연초]   (기본 8443, 0.02)
+- 연결마다 핸드셰이크 대신 왕복지연 2번, 요청마다 왕복지연 1번을 기다린 뒤 응답합니다.
+- 토큰이 "dead"로 시작하면 410 Unregistered, 그 밖에는 200을 돌려줍니다.
+- 자체 서명 인증서를 임시 폴더에 만들어 쓰므로, 클라이언트는 SSL_CERT_FILE에 그 인증서를 지정합니다.
+"""
+import asyncio
+import datetime
+import ipaddress
+import json
+import os
+import ssl
+import sys
+import tempfile
+import threading
+
+import h2.config
+import h2.connection
+import h2.events
+import h2.settings
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+
+def make_certificate(folder: str) -> tuple[str, str]:
+    """localhost / 127.0.0.1용 자체 서명 인증서와 키 파일 경로를 돌려줍니다."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.DNSName("localhost"), x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(folder, "standin.crt")
+    key_path = os.path.join(folder, "standin.key")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+class StandIn:
+    def __init__(self, rtt: float = 0.02):
+        self.rtt = rtt
+        self.stats = {"connections": 0, "requests": 0}
+        self.port = 0
+        self.cert_path = ""
+
+    async def _handle(self, reader, writer):
+        self.stats["connections"] += 1
+        await asyncio.sleep(self.rtt * 2)
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        conn.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: 1000})
+        writer.write(conn.data_to_send())
+        lock = asyncio.Lock()
+        paths = {}
+
+        async def respond(stream_id: int, path: str):
+            await asyncio.sleep(self.rtt)
+            async with lock:
+                if path.rsplit("/", 1)[-1].startswith("dead"):
+                    body = json.dumps({"reason": "Unregistered"}).encode()
+                    conn.send_headers(stream_id, [(":status", "410"), ("apns-id", "standin")])
+                    conn.send_data(stream_id, body, end_stream=True)
+                else:
+                    conn.send_headers(stream_id, [(":status", "200"), ("apns-id", "standin")], end_stream=True)
+                writer.write(conn.data_to_send())
+                await writer.drain()
+
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    headers = {
+                        (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+                        for k, v in event.headers
+                    }
+                    paths[event.stream_id] = headers[":path"]
+                elif isinstance(event, h2.events.DataReceived):
+                    conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                elif isinstance(event, h2.events.StreamEnded):
+                    self.stats["requests"] += 1
+                    asyncio.ensure_future(respond(event.stream_id, paths.pop(event.stream_id)))
+            async with lock:
+                writer.write(conn.data_to_send())
+                await writer.drain()
+        writer.close()
+
+    async def serve(self, port: int, ready: threading.Event = None):
+        self.cert_path, key_path = make_certificate(tempfile.mkdtemp(prefix="apns-standin-"))
+        ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ctx.load_cert_chain(self.cert_path, key_path)
+        ctx.set_alpn_protocols(["h2"])
+        server = await asyncio.start_server(self._handle, "127.0.0.1", port, ssl=ctx)
+        self.port = server.sockets[0].getsockname()[1]
+        if ready is not None:
+            ready.set()
+        else:
+            print(f"SSL_CERT_FILE={self.cert_path}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def start_in_thread(rtt: float = 0.02) -> StandIn:
+    """빈 포트에서 백그라운드로 띄우고, 받을 준비가 되면 돌려줍니다."""
+    standin = StandIn(rtt)
+    ready = threading.Event()
+    threading.Thread(target=lambda: asyncio.run(standin.serve(0, ready)), name="apns-standin", daemon=True).start()
+    ready.wait()
+    return standin
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8443
+    rtt = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    print(f"APNs stand-in https://localhost:{port} rtt={rtt}s", flush=True)
+    asyncio.run(StandIn(rtt).serve(port))
@@ -0,0 +1,100 @@
+"""iOS 승인 알림(APNs) 발송 시간을 예전 방식(요청마다 새 연결 + 토큰별 순차 발송)과 비교합니다.
+사용: python3 bench_apns.py [왕복지연초]   (기본 0.02)
+apns_standin.py의 로컬 HTTP/2 서버로 보내므로 Apple 서버나 실제 키가 필요 없습니다.
+토큰 1/50/500개에 대해 중앙값을 재고, 만료(410) 토큰이 정리되는지도 확인합니다.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import apns_standin
+
+RTT = float(sys.argv[1]) if len(sys.argv) > 1 else 0.02
+STANDIN = apns_standin.start_in_thread(RTT)
+
+DATA_DIR = tempfile.mkdtemp(prefix="bench-apns-")
+os.environ["AUTH_DATA_FILE"] = os.path.join(DATA_DIR, "auth_data.json")
+os.environ["AUTH_CATEGORY_FILE"] = os.path.join(DATA_DIR, "auth_categories.json")
+os.environ["APPLE_ADMIN_FILE"] = os.path.join(DATA_DIR, "apple_admins.json")
+# 서버의 httpx 클라이언트가 대역 서버의 자체 서명 인증서를 믿도록 합니다.
+os.environ["SSL_CERT_FILE"] = STANDIN.cert_path
+os.environ["APNS_KEY_ID"] = "BENCHKEY01"
+os.environ["APNS_TEAM_ID"] = "BENCHTEAM1"
+os.environ["APNS_PRIVATE_KEY"] = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+    serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+).decode("ascii")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+
+BASE_URL = f"https://localhost:{STANDIN.port}"
+server.APNS_HOSTS = {"sandbox": BASE_URL, "production": BASE_URL}
+ITEM = {"name": "n", "phoneLast4": "1234", "code": "c", "requestId": "r"}
+
+
+def set_tokens(count: int, dead: int = 0):
+    tokens = [
+        {"token": ("dead" if i < dead else "ab") + f"{i:060d}", "environment": "sandbox" if i % 2 else "production"}
+        for i in range(count)
+    ]
+    with server._apple_admin_lock:
+        server.apple_admins["bench"] = server._normalize_apple_admin(
+            {"userId": "bench", "allowedCategory": "전체", "pushTokens": tokens}
+        )
+        server.save_apple_admins("bench")
+
+
+def old_send():
+    """예전 발송 방식: 승인 요청마다 새 HTTP/2 연결을 열고 토큰마다 순서대로 보냅니다."""
+    headers = {
+        "authorization": f"bearer {server._apns_provider_token()}",
+        "apns-topic": server.APNS_BUNDLE_ID,
+        "apns-push-type": "alert",
+        "apns-priority": "10",
+        "content-type": "application/json",
+    }
+    with httpx.Client(http2=True, timeout=10.0) as client:
+        for device_token, _ in server.push_targets("apns"):
+            client.post(f"{BASE_URL}/3/device/{device_token}", headers=headers, json={"aps": {"alert": "x"}})
+
+
+def new_send():
+    server.send_approval_push_to_full_admins(ITEM)
+
+
+def measure(func, repeat: int) -> list:
+    out = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        out.append((time.perf_counter() - started) * 1000)
+    return out
+
+
+def main():
+    # 발송 로그가 결과를 가리지 않도록 서버 print를 끕니다.
+    server.print = lambda *args, **kwargs: None
+    print(f"왕복지연 {RTT * 1000:.0f}ms")
+    for count in (1, 50, 500):
+        set_tokens(count)
+        repeat = 5 if count < 500 else 3
+        for label, func in (("예전 방식", old_send), ("현재 방식", new_send)):
+            values = measure(func, repeat)
+            print(f"  토큰 {count}개 {label}: 중앙값 {statistics.median(values):.1f}ms (첫 회 {values[0]:.1f}ms)")
+    before = STANDIN.stats["connections"]
+    set_tokens(20, dead=5)
+    new_send()
+    with server._apple_admin_lock:
+        left = len(server.apple_admins["bench"]["pushTokens"])
+    print(f"  만료 토큰 5개 포함 20개 발송 뒤 남은 토큰 {left}개, 새 연결 {STANDIN.stats['connections'] - before}개")
+
+
+if __name__ == "__main__":
+    main()
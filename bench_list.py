@@ -0,0 +1,85 @@
+"""관리자 목록 조회 속도를 예전 방식(전체 복사 후 정렬)과 비교합니다.
+사용: python3 bench_list.py [건수 ...]   (기본 10000 100000)
+임시 폴더에 데이터를 만들므로 운영 데이터 파일은 건드리지 않습니다.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+DATA_DIR = tempfile.mkdtemp(prefix="bench-list-")
+os.environ["AUTH_DATA_FILE"] = os.path.join(DATA_DIR, "auth_data.json")
+os.environ["AUTH_CATEGORY_FILE"] = os.path.join(DATA_DIR, "auth_categories.json")
+os.environ["APPLE_ADMIN_FILE"] = os.path.join(DATA_DIR, "apple_admins.json")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import server  # noqa: E402
+
+REPEAT = 5
+
+
+def old_sorted_items(include_deleted: bool = True):
+    """색인 도입 전 sorted_items: 잠금 안에서 전체를 복사하고 매번 날짜순으로 정렬합니다."""
+    with server._auth_lock:
+        items = []
+        for code, data in server.auth_db.items():
+            if not include_deleted and data.get("deletedAt"):
+                continue
+            item = {"code": code, **dict(data)}
+            item["category"] = server.clean_category(item.get("category"))
+            item["enabled"] = bool(item.get("enabled", True))
+            items.append(item)
+    items.sort(key=lambda x: x.get("date") or "", reverse=True)
+    return items
+
+
+def old_first_page(category: str = "", limit: int = 100):
+    items = old_sorted_items(include_deleted=False)
+    if category:
+        items = [item for item in items if item["category"] == category]
+    return items[:limit]
+
+
+def measure(func) -> float:
+    func()
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - started) / REPEAT * 1000
+
+
+def main():
+    counts = [int(x) for x in sys.argv[1:]] or [10000, 100000]
+    for count in counts:
+        db = {}
+        for i in range(count):
+            db[f"k{i}"] = {
+                "name": f"n{i % 97}",
+                "phone": f"{i % 10000:04d}",
+                "status": "approved",
+                "token": "t" * 64,
+                "date": f"2026-{random.randint(1, 12):02d}-{random.randint(1, 28):02d} {random.randint(0, 23):02d}:00",
+                "enabled": i % 7 != 0,
+                "category": ("A", "B", "C")[i % 3],
+                "deletedAt": "2026-02-01 00:00" if i % 11 == 0 else None,
+            }
+        server.restore_full_backup_json(json.dumps({"auth_db": db}).encode())
+        cursor = server.list_page(status="live", limit=100)["nextCursor"]
+        rows = [
+            ("전체 목록 (예전 sorted_items)", lambda: old_sorted_items()),
+            ("첫 페이지 100건, 예전 방식", lambda: old_first_page()),
+            ("첫 페이지 100건, list_page", lambda: server.list_page(status="live", limit=100)),
+            ("카테고리 B 첫 페이지, 예전 방식", lambda: old_first_page("B")),
+            ("카테고리 B 첫 페이지, list_page", lambda: server.list_page(category="B", status="live", limit=100)),
+            ("다음 페이지(커서), list_page", lambda: server.list_page(status="live", limit=100, cursor=cursor)),
+            ("검색어 포함 첫 페이지, list_page", lambda: server.list_page(status="live", q="n5", limit=100)),
+        ]
+        print(f"[{count}건] {REPEAT}회 평균")
+        for label, func in rows:
+            print(f"  {label}: {measure(func):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,67 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Request
 from pydantic import BaseModel
 import secrets
 import json
 import os
 import shutil
+import zlib
+import sqlite3
 import threading
 import io
 import zipfile
 import base64
+import csv
+import tempfile
+import asyncio
+import atexit
+import bisect
+import copy
+import functools
+import heapq
+import random
+import signal
 import time
+import urllib.parse
 import httpx
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from pathlib import Path
-from typing import Optional
+from contextlib import asynccontextmanager, contextmanager, ExitStack, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Iterator, Optional
 import jwt
 from jwt import PyJWKClient
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
 from itsdangerous import URLSafeSerializer, URLSafeTimedSerializer, BadSignature, SignatureExpired
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, StreamingResponse
-from openpyxl import Workbook
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, StreamingResponse, Response
+from openpyxl import Workbook, load_workbook
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.sessions import SessionMiddleware
 
-app = FastAPI()
+try:
+    import brotli
+except ImportError:
+    # 선택 설치. 없으면 gzip만 사용합니다.
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 등. 다중 프로세스 모드에서만 필요합니다.
+    fcntl = None
+
+
+
+@asynccontextmanager
+async def _lifespan(_app):
+    _watch_shutdown_signals()
+    yield
+    _begin_shutdown()
+    await run_in_threadpool(_finish_background_work)
+
+
+app = FastAPI(lifespan=_lifespan)
 
 # 기존 기본 경로를 그대로 유지합니다.
 # Render Persistent Disk를 사용하는 경우 AUTH_DATA_FILE 환경변수로 경로만 바꿀 수 있습니다.
@@ -48,7 +88,84 @@ FCM_APP_ID = os.environ.get("FCM_APP_ID", "").strip()
 FCM_SENDER_ID = os.environ.get("FCM_SENDER_ID", "").strip()
 FCM_SERVICE_ACCOUNT_JSON_BASE64 = os.environ.get("FCM_SERVICE_ACCOUNT_JSON_BASE64", "").strip()
 ANDROID_PUSH_FILE = os.environ.get("ANDROID_PUSH_FILE", str(Path(DATA_FILE).with_name("android_push_tokens.json")))
-DATA_FILE_EXISTED_AT_BOOT = os.path.exists(DATA_FILE)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+# 인증키 저장 방식.
+# - json(기본): 기존과 동일하게 변경마다 auth_data.json 전체를 다시 저장합니다.
+# - journal: 변경된 인증키 한 건만 저널 파일에 추가하고, 주기적으로 auth_data.json 스냅샷으로 압축합니다.
+# - sqlite: 모든 운영 데이터를 SQLite(WAL)에 행 단위로 저장합니다. 최초 실행 시 기존 JSON 파일을 한 번 옮깁니다.
+AUTH_STORAGE = os.environ.get("AUTH_STORAGE", "json").strip().lower() or "json"
+JOURNAL_FILE = os.environ.get("AUTH_JOURNAL_FILE", str(Path(DATA_FILE).with_suffix(".journal")))
+JOURNAL_COMPACT_SECONDS = _env_int("AUTH_JOURNAL_COMPACT_SECONDS", 300)
+JOURNAL_COMPACT_BYTES = _env_int("AUTH_JOURNAL_COMPACT_BYTES", 4 * 1024 * 1024)
+SQLITE_FILE = os.environ.get("AUTH_SQLITE_FILE", str(Path(DATA_FILE).with_name("auth_data.sqlite3")))
+# 여러 워커 프로세스(uvicorn --workers N)로 실행할 때 켭니다. WEB_CONCURRENCY가 2 이상이면 자동으로 켜집니다.
+# 켜면 저장할 때마다 파일 잠금을 잡고, 다른 워커가 바꾼 데이터만 다시 읽습니다.
+MULTI_PROCESS = (
+    os.environ.get("AUTH_MULTI_PROCESS", "").strip().lower() in ("1", "true", "yes", "on")
+    or _env_int("WEB_CONCURRENCY", 1) > 1
+)
+if MULTI_PROCESS and AUTH_STORAGE == "json":
+    # json은 저장마다 파일 전체를 다시 쓰므로 다른 워커가 매번 전체를 다시 읽고 색인을 새로 만들어야 합니다.
+    # 같은 auth_data.json을 기준 스냅샷으로 쓰는 journal로 바꿔 바뀐 인증키만 주고받습니다.
+    print("[STORAGE] multi-process mode uses AUTH_STORAGE=journal instead of json", flush=True)
+    AUTH_STORAGE = "journal"
+SHARED_LOCK_FILE = os.environ.get("AUTH_SHARED_LOCK_FILE", DATA_FILE + ".lock")
+SHARED_STAMP_FILE = os.environ.get("AUTH_SHARED_STAMP_FILE", DATA_FILE + ".stamp")
+# 다중 프로세스 모드에서 Idempotency-Key 응답을 워커끼리 나눠 보는 파일입니다.
+IDEMPOTENCY_FILE = os.environ.get("AUTH_IDEMPOTENCY_FILE", str(Path(DATA_FILE).with_name("auth_idempotency.sqlite3")))
+# 그룹 커밋 대기 시간(ms). 이 시간 동안 모인 저장 요청을 한 번에 디스크에 씁니다. 0이면 기존처럼 즉시 저장합니다.
+# 다중 프로세스 모드에서는 파일 잠금을 쥔 채 바로 저장해야 하므로 항상 0입니다.
+COMMIT_WINDOW_MS = 0 if MULTI_PROCESS else _env_int("AUTH_COMMIT_WINDOW_MS", 20)
+# /admin/api/changes가 기억하는 최근 인증키 변경 묶음 수. 더 오래된 버전을 요청하면 전체 재동기화를 안내합니다.
+CHANGE_LOG_SIZE = max(1, _env_int("AUTH_CHANGE_LOG_SIZE", 5000))
+# /admin/api/events 구독자별 대기 이벤트 수. 이만큼 밀린 구독자는 끊고 재동기화를 안내합니다.
+EVENT_QUEUE_SIZE = max(1, _env_int("AUTH_EVENT_QUEUE_SIZE", 100))
+EVENT_KEEPALIVE_SECONDS = 15
+# 다중 프로세스 모드에서 구독 중인 연결이 다른 워커의 이벤트를 확인하는 주기(초).
+EVENT_SHARED_POLL_SECONDS = 1
+# PC 관리자(/admin/api) 작업 전용 스레드 수. 복원/백업처럼 오래 걸리는 작업이 이벤트 루프를 막지 않게 합니다.
+ADMIN_WORKERS = max(1, _env_int("AUTH_ADMIN_WORKERS", 4))
+# 목록/페이지 응답의 압축 결과를 데이터 버전별로 최대 N개까지 보관합니다.
+COMPRESS_CACHE_ENTRIES = max(1, _env_int("AUTH_COMPRESS_CACHE_ENTRIES", 64))
+# IP별 분당 허용 요청 수(토큰 버킷). 0이면 제한하지 않습니다.
+RATE_LIMIT_APP_CHECK_PER_MINUTE = max(0, _env_int("AUTH_RATE_LIMIT_APP_CHECK_PER_MINUTE", 120))
+RATE_LIMIT_LOGIN_PER_MINUTE = max(0, _env_int("AUTH_RATE_LIMIT_LOGIN_PER_MINUTE", 20))
+# 앞단 프록시 수. Render처럼 프록시가 X-Forwarded-For 끝에 접속 IP를 붙이는 경우 1로 둡니다.
+# 0인데 X-Forwarded-For가 붙어 오면 접속 IP가 프록시 것이라 고객을 가릴 수 없으므로 그 요청은 제한하지 않습니다.
+TRUSTED_PROXY_HOPS = max(0, _env_int("AUTH_TRUSTED_PROXY_HOPS", 0))
+# Idempotency-Key 응답 보관 시간(초)과 최대 개수.
+IDEMPOTENCY_TTL_SECONDS = max(1, _env_int("AUTH_IDEMPOTENCY_TTL_SECONDS", 86400))
+IDEMPOTENCY_MAX_ENTRIES = max(1, _env_int("AUTH_IDEMPOTENCY_MAX_ENTRIES", 10000))
+# APNs 동시 발송 스트림 수. 환경별 HTTP/2 연결 하나를 이 수만큼 나눠 씁니다(연결당 최대 100).
+APNS_CONCURRENCY = max(1, _env_int("AUTH_APNS_CONCURRENCY", 100))
+# FCM 동시 발송 수, 요청 하나의 제한 시간(초), 429/5xx/연결 오류 재시도 횟수.
+FCM_CONCURRENCY = max(1, _env_int("AUTH_FCM_CONCURRENCY", 50))
+FCM_TIMEOUT_SECONDS = max(1, _env_int("AUTH_FCM_TIMEOUT_SECONDS", 10))
+FCM_MAX_RETRIES = max(0, _env_int("AUTH_FCM_MAX_RETRIES", 3))
+# FCM HTTP v1 주소. 사내 프록시나 로컬 모의 서버로 보낼 때만 바꿉니다.
+FCM_HOST = os.environ.get("AUTH_FCM_HOST", "https://fcm.googleapis.com").strip().rstrip("/") or "https://fcm.googleapis.com"
+# 승인 알림 발송 대기열 크기, 발송 스레드 수, 묶음 알림 최대 건수, 종료 시 남은 알림을 보내며 기다리는 시간(초).
+PUSH_QUEUE_SIZE = max(1, _env_int("AUTH_PUSH_QUEUE_SIZE", 1000))
+PUSH_WORKERS = max(1, _env_int("AUTH_PUSH_WORKERS", 2))
+PUSH_DIGEST_MAX = max(1, _env_int("AUTH_PUSH_DIGEST_MAX", 50))
+# 대기열에 이보다 많이 쌓였을 때만 묶음 알림으로 보냅니다. 기본은 발송 스레드 수라, 놀고 있는 스레드가
+# 받을 수 있는 만큼은 승인/거절 버튼이 있는 건별 알림으로 나갑니다.
+PUSH_DIGEST_BACKLOG = max(1, _env_int("AUTH_PUSH_DIGEST_BACKLOG", PUSH_WORKERS))
+PUSH_DRAIN_SECONDS = max(0, _env_int("AUTH_PUSH_DRAIN_SECONDS", 10))
+PUSH_DIGEST_LINES = 5
+# 휴지통 만료 정리 주기(초)와 한 번에 지우는 최대 건수. deletedAt 이후 TRASH_RETENTION_DAYS일이 지난 인증키를 지웁니다.
+TRASH_PURGE_INTERVAL_SECONDS = _env_int("AUTH_TRASH_PURGE_INTERVAL_SECONDS", 3600)
+TRASH_PURGE_BATCH = max(1, _env_int("AUTH_TRASH_PURGE_BATCH", 500))
+TRASH_RETENTION_DAYS = 180
+DATA_FILE_EXISTED_AT_BOOT = os.path.exists(DATA_FILE) or (AUTH_STORAGE == "sqlite" and os.path.exists(SQLITE_FILE))
 
 KST = ZoneInfo("Asia/Seoul")
 
@@ -70,7 +187,87 @@ ALWAYS_ACTIVE_KEYS = {
     "codenote.kyh",
 }
 
-_db_lock = threading.RLock()
+_commit_local = threading.local()
+
+
+class _CommitLock:
+    """RLock과 동일하게 동작합니다.
+    잠금 안에서 요청된 저장은 가장 바깥 잠금을 푼 뒤에 완료를 기다리므로,
+    디스크 쓰기를 기다리는 동안 다른 요청이 잠금에서 막히지 않습니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        outermost = getattr(_commit_local, "depth", 0) == 0
+        if outermost and MULTI_PROCESS:
+            # 다른 워커와도 겹치지 않도록 가장 바깥 잠금에서 파일 잠금을 잡고 밀린 변경을 읽어 옵니다.
+            _shared_enter()
+        acquired = self._lock.acquire(blocking, timeout)
+        if acquired:
+            _commit_local.depth = getattr(_commit_local, "depth", 0) + 1
+        elif outermost and MULTI_PROCESS:
+            _shared_exit()
+        return acquired
+
+    def release(self):
+        self._lock.release()
+        _commit_local.depth -= 1
+        if _commit_local.depth == 0:
+            try:
+                _wait_pending_commits()
+            finally:
+                if MULTI_PROCESS:
+                    _shared_exit()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+# 저장소별 잠금. 여러 개를 함께 잡을 때는 반드시 아래 순서를 지킵니다.
+#   _auth_lock -> 인증키별 잠금(_code_lock) -> _category_lock -> _apple_admin_lock
+#   -> _approval_lock -> _android_push_lock
+# _auth_lock은 auth_db 키 추가/삭제/이름 변경과 전체 순회에만 짧게 사용하고,
+# 레코드 한 건의 값 변경은 인증키별 잠금만 잡으므로 서로 다른 인증키 요청은 병렬로 처리됩니다.
+_auth_lock = _CommitLock()
+_code_lock_stripes = [_CommitLock() for _ in range(64)]
+_category_lock = _CommitLock()
+_apple_admin_lock = _CommitLock()
+_approval_lock = _CommitLock()
+_android_push_lock = _CommitLock()
+
+
+def _code_lock(code: str) -> _CommitLock:
+    return _code_lock_stripes[hash(code) % len(_code_lock_stripes)]
+
+
+@contextmanager
+def _code_locks(*codes: str):
+    with ExitStack() as stack:
+        for index in sorted({hash(code) % len(_code_lock_stripes) for code in codes}):
+            stack.enter_context(_code_lock_stripes[index])
+        yield
+
+
+@contextmanager
+def _auth_key_lock(*codes: str):
+    """인증키 추가/삭제용. auth_db 구조 잠금과 해당 인증키 잠금을 순서대로 잡습니다."""
+    with _auth_lock, _code_locks(*codes):
+        yield
+
+
+@contextmanager
+def _all_auth_locks():
+    """전체 교체/삭제용. 진행 중인 인증키별 변경이 모두 끝날 때까지 기다립니다."""
+    with _auth_lock, ExitStack() as stack:
+        for lock in _code_lock_stripes:
+            stack.enter_context(lock)
+        yield
 
 
 def _ensure_parent(path: str):
@@ -100,6 +297,281 @@ def _atomic_json_save(path: str, data):
     os.replace(tmp, target)
 
 
+def _atomic_text_save(path: str, text: str):
+    """.bak 없이 작은 보조 파일을 원자적으로 교체합니다."""
+    _ensure_parent(path)
+    target = Path(path)
+    tmp = target.with_name(target.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, target)
+
+
+# ============================================================
+#   인증키 저널 (AUTH_STORAGE=journal)
+#   저널 첫 줄(base)에는 기준 스냅샷의 크기/수정시각을 기록합니다.
+#   스냅샷 저장 직후 비정상 종료되어 저널이 남아도 기준이 다르면 재적용하지 않습니다.
+#   각 변경은 레코드 전체를 기록하므로 같은 저널을 다시 적용해도 결과가 같습니다.
+# ============================================================
+_journal_lock = threading.Lock()
+_journal_compact_event = threading.Event()
+
+
+def _journal_base_header() -> dict:
+    st = os.stat(DATA_FILE)
+    return {"op": "base", "size": st.st_size, "mtime": st.st_mtime_ns}
+
+
+def _journal_reset():
+    """현재 auth_data.json 스냅샷을 기준으로 빈 저널을 만듭니다."""
+    with _journal_lock:
+        _atomic_text_save(JOURNAL_FILE, json.dumps(_journal_base_header()) + "\n")
+
+
+def _journal_append(entries: list[dict]) -> bool:
+    """변경 레코드를 저널 끝에 추가합니다. 기준 저널이 없으면 False를 반환합니다."""
+    if not entries:
+        return True
+    lines = "".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n" for e in entries)
+    with _journal_lock:
+        if not os.path.exists(JOURNAL_FILE):
+            return False
+        with open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+    if size >= JOURNAL_COMPACT_BYTES:
+        _journal_compact_event.set()
+    return True
+
+
+def _journal_has_entries() -> bool:
+    try:
+        with open(JOURNAL_FILE, "r", encoding="utf-8") as f:
+            f.readline()
+            return bool(f.readline().strip())
+    except FileNotFoundError:
+        return False
+
+
+def _replay_journal(data: dict) -> int:
+    """스냅샷 위에 저널을 재적용합니다. 마지막 줄이 기록 도중 끊긴 경우만 무시합니다."""
+    if not os.path.exists(JOURNAL_FILE) or not os.path.exists(DATA_FILE):
+        return 0
+    with open(JOURNAL_FILE, "r", encoding="utf-8") as f:
+        lines = f.read().split("\n")
+    try:
+        header = json.loads(lines[0])
+    except ValueError:
+        return 0
+    expected = _journal_base_header()
+    if header.get("op") != "base" or header.get("size") != expected["size"] or header.get("mtime") != expected["mtime"]:
+        # 스냅샷 저장 후 저널을 초기화하기 전에 종료된 경우입니다. 이미 스냅샷에 반영되어 있습니다.
+        return 0
+
+    applied = 0
+    body = lines[1:]
+    for index, line in enumerate(body):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError as exc:
+            if any(rest.strip() for rest in body[index + 1:]):
+                raise RuntimeError(f"인증키 저널 손상: line {index + 2}") from exc
+            break
+        code = entry.get("code")
+        if not isinstance(code, str):
+            continue
+        if entry.get("op") == "put" and isinstance(entry.get("data"), dict):
+            data[code] = _normalize_record(entry["data"])
+            applied += 1
+        elif entry.get("op") == "del":
+            data.pop(code, None)
+            applied += 1
+    return applied
+
+
+def _journal_entry(code: str) -> dict:
+    record = auth_db.get(code)
+    if record is None:
+        return {"op": "del", "code": code}
+    return {"op": "put", "code": code, "data": dict(record)}
+
+
+def _journal_compactor():
+    while True:
+        _journal_compact_event.wait(timeout=JOURNAL_COMPACT_SECONDS)
+        _journal_compact_event.clear()
+        try:
+            if _journal_has_entries():
+                # 메모리 내용은 그대로이므로 인덱스 재구성 없이 스냅샷만 다시 씁니다.
+                _commit("auth", (), changed=False)
+        except Exception as exc:
+            print(f"[JOURNAL] compaction failed: {type(exc).__name__}: {exc}", flush=True)
+
+
+# ============================================================
+#   SQLite 저장소 (AUTH_STORAGE=sqlite)
+#   조회는 기존처럼 메모리 dict와 색인을 사용하고, 저장은 변경된 행만 UPSERT/DELETE 합니다.
+#   레코드 원본은 data 컬럼(JSON)에 그대로 두어 /list 등 기존 응답 형식을 유지합니다.
+#   name/phone 등 컬럼은 DB를 직접 들여다볼 때를 위한 것이고, SQLite로 조회하는 곳이 없으므로
+#   보조 인덱스는 두지 않습니다(예전 DB에 만들어 둔 인덱스는 열 때 지웁니다).
+#   인증키를 지정하지 않은 저장은 복원/전체 삭제/전체 교체뿐이므로 테이블 내용을 통째로 바꿉니다.
+# ============================================================
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS auth_keys (
+    code TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    name TEXT,
+    phone TEXT,
+    category TEXT,
+    status TEXT,
+    enabled INTEGER,
+    deleted_at TEXT,
+    date TEXT
+);
+DROP INDEX IF EXISTS idx_auth_keys_name_phone;
+DROP INDEX IF EXISTS idx_auth_keys_category;
+DROP INDEX IF EXISTS idx_auth_keys_status_enabled;
+DROP INDEX IF EXISTS idx_auth_keys_deleted_at;
+CREATE TABLE IF NOT EXISTS categories (position INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS apple_admins (user_id TEXT PRIMARY KEY, data TEXT NOT NULL, allowed_category TEXT);
+CREATE TABLE IF NOT EXISTS approval_requests (request_id TEXT PRIMARY KEY, data TEXT NOT NULL, code TEXT, requested_at TEXT);
+DROP INDEX IF EXISTS idx_approval_requests_code;
+CREATE TABLE IF NOT EXISTS android_push_tokens (source_code TEXT PRIMARY KEY, data TEXT NOT NULL);
+"""
+
+_sqlite_lock = threading.Lock()
+_sqlite_conn: Optional[sqlite3.Connection] = None
+
+
+def _sqlite_text(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _sqlite_auth_columns(record: dict) -> dict:
+    return {
+        "name": _sqlite_text(record.get("name")),
+        "phone": _sqlite_text(record.get("phone")),
+        "category": str(record.get("category") or "미지정").strip() or "미지정",
+        "status": _sqlite_text(record.get("status")),
+        "enabled": 1 if record.get("enabled", True) else 0,
+        "deleted_at": _sqlite_text(record.get("deletedAt")),
+        "date": _sqlite_text(record.get("date")),
+    }
+
+
+# store 이름: (테이블, 키 컬럼, 검색용 컬럼 추출 함수)
+_SQLITE_STORES = {
+    "auth": ("auth_keys", "code", _sqlite_auth_columns),
+    "apple_admins": ("apple_admins", "user_id", lambda r: {"allowed_category": _sqlite_text(r.get("allowedCategory"))}),
+    "approvals": ("approval_requests", "request_id", lambda r: {"code": _sqlite_text(r.get("code")), "requested_at": _sqlite_text(r.get("requestedAt"))}),
+    "android_push": ("android_push_tokens", "source_code", lambda r: {}),
+}
+
+
+def _sqlite() -> sqlite3.Connection:
+    global _sqlite_conn
+    if _sqlite_conn is None:
+        _ensure_parent(SQLITE_FILE)
+        conn = sqlite3.connect(SQLITE_FILE, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.executescript(_SQLITE_SCHEMA)
+        _sqlite_conn = conn
+    return _sqlite_conn
+
+
+def _sqlite_upsert_sql(store: str, columns: list[str]) -> str:
+    table, key_column, _ = _SQLITE_STORES[store]
+    names = [key_column, "data", *columns]
+    updates = ", ".join(f"{name} = excluded.{name}" for name in names[1:])
+    return (
+        f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)}) "
+        f"ON CONFLICT({key_column}) DO UPDATE SET {updates}"
+    )
+
+
+def _sqlite_write_rows(conn: sqlite3.Connection, store: str, source: dict, keys):
+    table, key_column, extract = _SQLITE_STORES[store]
+    for key in keys:
+        value = source.get(key)
+        if value is None:
+            conn.execute(f"DELETE FROM {table} WHERE {key_column} = ?", (key,))
+            continue
+        columns = extract(value)
+        conn.execute(
+            _sqlite_upsert_sql(store, list(columns)),
+            (key, json.dumps(value, ensure_ascii=False), *columns.values()),
+        )
+
+
+def _sqlite_save_store(store: str, source: dict, keys: tuple = ()):
+    """keys가 있으면 해당 행만 저장합니다. 없으면(복원/전체 교체) 테이블 내용을 source로 바꿉니다."""
+    table, _, _ = _SQLITE_STORES[store]
+    with _sqlite_lock:
+        conn = _sqlite()
+        with conn:
+            if keys:
+                _sqlite_write_rows(conn, store, source, dict.fromkeys(keys))
+                return
+            conn.execute(f"DELETE FROM {table}")
+            _sqlite_write_rows(conn, store, source, list(source))
+
+
+def _sqlite_save_categories(names: list[str]):
+    with _sqlite_lock:
+        conn = _sqlite()
+        with conn:
+            conn.execute("DELETE FROM categories")
+            conn.executemany("INSERT INTO categories (position, name) VALUES (?, ?)", list(enumerate(names)))
+
+
+def _sqlite_migrated(conn: sqlite3.Connection, store: str) -> bool:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (f"migrated:{store}",)).fetchone()
+    return row is not None
+
+
+def _sqlite_mark_migrated(conn: sqlite3.Connection, store: str, count: int):
+    conn.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+        (f"migrated:{store}", json.dumps({"at": now_kst().isoformat(timespec="seconds"), "rows": count})),
+    )
+
+
+def _sqlite_load_store(store: str, load_json_file) -> dict:
+    """SQLite에서 저장소를 읽습니다. 처음이면 기존 JSON 파일 내용을 한 번 옮겨 둡니다."""
+    table, key_column, _ = _SQLITE_STORES[store]
+    with _sqlite_lock:
+        conn = _sqlite()
+        if not _sqlite_migrated(conn, store):
+            source = load_json_file()
+            with conn:
+                _sqlite_write_rows(conn, store, source, list(source))
+                _sqlite_mark_migrated(conn, store, len(source))
+            print(f"[SQLITE] migrated {store}: {len(source)} rows", flush=True)
+        rows = conn.execute(f"SELECT {key_column}, data FROM {table} ORDER BY rowid").fetchall()
+    return {key: json.loads(data) for key, data in rows}
+
+
+def _sqlite_load_categories() -> list[str]:
+    with _sqlite_lock:
+        conn = _sqlite()
+        if not _sqlite_migrated(conn, "categories"):
+            names = _load_categories_file()
+            with conn:
+                conn.execute("DELETE FROM categories")
+                conn.executemany("INSERT INTO categories (position, name) VALUES (?, ?)", list(enumerate(names)))
+                _sqlite_mark_migrated(conn, "categories", len(names))
+        return [name for (name,) in conn.execute("SELECT name FROM categories ORDER BY position")]
+
+
 def _normalize_record(record: dict) -> dict:
     # 기존 레코드에 없는 새 필드는 기본값으로만 보완합니다.
     record.setdefault("deletedAt", None)
@@ -109,6 +581,12 @@ def _normalize_record(record: dict) -> dict:
 
 
 def load_data():
+    if AUTH_STORAGE == "sqlite":
+        return {code: _normalize_record(value) for code, value in _sqlite_load_store("auth", _load_data_file).items()}
+    return _load_data_file()
+
+
+def _load_data_file(reset_journal: bool = True):
     if not os.path.exists(DATA_FILE):
         return {}
 
@@ -121,22 +599,41 @@ def load_data():
             if not isinstance(value, dict):
                 raise ValueError(f"invalid record: {key}")
             _normalize_record(value)
+        if AUTH_STORAGE == "journal":
+            if not reset_journal:
+                # 다른 워커가 쓰는 중인 저널은 건드리지 않고 읽기만 합니다.
+                _replay_journal(data)
+                return data
+            # 재적용한 변경분을 바로 스냅샷에 합쳐 부팅 후에는 항상 빈 저널에서 시작합니다.
+            if _replay_journal(data):
+                _atomic_json_save(DATA_FILE, data)
+            _journal_reset()
+        elif os.path.exists(JOURNAL_FILE):
+            # 다중 프로세스 모드(journal)로 돌다가 돌아온 경우입니다. 남은 저널을 스냅샷에 합치고 지웁니다.
+            if _replay_journal(data):
+                _atomic_json_save(DATA_FILE, data)
+            os.remove(JOURNAL_FILE)
         return data
     except Exception as exc:
         # 손상된 파일을 빈 DB로 간주한 뒤 덮어쓰는 사고를 막습니다.
         raise RuntimeError(f"인증키 데이터 로드 실패: {exc}") from exc
 
 
+def _load_categories_file() -> list[str]:
+    if not os.path.exists(CATEGORY_FILE):
+        return []
+    try:
+        with open(CATEGORY_FILE, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if isinstance(raw, list):
+            return list(dict.fromkeys(str(x).strip() for x in raw if str(x).strip() and str(x).strip() != "미지정"))
+    except Exception:
+        pass
+    return []
+
+
 def load_categories():
-    categories = []
-    if os.path.exists(CATEGORY_FILE):
-        try:
-            with open(CATEGORY_FILE, "r", encoding="utf-8") as f:
-                raw = json.load(f)
-            if isinstance(raw, list):
-                categories = [str(x).strip() for x in raw if str(x).strip() and str(x).strip() != "미지정"]
-        except Exception:
-            categories = []
+    categories = _sqlite_load_categories() if AUTH_STORAGE == "sqlite" else _load_categories_file()
 
     # 기존 데이터에 이미 category가 있으면 별도 파일이 없어도 목록에 포함합니다.
     for data in auth_db.values() if "auth_db" in globals() else []:
@@ -147,16 +644,1059 @@ def load_categories():
     return list(dict.fromkeys(categories))
 
 
-def save_data():
-    with _db_lock:
-        _atomic_json_save(DATA_FILE, auth_db)
+# ============================================================
+#   데이터 버전 (ETag)
+#   저장소별 변경 횟수입니다. save_*가 불릴 때마다 올라가므로 목록 API는
+#   버전이 같으면 다시 직렬화하지 않고 304로 응답합니다.
+#   재시작하면 0부터 다시 세므로 ETag에 부팅 ID를 함께 넣습니다.
+#   인증키는 버전마다 바뀐 코드를 _change_log에 남겨 변경분 동기화에 씁니다.
+#   다중 프로세스 모드에서는 부팅 ID와 버전을 스탬프로 공유하므로 어느 워커가 받아도 ETag가 같습니다.
+# ============================================================
+_BOOT_ID = secrets.token_hex(4)
+_version_lock = threading.Lock()
+_data_versions = {"auth": 0, "categories": 0, "apple_admins": 0, "approvals": 0, "android_push": 0}
+_change_log: deque = deque(maxlen=CHANGE_LOG_SIZE)
+# 이 버전 이전부터의 변경분은 로그에서 밀려났거나 전체 저장으로 끊겼으므로 재동기화가 필요합니다.
+_change_floor = 0
+
+
+def _bump_version(store: str, keys: tuple = (), version: Optional[int] = None):
+    """version을 주면(다른 워커의 변경을 반영할 때) 1 올리는 대신 스탬프의 번호로 맞춥니다."""
+    global _change_floor
+    with _version_lock:
+        _data_versions[store] = _data_versions[store] + 1 if version is None else max(version, _data_versions[store])
+        if store != "auth":
+            return
+        version = _data_versions["auth"]
+        if not keys:
+            _change_floor = version
+            _change_log.clear()
+            return
+        if len(_change_log) == _change_log.maxlen:
+            _change_floor = max(_change_floor, _change_log[0][0])
+        _change_log.append((version, keys))
+
+
+def auth_changes_since(since: int) -> tuple[int, Optional[list[str]]]:
+    """since 이후 바뀐 인증키 코드 목록과 현재 버전을 돌려줍니다. 로그로 알 수 없으면 목록 대신 None입니다."""
+    with _version_lock:
+        version = _data_versions["auth"]
+        if since < _change_floor or since > version:
+            return version, None
+        codes = {}
+        for entry_version, keys in reversed(_change_log):
+            if entry_version <= since:
+                break
+            codes.update(dict.fromkeys(keys))
+    return version, list(codes)
+
+
+def data_etag(*stores: str) -> str:
+    with _version_lock:
+        versions = ".".join(str(_data_versions[store]) for store in stores)
+    return f'"{_BOOT_ID}-{versions}"'
+
+
+# 압축한 본문의 ETag 뒤에 붙이는 표시. 같은 버전이라도 인코딩마다 바이트가 다르므로 강한 ETag를 나눕니다.
+ETAG_ENCODING_SUFFIXES = {"gzip": "gz", "br": "br"}
+
+
+def _encoded_etag(etag: str, encoding: str) -> str:
+    return f'{etag[:-1]}-{ETAG_ENCODING_SUFFIXES[encoding]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> Optional[str]:
+    """If-None-Match에 etag(또는 그 압축본 ETag)가 있으면 클라이언트가 보낸 그 태그를 돌려줍니다."""
+    header = request.headers.get("if-none-match", "")
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*":
+            return etag
+        if tag == etag or tag in (_encoded_etag(etag, encoding) for encoding in ETAG_ENCODING_SUFFIXES):
+            return tag
+    return None
+
+
+def _conditional(request: Request, response: Response, *stores: str) -> Optional[Response]:
+    """응답 본문을 만들기 전에 호출합니다. 클라이언트 ETag가 현재 버전과 같으면 304 응답을 돌려줍니다.
+    304에는 클라이언트가 가진 표현(압축 여부)의 ETag를 그대로 돌려줍니다."""
+    etag = data_etag(*stores)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    matched = _etag_matches(request, etag)
+    if matched:
+        return Response(status_code=304, headers={**headers, "ETag": matched})
+    response.headers.update(headers)
+    return None
+
+
+# ============================================================
+#   응답 압축
+#   큰 목록/페이지 응답만 Accept-Encoding에 따라 br(설치 시) 또는 gzip으로 보냅니다.
+#   압축 결과는 (경로, 인코딩)별로 ETag와 함께 보관해 데이터가 그대로면 다시 압축하지 않고,
+#   데이터 버전이 바뀌면 ETag가 달라져 자연히 새로 만듭니다.
+# ============================================================
+_compress_lock = threading.Lock()
+_compress_cache: OrderedDict = OrderedDict()
+
+
+def accepted_encoding(request: Request) -> Optional[str]:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress_chunks(chunks, encoding: str) -> bytes:
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        out = [compressor.process(chunk.encode("utf-8") if isinstance(chunk, str) else chunk) for chunk in chunks]
+        out.append(compressor.finish())
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        out = [compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk) for chunk in chunks]
+        out.append(compressor.flush())
+    return b"".join(out)
+
+
+def cached_compressed(key: str, etag: Optional[str], encoding: str, build) -> bytes:
+    """build()가 돌려주는 본문 조각을 압축합니다. etag가 있으면 같은 key/인코딩/ETag 결과를 재사용합니다."""
+    cache_key = (key, encoding)
+    if etag:
+        with _compress_lock:
+            hit = _compress_cache.get(cache_key)
+            if hit is not None and hit[0] == etag:
+                _compress_cache.move_to_end(cache_key)
+                return hit[1]
+    body = _compress_chunks(build(), encoding)
+    if etag:
+        with _compress_lock:
+            _compress_cache[cache_key] = (etag, body)
+            _compress_cache.move_to_end(cache_key)
+            while len(_compress_cache) > COMPRESS_CACHE_ENTRIES:
+                _compress_cache.popitem(last=False)
+    return body
+
+
+def compressed_response(body: bytes, encoding: str, media_type: str, headers: Optional[dict] = None) -> Response:
+    """ETag가 있으면 인코딩 표시를 붙입니다. 같은 데이터의 비압축 응답과 ETag가 겹치지 않습니다."""
+    merged = dict(headers or {})
+    for name in ("ETag", "etag"):
+        if name in merged:
+            merged[name] = _encoded_etag(merged[name], encoding)
+    merged["Content-Encoding"] = encoding
+    merged["Vary"] = "Accept-Encoding"
+    return Response(content=body, media_type=media_type, headers=merged)
+
+
+# ============================================================
+#   요청 속도 제한
+#   (범위, 클라이언트 IP)마다 분당 한도만큼 채워지는 토큰 버킷을 메모리에 둡니다.
+#   일괄 요청은 비용만큼 토큰을 빼고, 모자란 만큼은 이후 요청이 기다려서 갚습니다.
+#   다중 프로세스 모드에서는 버킷이 워커마다 따로 있으므로 한도를 워커 수(WEB_CONCURRENCY)로 나눠
+#   워커마다 적용합니다. 연결이 워커에 고르게 나뉘면 전체 한도가 설정값과 같아집니다.
+#   AUTH_TRUSTED_PROXY_HOPS가 0인데 X-Forwarded-For가 있으면 모든 고객이 프록시 IP 하나로 묶이므로
+#   그런 요청은 세지 않고 통과시킵니다(skipped로 집계).
+# ============================================================
+RATE_LIMIT_WORKERS = max(1, _env_int("WEB_CONCURRENCY", 1)) if MULTI_PROCESS else 1
+RATE_LIMIT_SCOPES = {
+    scope: -(-per_minute // RATE_LIMIT_WORKERS)
+    for scope, per_minute in (
+        ("app_check", RATE_LIMIT_APP_CHECK_PER_MINUTE),
+        ("login", RATE_LIMIT_LOGIN_PER_MINUTE),
+    )
+}
+# 추적하는 버킷이 이보다 많아지면 가득 찬(한동안 요청이 없던) 버킷부터 버립니다.
+RATE_LIMIT_MAX_BUCKETS = 100000
+_rate_lock = threading.Lock()
+_rate_buckets: dict[tuple[str, str], list] = {}
+_rate_counters = {scope: {"allowed": 0, "rejected": 0, "skipped": 0} for scope in RATE_LIMIT_SCOPES}
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """속도 제한에 쓸 클라이언트 IP. 프록시 뒤인데 믿을 단계 수를 모르면 None입니다."""
+    forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+    if TRUSTED_PROXY_HOPS:
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    elif forwarded:
+        return None
+    return request.client.host if request.client else "unknown"
+
+
+def _prune_rate_buckets(now: float):
+    for key, bucket in list(_rate_buckets.items()):
+        per_minute = RATE_LIMIT_SCOPES[key[0]]
+        if bucket[0] + (now - bucket[1]) * per_minute / 60 >= per_minute:
+            del _rate_buckets[key]
+    # 서로 다른 IP가 한꺼번에 몰려 아직 차 있는 버킷이 없으면 오래된 버킷부터 버립니다.
+    excess = len(_rate_buckets) - RATE_LIMIT_MAX_BUCKETS * 9 // 10
+    for key in list(_rate_buckets)[:max(0, excess)]:
+        del _rate_buckets[key]
+
+
+def rate_limit(request: Request, scope: str, cost: int = 1):
+    """한도를 넘으면 Retry-After와 함께 429를 냅니다. 버킷에 토큰이 남아 있으면 비용이 커도 통과시킵니다."""
+    per_minute = RATE_LIMIT_SCOPES[scope]
+    if not per_minute:
+        return
+    ip = client_ip(request)
+    if ip is None:
+        with _rate_lock:
+            _rate_counters[scope]["skipped"] += 1
+        return
+    key = (scope, ip)
+    now = time.monotonic()
+    with _rate_lock:
+        bucket = _rate_buckets.get(key)
+        if bucket is None:
+            if len(_rate_buckets) >= RATE_LIMIT_MAX_BUCKETS:
+                _prune_rate_buckets(now)
+            bucket = _rate_buckets[key] = [float(per_minute), now]
+        else:
+            bucket[0] = min(float(per_minute), bucket[0] + (now - bucket[1]) * per_minute / 60)
+            bucket[1] = now
+        if bucket[0] < 1:
+            _rate_counters[scope]["rejected"] += 1
+            retry_after = max(1, int((1 - bucket[0]) * 60 / per_minute + 0.999))
+            raise HTTPException(status_code=429, detail="too_many_requests", headers={"Retry-After": str(retry_after)})
+        bucket[0] -= cost
+        _rate_counters[scope]["allowed"] += 1
+
+
+def rate_limit_stats() -> dict:
+    with _rate_lock:
+        scopes = {
+            scope: {"perMinute": RATE_LIMIT_SCOPES[scope], **counters}
+            for scope, counters in _rate_counters.items()
+        }
+        tracked = len(_rate_buckets)
+    return {"scopes": scopes, "trackedClients": tracked, "trustedProxyHops": TRUSTED_PROXY_HOPS, "workers": RATE_LIMIT_WORKERS}
+
+
+# ============================================================
+#   재시도 중복 방지 (Idempotency-Key)
+#   같은 범위/키로 다시 온 요청은 처음 성공한 응답을 그대로 돌려주고 저장이나 푸시를 반복하지 않습니다.
+#   처리 중에 같은 키가 또 오면 앞 요청이 끝날 때까지 기다립니다. 실패한 요청은 보관하지 않습니다.
+#   다중 프로세스 모드에서는 재시도가 다른 워커로 갈 수 있으므로 응답을 공유 파일(IDEMPOTENCY_FILE)에
+#   보관하고, 확인부터 보관까지 워커 간 파일 잠금 안에서 합니다.
+# ============================================================
+IdempotencyKey = Annotated[Optional[str], Header(alias="Idempotency-Key")]
+
+_idempotency_lock = threading.Lock()
+# (범위, 키) -> [만료 시각, 요청 내용, 응답 또는 None(처리 중), 완료 이벤트]
+_idempotency_cache: OrderedDict = OrderedDict()
+_idempotency_counters = {"replayed": 0, "stored": 0}
+_idempotency_db: Optional[sqlite3.Connection] = None
+
+
+def _expire_idempotency(now: float):
+    # 보관 시간이 모두 같으므로 앞에서부터 만료됩니다.
+    while _idempotency_cache:
+        if next(iter(_idempotency_cache.values()))[0] > now:
+            break
+        _idempotency_cache.popitem(last=False)
+    if len(_idempotency_cache) >= IDEMPOTENCY_MAX_ENTRIES:
+        # 가득 차면 처리 중이 아닌 오래된 항목을 10%쯤 한 번에 비웁니다.
+        excess = len(_idempotency_cache) - IDEMPOTENCY_MAX_ENTRIES * 9 // 10
+        finished = [key for key, entry in _idempotency_cache.items() if entry[2] is not None]
+        for key in finished[:excess]:
+            del _idempotency_cache[key]
+
+
+def idempotent(scope: str, key: Optional[str], payload, run):
+    """key가 없으면 run()을 그대로 실행합니다. 같은 키를 다른 요청 내용으로 다시 쓰면 422입니다."""
+    key = (key or "").strip()
+    if not key:
+        return run()
+    if len(key) > 255:
+        raise HTTPException(status_code=400, detail="idempotency_key_too_long")
+    fingerprint = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    if MULTI_PROCESS:
+        return _idempotent_shared(scope, key, fingerprint, run)
+    cache_key = (scope, key)
+    while True:
+        with _idempotency_lock:
+            now = time.monotonic()
+            _expire_idempotency(now)
+            entry = _idempotency_cache.get(cache_key)
+            if entry is None or entry[0] <= now:
+                done = threading.Event()
+                _idempotency_cache[cache_key] = [now + IDEMPOTENCY_TTL_SECONDS, fingerprint, None, done]
+                _idempotency_cache.move_to_end(cache_key)
+                break
+            if entry[1] != fingerprint:
+                raise HTTPException(status_code=422, detail="idempotency_key_reused")
+            if entry[2] is not None:
+                _idempotency_counters["replayed"] += 1
+                return entry[2]
+            pending = entry[3]
+        # 같은 키의 앞 요청이 처리 중이면 끝나기를 기다렸다가 다시 확인합니다.
+        pending.wait()
+    try:
+        result = run()
+    except BaseException:
+        with _idempotency_lock:
+            entry = _idempotency_cache.get(cache_key)
+            if entry is not None and entry[3] is done:
+                del _idempotency_cache[cache_key]
+        done.set()
+        raise
+    with _idempotency_lock:
+        entry = _idempotency_cache.get(cache_key)
+        if entry is not None and entry[3] is done:
+            entry[2] = result
+            _idempotency_counters["stored"] += 1
+    done.set()
+    return result
+
+
+def _shared_idempotency_db() -> sqlite3.Connection:
+    global _idempotency_db
+    if _idempotency_db is None:
+        _ensure_parent(IDEMPOTENCY_FILE)
+        conn = sqlite3.connect(IDEMPOTENCY_FILE, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS idempotency ("
+            "scope TEXT NOT NULL, key TEXT NOT NULL, expires REAL NOT NULL, fingerprint TEXT NOT NULL, "
+            "response TEXT NOT NULL, PRIMARY KEY (scope, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idempotency_expires ON idempotency (expires)")
+        _idempotency_db = conn
+    return _idempotency_db
+
+
+def _idempotent_shared(scope: str, key: str, fingerprint: str, run):
+    """다중 프로세스 모드의 idempotent. 파일 잠금을 쥔 채 확인/실행/보관하므로 같은 키는 전체 워커에서 한 번만 실행됩니다."""
+    with shared_section():
+        conn = _shared_idempotency_db()
+        now = time.time()
+        row = conn.execute(
+            "SELECT fingerprint, response FROM idempotency WHERE scope = ? AND key = ? AND expires > ?", (scope, key, now)
+        ).fetchone()
+        if row is not None:
+            if row[0] != fingerprint:
+                raise HTTPException(status_code=422, detail="idempotency_key_reused")
+            with _idempotency_lock:
+                _idempotency_counters["replayed"] += 1
+            return json.loads(row[1])
+        result = run()
+        with conn:
+            conn.execute("DELETE FROM idempotency WHERE expires <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotency (scope, key, expires, fingerprint, response) VALUES (?, ?, ?, ?, ?)",
+                (scope, key, now + IDEMPOTENCY_TTL_SECONDS, fingerprint, json.dumps(result, ensure_ascii=False)),
+            )
+            # 가득 차면 만료가 가까운 것부터 버립니다.
+            conn.execute(
+                "DELETE FROM idempotency WHERE rowid IN (SELECT rowid FROM idempotency ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                (IDEMPOTENCY_MAX_ENTRIES,),
+            )
+        with _idempotency_lock:
+            _idempotency_counters["stored"] += 1
+        return result
+
+
+def idempotency_stats() -> dict:
+    if MULTI_PROCESS:
+        with shared_section():
+            entries = _shared_idempotency_db().execute("SELECT COUNT(*) FROM idempotency").fetchone()[0]
+    else:
+        with _idempotency_lock:
+            entries = len(_idempotency_cache)
+    with _idempotency_lock:
+        return {
+            "entries": entries,
+            "ttlSeconds": IDEMPOTENCY_TTL_SECONDS,
+            "maxEntries": IDEMPOTENCY_MAX_ENTRIES,
+            **_idempotency_counters,
+        }
 
 
-def save_categories():
-    with _db_lock:
+# ============================================================
+#   관리자 실시간 이벤트 (SSE)
+#   변경 함수는 요청 스레드에서 publish_event만 부르고, 실제 전달은 이벤트 루프에서
+#   구독자별 큐로 나눠 넣습니다. 큐가 가득 찬 구독자는 끊어서 다른 구독자를 막지 않습니다.
+# ============================================================
+_event_lock = threading.Lock()
+_event_subscribers: set = set()
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_event_seq = 0
+# 서버 종료가 시작되면 켜집니다. 열린 스트림이 uvicorn 정상 종료(와 atexit 저장/발송 정리)를 막지 않게 합니다.
+_shutdown_event = threading.Event()
+
+
+def _subscribe_events() -> asyncio.Queue:
+    global _event_loop
+    queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+    with _event_lock:
+        _event_loop = asyncio.get_running_loop()
+        _event_subscribers.add(queue)
+    return queue
+
+
+def _unsubscribe_events(queue: asyncio.Queue):
+    with _event_lock:
+        _event_subscribers.discard(queue)
+
+
+def _fan_out_event(message: str):
+    with _event_lock:
+        subscribers = list(_event_subscribers)
+    for queue in subscribers:
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # 느린 구독자는 밀린 이벤트를 버리고 종료 신호(None)만 남깁니다.
+            _unsubscribe_events(queue)
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+
+def _close_event_streams():
+    """이벤트 루프에서 실행합니다. 모든 구독자에게 종료 신호(None)를 넣습니다."""
+    with _event_lock:
+        subscribers = list(_event_subscribers)
+        _event_subscribers.clear()
+    for queue in subscribers:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+
+def _begin_shutdown():
+    """열린 이벤트 스트림을 끝냅니다. 신호 처리기에서도 부르므로 _event_lock을 잡지 않습니다."""
+    _shutdown_event.set()
+    loop = _event_loop
+    if loop is None:
+        return
+    try:
+        loop.call_soon_threadsafe(_close_event_streams)
+    except RuntimeError:
+        # 루프가 이미 닫혔습니다.
+        pass
+
+
+def _watch_shutdown_signals():
+    """uvicorn은 열린 연결이 끝나길 기다린 뒤에 lifespan 종료를 보내므로,
+    종료 신호 처리기 앞에 끼어들어 스트림부터 끝냅니다."""
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(signum)
+        if not callable(previous):
+            continue
+
+        def handler(sig, frame, previous=previous):
+            _begin_shutdown()
+            previous(sig, frame)
+
+        signal.signal(signum, handler)
+
+
+def publish_event(event_type: str, **data):
+    """관리자 페이지 구독자에게 이벤트를 보냅니다.
+    다중 프로세스 모드에서는 스탬프에도 남겨 다른 워커에 연결된 구독자도 받게 합니다."""
+    if MULTI_PROCESS:
+        with shared_section():
+            _shared_events.append([event_type, data])
+    _publish_local_event(event_type, data)
+
+
+def _publish_local_event(event_type: str, data: dict):
+    """이 워커의 구독자에게만 보냅니다. 구독자가 없으면 아무것도 하지 않습니다."""
+    global _event_seq
+    with _event_lock:
+        loop = _event_loop
+        if not _event_subscribers or loop is None:
+            return
+        _event_seq += 1
+        seq = _event_seq
+    payload = json.dumps({"type": event_type, "at": now_kst().isoformat(timespec="seconds"), **data}, ensure_ascii=False)
+    try:
+        loop.call_soon_threadsafe(_fan_out_event, f"id: {seq}\nevent: {event_type}\ndata: {payload}\n\n")
+    except RuntimeError:
+        # 서버 종료 중 루프가 닫힌 경우입니다.
+        pass
+
+
+# ============================================================
+#   저장 (그룹 커밋)
+#   save_* 함수는 변경된 저장소/키만 표시하고, 전용 스레드가 COMMIT_WINDOW_MS마다
+#   모인 변경을 한 번에 씁니다. 기본적으로 호출한 요청은 디스크 반영까지 기다리며,
+#   wait=False로 호출하면 기다리지 않습니다.
+# ============================================================
+class _CommitTicket:
+    def __init__(self):
+        self._event = threading.Event()
+        self.error: Optional[BaseException] = None
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.error = error
+        self._event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if not self._event.wait(timeout):
+            return False
+        if self.error is not None:
+            raise RuntimeError(f"데이터 저장 실패: {self.error}") from self.error
+        return True
+
+
+_commit_cv = threading.Condition()
+_commit_write_lock = threading.Lock()
+_sync_write_lock = threading.Lock()
+_commit_dirty: dict[str, Optional[set]] = {}
+_commit_ticket: Optional[_CommitTicket] = None
+_commit_thread: Optional[threading.Thread] = None
+
+
+def _auth_writer(codes: tuple):
+    if AUTH_STORAGE == "sqlite":
+        if codes:
+            snapshot = {code: dict(auth_db[code]) for code in codes if code in auth_db}
+        else:
+            snapshot = {code: dict(data) for code, data in auth_db.items()}
+        return lambda: _sqlite_save_store("auth", snapshot, codes)
+
+    if AUTH_STORAGE == "journal" and codes and os.path.exists(JOURNAL_FILE):
+        entries = [_journal_entry(code) for code in codes]
+
+        def append():
+            if not _journal_append(entries):
+                raise RuntimeError("journal_missing")
+        return append
+
+    # 인증키 잠금만 쥔 저장이면 auth_db 크기가 바뀔 수 있으므로 색인 때 만든 사본을 씁니다.
+    with _index_lock:
+        snapshot = dict(_auth_snapshot)
+
+    def write_snapshot():
+        _atomic_json_save(DATA_FILE, snapshot)
+        if AUTH_STORAGE == "journal":
+            _journal_reset()
+    return write_snapshot
+
+
+def _store_writer(store: str, keys: tuple):
+    """_store_lock 안에서 저장할 내용을 복사하고, 잠금 밖에서 실행할 쓰기 함수를 반환합니다."""
+    if store == "auth":
+        return _auth_writer(keys)
+    if store == "categories":
+        names = list(categories)
+        if AUTH_STORAGE == "sqlite":
+            return lambda: _sqlite_save_categories(names)
+        return lambda: _atomic_json_save(CATEGORY_FILE, names)
+
+    source, path = {
+        "apple_admins": (apple_admins, APPLE_ADMIN_FILE),
+        "approvals": (approval_requests, APPROVAL_FILE),
+        "android_push": (android_push_tokens, ANDROID_PUSH_FILE),
+    }[store]
+    if AUTH_STORAGE == "sqlite":
+        rows = copy.deepcopy({key: source[key] for key in keys if key in source} if keys else source)
+        return lambda: _sqlite_save_store(store, rows, keys)
+    snapshot = copy.deepcopy(source)
+    return lambda: _atomic_json_save(path, snapshot)
+
+
+def _store_lock(store: str, keys: tuple):
+    """저장할 내용을 복사하는 동안 잡는 잠금. 인증키 저장은 해당 인증키 잠금만 잡으므로,
+    파일 전체를 쓸 때도 auth_db가 아니라 _auth_snapshot을 복사합니다(_auth_writer)."""
+    if store == "auth":
+        return _code_locks(*keys) if keys else _auth_lock
+    return {
+        "categories": _category_lock,
+        "apple_admins": _apple_admin_lock,
+        "approvals": _approval_lock,
+        "android_push": _android_push_lock,
+    }[store]
+
+
+def _mark_dirty(store: str, keys: tuple) -> _CommitTicket:
+    global _commit_ticket, _commit_thread
+    with _commit_cv:
+        if not keys or (store in _commit_dirty and _commit_dirty[store] is None):
+            _commit_dirty[store] = None
+        else:
+            _commit_dirty.setdefault(store, set()).update(keys)
+        if _commit_ticket is None:
+            _commit_ticket = _CommitTicket()
+        if _commit_thread is None:
+            _commit_thread = threading.Thread(target=_commit_loop, name="auth-commit", daemon=True)
+            _commit_thread.start()
+        _commit_cv.notify()
+        return _commit_ticket
+
+
+def _flush_dirty() -> bool:
+    """모인 변경을 한 번에 저장합니다. 실패하면 변경 표시를 되돌려 다음 주기에 다시 시도합니다."""
+    global _commit_ticket
+    with _commit_write_lock:
+        with _commit_cv:
+            dirty = dict(_commit_dirty)
+            # 앞선 저장이 실패해 되돌려 둔 변경만 남은 경우에는 기다리는 요청이 없어 티켓이 없습니다.
+            ticket = _commit_ticket or _CommitTicket()
+            _commit_dirty.clear()
+            _commit_ticket = None
+        if not dirty:
+            return True
+        try:
+            writers = []
+            for store, keys in dirty.items():
+                keys = tuple(keys or ())
+                with _store_lock(store, keys):
+                    writers.append(_store_writer(store, keys))
+            for write in writers:
+                write()
+        except Exception as exc:
+            with _commit_cv:
+                for store, keys in dirty.items():
+                    if keys is None or _commit_dirty.get(store, set()) is None:
+                        _commit_dirty[store] = None
+                    else:
+                        _commit_dirty.setdefault(store, set()).update(keys)
+            print(f"[COMMIT] flush failed: {type(exc).__name__}: {exc}", flush=True)
+            ticket.finish(exc)
+            return False
+        ticket.finish()
+        return True
+
+
+def _commit_loop():
+    while True:
+        with _commit_cv:
+            while not _commit_dirty:
+                _commit_cv.wait()
+        time.sleep(COMMIT_WINDOW_MS / 1000)
+        if not _flush_dirty():
+            time.sleep(1)
+
+
+def _wait_pending_commits():
+    pending = getattr(_commit_local, "pending", None)
+    if not pending:
+        return
+    _commit_local.pending = []
+    for ticket in pending:
+        ticket.wait()
+
+
+def _commit(store: str, keys: tuple, wait: bool = True, changed: bool = True):
+    if changed:
+        _bump_version(store, keys)
+    if COMMIT_WINDOW_MS <= 0:
+        keys = tuple(dict.fromkeys(keys))
+        # 서로 다른 인증키 잠금을 쥔 요청도 같은 파일을 쓰므로 쓰기 자체는 한 번에 하나씩 합니다.
+        with _store_lock(store, keys), _sync_write_lock:
+            _store_writer(store, keys)()
+            if MULTI_PROCESS:
+                _shared_pending.append((store, keys))
+        return
+    ticket = _mark_dirty(store, keys)
+    if not wait:
+        return
+    if getattr(_commit_local, "depth", 0) > 0:
+        # 잠금을 쥔 채 기다리면 다른 요청이 모두 멈추므로 가장 바깥 잠금을 풀 때 기다립니다.
+        if not hasattr(_commit_local, "pending"):
+            _commit_local.pending = []
+        _commit_local.pending.append(ticket)
+        return
+    ticket.wait()
+
+
+atexit.register(_flush_dirty)
+
+
+def save_data(*codes: str, wait: bool = True):
+    """인증키 DB를 저장합니다.
+    journal/sqlite 모드에서 변경된 codes를 넘기면 해당 레코드만 기록하고,
+    codes를 생략하면 전체를 저장합니다(journal은 스냅샷 저장 후 저널을 비웁니다).
+    """
+    _reindex_auth(codes or None)
+    # 버전은 색인과 함께 올렸습니다(_reindex_auth).
+    _commit("auth", codes, wait, changed=False)
+
+
+def save_categories(wait: bool = True):
+    with _category_lock:
         cleaned = list(dict.fromkeys(c.strip() for c in categories if c.strip() and c.strip() != "미지정"))
         categories[:] = cleaned
-        _atomic_json_save(CATEGORY_FILE, categories)
+        _commit("categories", (), wait)
+        publish_event("category.changed", categories=["미지정"] + cleaned)
+
+
+# ============================================================
+#   다중 프로세스 모드 (AUTH_MULTI_PROCESS)
+#   워커마다 메모리에 데이터를 들고 있으므로, 가장 바깥 _CommitLock을 잡을 때 프로세스 간 파일 잠금
+#   (SHARED_LOCK_FILE)을 함께 잡고, 스탬프 파일(SHARED_STAMP_FILE)에 남은 다른 워커의 변경만 다시 읽습니다.
+#   스탬프에는 세대 번호와 최근 SHARED_LOG_SIZE개 변경(저장소, 인증키 목록)이 있습니다.
+#   - auth: sqlite는 바뀐 행만, journal은 저널에서 읽은 위치 이후만 읽고, json은 파일 전체를 다시 읽습니다.
+#   - 그 밖의 저장소는 작으므로 통째로 다시 읽습니다.
+#   잠금을 쥔 채 바로 저장하고 스탬프를 올린 뒤 잠금을 풀므로, 다른 워커의 변경을 덮어쓰지 않습니다.
+#   기존 앱 호환용 last_admin_code / last_app_code, ETag용 부팅 ID와 버전, 관리자 이벤트(SSE)도 스탬프로 공유합니다.
+# ============================================================
+SHARED_LOG_SIZE = 256
+# 한 번에 이보다 많은 인증키를 바꾸면 목록 대신 전체 다시 읽기로 기록합니다.
+SHARED_LOG_MAX_KEYS = 512
+_shared_lock = threading.RLock()
+_shared_holds = 0
+_shared_fd: Optional[int] = None
+_shared_pending: list[tuple[str, tuple]] = []
+# 마지막으로 반영한 스탬프 세대와 파일 상태. 세대가 None이면 아직 부팅 중입니다.
+_shared_gen: Optional[int] = None
+_shared_stamp_stat = None
+_shared_last_codes: tuple = (None, None)
+# 이 워커가 낸 관리자 이벤트 중 아직 스탬프에 쓰지 않은 것 [종류, 내용], 마지막으로 반영한 스탬프 이벤트 번호.
+_shared_events: list[list] = []
+_shared_event_seq = 0
+# journal 모드에서 읽은 위치 (저널 첫 줄, 바이트 위치)
+_shared_journal_cursor: Optional[tuple[bytes, int]] = None
+_shared_stats = {"reloads": 0, "keyReloads": 0, "fullReloads": 0}
+
+
+def _stamp_stat():
+    try:
+        st = os.stat(SHARED_STAMP_FILE)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _read_stamp() -> dict:
+    try:
+        with open(SHARED_STAMP_FILE, "r", encoding="utf-8") as f:
+            stamp = json.load(f)
+        if isinstance(stamp, dict) and isinstance(stamp.get("gen"), int):
+            return stamp
+    except (FileNotFoundError, ValueError):
+        pass
+    return {"gen": 0, "log": [], "lastAdminCode": None, "lastAppCode": None}
+
+
+def _journal_position() -> Optional[tuple[bytes, int]]:
+    try:
+        with open(JOURNAL_FILE, "rb") as f:
+            header = f.readline()
+            return header, os.fstat(f.fileno()).st_size
+    except FileNotFoundError:
+        return None
+
+
+def _journal_tail() -> Optional[dict[str, Optional[dict]]]:
+    """_shared_journal_cursor 이후 저널 변경을 {인증키: 레코드 또는 None(삭제)}로 읽습니다. 저널이 새로 시작됐으면 None입니다."""
+    global _shared_journal_cursor
+    cursor = _shared_journal_cursor
+    if cursor is None:
+        return None
+    try:
+        with open(JOURNAL_FILE, "rb") as f:
+            header = f.readline()
+            size = os.fstat(f.fileno()).st_size
+            if header != cursor[0] or size < cursor[1]:
+                return None
+            f.seek(cursor[1])
+            raw = f.read()
+    except FileNotFoundError:
+        return None
+    changes: dict[str, Optional[dict]] = {}
+    for line in raw.split(b"\n"):
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        code = entry.get("code")
+        if not isinstance(code, str):
+            continue
+        if entry.get("op") == "put" and isinstance(entry.get("data"), dict):
+            changes[code] = _normalize_record(entry["data"])
+        elif entry.get("op") == "del":
+            changes[code] = None
+    _shared_journal_cursor = (header, size)
+    return changes
+
+
+def _sqlite_load_rows(store: str, keys: list[str]) -> dict:
+    table, key_column, _ = _SQLITE_STORES[store]
+    rows = {}
+    with _sqlite_lock:
+        conn = _sqlite()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            marks = ", ".join("?" for _ in chunk)
+            for key, data in conn.execute(f"SELECT {key_column}, data FROM {table} WHERE {key_column} IN ({marks})", chunk):
+                rows[key] = json.loads(data)
+    return rows
+
+
+def _reload_auth(codes: Optional[set], version: Optional[int] = None):
+    """다른 워커가 바꾼 인증키를 다시 읽습니다. codes가 None이면 전체를 다시 읽습니다.
+    version은 스탬프에 적힌 그 시점의 인증키 버전입니다."""
+    global _shared_journal_cursor
+    changes = None
+    if codes is not None:
+        if AUTH_STORAGE == "sqlite":
+            rows = _sqlite_load_rows("auth", list(codes))
+            changes = {code: _normalize_record(rows[code]) if code in rows else None for code in codes}
+        elif AUTH_STORAGE == "journal":
+            changes = _journal_tail()
+    if changes is None:
+        fresh = load_data() if AUTH_STORAGE == "sqlite" else _load_data_file(reset_journal=False)
+        if AUTH_STORAGE == "journal":
+            _shared_journal_cursor = _journal_position()
+        auth_db.clear()
+        auth_db.update(fresh)
+        _reindex_auth(version=version)
+        _shared_stats["fullReloads"] += 1
+        return
+    for code, record in changes.items():
+        if record is None:
+            auth_db.pop(code, None)
+        else:
+            auth_db[code] = record
+    if changes:
+        _reindex_auth(tuple(changes), version=version)
+    _shared_stats["keyReloads"] += 1
+
+
+def _reload_store(store: str, version: Optional[int] = None):
+    if store == "auth":
+        _reload_auth(None, version)
+    elif store == "categories":
+        categories[:] = load_categories()
+        _publish_local_event("category.changed", {"categories": ["미지정"] + list(categories)})
+    elif store == "apple_admins":
+        fresh = load_apple_admins()
+        apple_admins.clear()
+        apple_admins.update(fresh)
+        _reindex_push_targets("apns")
+    elif store == "approvals":
+        fresh = load_approval_requests()
+        approval_requests.clear()
+        approval_requests.update(fresh)
+        _reindex_approvals()
+    elif store == "android_push":
+        fresh = load_android_push_tokens()
+        android_push_tokens.clear()
+        android_push_tokens.update(fresh)
+        _reindex_push_targets("android")
+    if store != "auth":
+        _bump_version(store, (), version)
+
+
+def _adopt_shared_versions(stamp: dict):
+    """스탬프의 부팅 ID와 저장소별 버전을 따릅니다. 워커마다 ETag와 변경분 버전이 같아집니다."""
+    global _BOOT_ID, _change_floor
+    if stamp.get("id"):
+        _BOOT_ID = stamp["id"]
+    with _version_lock:
+        for store, version in (stamp.get("versions") or {}).items():
+            if store in _data_versions and isinstance(version, int) and version > _data_versions[store]:
+                _data_versions[store] = version
+                if store == "auth":
+                    # 이 워커가 보지 못한 변경이 섞였으므로 그 이전 버전부터는 재동기화를 안내합니다.
+                    _change_floor = version
+                    _change_log.clear()
+
+
+def _replay_shared_events(stamp: dict):
+    """다른 워커가 낸 관리자 이벤트를 이 워커의 구독자에게 보냅니다. 밀려서 놓쳤으면 재동기화를 안내합니다."""
+    global _shared_event_seq
+    event_seq = stamp.get("eventSeq", 0)
+    if event_seq == _shared_event_seq:
+        return
+    missed = [event for event in stamp.get("events", []) if event[0] > _shared_event_seq]
+    if event_seq < _shared_event_seq or not missed or missed[0][0] != _shared_event_seq + 1:
+        _publish_local_event("resync", {})
+    else:
+        for _, event_type, data in missed:
+            _publish_local_event(event_type, data)
+    _shared_event_seq = event_seq
+
+
+def _write_stamp(stamp: dict):
+    # 내용은 각 저장소 파일에 이미 있으므로 fsync 없이 원자적으로 바꾸기만 합니다.
+    global _shared_stamp_stat
+    tmp = f"{SHARED_STAMP_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(stamp, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, SHARED_STAMP_FILE)
+    _shared_stamp_stat = _stamp_stat()
+
+
+def _catch_up():
+    """파일 잠금을 잡은 직후 부릅니다. 스탬프가 바뀌었으면 다른 워커의 변경을 메모리에 반영합니다."""
+    global _shared_gen, _shared_stamp_stat, _shared_last_codes, _shared_event_seq, last_admin_code, last_app_code
+    stat = _stamp_stat()
+    if stat == _shared_stamp_stat and _shared_gen is not None:
+        return
+    stamp = _read_stamp()
+    _shared_stamp_stat = stat
+    gen = stamp["gen"]
+    versions = stamp.get("versions") or {}
+    if _shared_gen is None:
+        # 부팅 중입니다. 이어서 파일에서 직접 읽으므로 현재 세대만 기억합니다.
+        # 부팅 ID는 새로 정해 스탬프에 남깁니다. 이 워커가 뜨기 전의 ETag는 모두 무효가 되고 다른 워커도 따라옵니다.
+        _shared_gen = gen
+        _shared_event_seq = stamp.get("eventSeq", 0)
+        stamp["id"] = _BOOT_ID
+        _adopt_shared_versions(stamp)
+        with _version_lock:
+            stamp["versions"] = dict(_data_versions)
+        _write_stamp(stamp)
+    elif gen != _shared_gen:
+        entries = [entry for entry in stamp.get("log", []) if entry[0] > _shared_gen]
+        stores: dict[str, Optional[set]] = {}
+        if gen < _shared_gen or not entries or entries[0][0] != _shared_gen + 1:
+            # 로그에서 밀려난 변경이 있으면 모두 다시 읽습니다.
+            stores = dict.fromkeys(_data_versions)
+        else:
+            for _, store, keys in entries:
+                if store != "auth" or keys is None:
+                    stores[store] = None
+                elif stores.get(store, set()) is not None:
+                    stores.setdefault(store, set()).update(keys)
+        for store, keys in stores.items():
+            if store == "auth":
+                _reload_auth(keys, versions.get("auth"))
+            else:
+                _reload_store(store, versions.get(store))
+        if "auth" in stores:
+            _publish_local_event("key.bulk", {"count": len(stores["auth"] or ()) or len(auth_db)})
+        _shared_gen = gen
+        _shared_stats["reloads"] += 1
+    _adopt_shared_versions(stamp)
+    _replay_shared_events(stamp)
+    codes = (stamp.get("lastAdminCode"), stamp.get("lastAppCode"))
+    if codes != _shared_last_codes:
+        last_admin_code, last_app_code = codes
+        _shared_last_codes = codes
+
+
+def _publish_stamp():
+    """이 워커가 저장한 변경을 스탬프에 남깁니다. 파일 잠금을 쥔 상태에서만 부릅니다."""
+    global _shared_gen, _shared_last_codes, _shared_journal_cursor, _shared_event_seq
+    codes = (last_admin_code, last_app_code)
+    if not _shared_pending and not _shared_events and codes == _shared_last_codes:
+        return
+    stamp = _read_stamp()
+    log = stamp.get("log", [])
+    gen = stamp["gen"]
+    for store, keys in _shared_pending:
+        gen += 1
+        keys = list(dict.fromkeys(keys)) if store == "auth" and keys and len(keys) <= SHARED_LOG_MAX_KEYS else None
+        log.append([gen, store, keys])
+    _shared_pending.clear()
+    events = stamp.get("events", [])
+    event_seq = stamp.get("eventSeq", 0)
+    for event_type, data in _shared_events:
+        event_seq += 1
+        events.append([event_seq, event_type, data])
+    _shared_events.clear()
+    with _version_lock:
+        versions = dict(_data_versions)
+    stamp.update({
+        "gen": gen,
+        "log": log[-SHARED_LOG_SIZE:],
+        "lastAdminCode": codes[0],
+        "lastAppCode": codes[1],
+        "id": _BOOT_ID,
+        "versions": versions,
+        "eventSeq": event_seq,
+        "events": events[-SHARED_LOG_SIZE:],
+    })
+    _write_stamp(stamp)
+    _shared_gen = gen
+    _shared_event_seq = event_seq
+    _shared_last_codes = codes
+    if AUTH_STORAGE == "journal":
+        _shared_journal_cursor = _journal_position()
+
+
+def _shared_enter():
+    global _shared_holds, _shared_fd
+    _shared_lock.acquire()
+    _shared_holds += 1
+    if _shared_holds > 1:
+        return
+    try:
+        if _shared_fd is None:
+            if fcntl is None:
+                raise RuntimeError("AUTH_MULTI_PROCESS requires fcntl (POSIX)")
+            _ensure_parent(SHARED_LOCK_FILE)
+            _shared_fd = os.open(SHARED_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(_shared_fd, fcntl.LOCK_EX)
+        try:
+            _catch_up()
+        except BaseException:
+            fcntl.flock(_shared_fd, fcntl.LOCK_UN)
+            raise
+    except BaseException:
+        _shared_holds -= 1
+        _shared_lock.release()
+        raise
+
+
+def _shared_exit():
+    global _shared_holds
+    try:
+        if _shared_holds == 1:
+            try:
+                _publish_stamp()
+            finally:
+                fcntl.flock(_shared_fd, fcntl.LOCK_UN)
+    finally:
+        _shared_holds -= 1
+        _shared_lock.release()
+
+
+@contextmanager
+def shared_section():
+    """다중 프로세스 모드에서 다른 워커와 겹치지 않게 실행합니다. 단일 프로세스에서는 아무것도 하지 않습니다."""
+    if not MULTI_PROCESS:
+        yield
+        return
+    _shared_enter()
+    try:
+        yield
+    finally:
+        _shared_exit()
+
+
+def shared_state_changed() -> bool:
+    return MULTI_PROCESS and _stamp_stat() != _shared_stamp_stat
+
+
+def refresh_shared_state():
+    """다른 워커의 변경을 반영합니다. 잠금 없이 읽는 조회 요청 전에 부릅니다."""
+    if shared_state_changed():
+        with shared_section():
+            pass
+
+
+def remember_last_code(name: str, code: str):
+    """기존 앱 호환용 last_admin_code / last_app_code를 바꿉니다. 다중 프로세스 모드에서는 워커끼리 공유합니다."""
+    global last_admin_code, last_app_code
+    with shared_section():
+        if name == "admin":
+            last_admin_code = code
+        else:
+            last_app_code = code
+
+
+def shared_state_stats() -> dict:
+    with _shared_lock:
+        return {"multiProcess": MULTI_PROCESS, "storage": AUTH_STORAGE, "pid": os.getpid(), "generation": _shared_gen, **_shared_stats}
 
 
 def _normalize_apple_admin(record: dict) -> dict:
@@ -191,6 +1731,15 @@ def _normalize_apple_admin(record: dict) -> dict:
 
 
 def load_apple_admins():
+    if AUTH_STORAGE == "sqlite":
+        return {
+            user_id: _normalize_apple_admin(value)
+            for user_id, value in _sqlite_load_store("apple_admins", _load_apple_admins_file).items()
+        }
+    return _load_apple_admins_file()
+
+
+def _load_apple_admins_file():
     if not os.path.exists(APPLE_ADMIN_FILE):
         return {}
     try:
@@ -208,9 +1757,9 @@ def load_apple_admins():
         raise RuntimeError(f"Apple 관리자 데이터 로드 실패: {exc}") from exc
 
 
-def save_apple_admins():
-    with _db_lock:
-        _atomic_json_save(APPLE_ADMIN_FILE, apple_admins)
+def save_apple_admins(*user_ids: str, wait: bool = True):
+    _reindex_push_targets("apns", user_ids or None)
+    _commit("apple_admins", user_ids, wait)
 
 
 def _normalize_approval_request(record: dict) -> dict:
@@ -229,6 +1778,17 @@ def _normalize_approval_request(record: dict) -> dict:
 
 
 def load_approval_requests():
+    if AUTH_STORAGE == "sqlite":
+        normalized = {}
+        for request_id, value in _sqlite_load_store("approvals", _load_approval_requests_file).items():
+            item = _normalize_approval_request(value)
+            item["requestId"] = request_id
+            normalized[request_id] = item
+        return normalized
+    return _load_approval_requests_file()
+
+
+def _load_approval_requests_file():
     if not os.path.exists(APPROVAL_FILE):
         return {}
     try:
@@ -248,22 +1808,479 @@ def load_approval_requests():
         raise RuntimeError(f"승인 대기 데이터 로드 실패: {exc}") from exc
 
 
-def save_approval_requests():
-    with _db_lock:
-        _atomic_json_save(APPROVAL_FILE, approval_requests)
+def load_android_push_tokens():
+    if AUTH_STORAGE == "sqlite":
+        return {
+            str(code): [str(x) for x in tokens if str(x).strip()]
+            for code, tokens in _sqlite_load_store("android_push", _load_android_push_tokens_file).items()
+            if isinstance(tokens, list)
+        }
+    return _load_android_push_tokens_file()
 
 
-auth_db = load_data()
-categories = load_categories()
-apple_admins = load_apple_admins()
-approval_requests = load_approval_requests()
+def _load_android_push_tokens_file():
+    if not os.path.exists(ANDROID_PUSH_FILE):
+        return {}
+    try:
+        with open(ANDROID_PUSH_FILE, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if not isinstance(raw, dict):
+            return {}
+        return {str(k): [str(x) for x in v if str(x).strip()] for k, v in raw.items() if isinstance(v, list)}
+    except Exception:
+        return {}
+
+
+def save_approval_requests(*request_ids: str, wait: bool = True):
+    _reindex_approvals(request_ids or None)
+    _commit("approvals", request_ids, wait)
+
+
+# ============================================================
+#   메모리 보조 인덱스
+#   이름+전화번호 / 카테고리 / 삭제일 / 승인 대기 인증키 / 승인 알림 대상을 전체 순회 없이 찾습니다.
+#   인증키와 승인 대기 데이터를 바꾸는 모든 경로가 save_data / save_approval_requests를
+#   거치므로 그때 넘어온 키만 다시 색인하고, 키 없이 부르면 전체를 다시 만듭니다.
+#   알림 대상은 save_apple_admins / save_android_push_tokens, 그리고 Android 로그인 인증키의
+#   권한이 바뀌는 save_data에서 같은 방식으로 다시 색인합니다.
+# ============================================================
+_index_lock = threading.Lock()
+_auth_index_keys: dict[str, tuple] = {}
+_name_phone_index: dict[tuple, dict[str, None]] = {}
+_category_index: dict[str, dict[str, None]] = {}
+_deleted_at_index: dict[str, str] = {}
+# (date, 인증키) 오름차순 목록. 관리자 목록은 뒤에서부터 읽어 최신순으로 보여줍니다.
+_date_order: list[tuple[str, str]] = []
+# (카테고리, 상태) 별 같은 형식의 목록. 카테고리 ""는 전체이고 ("", "all")은 _date_order 자신입니다.
+# 상태는 all / live / active / inactive / deleted(LIST_STATUSES)이므로 목록 조회는 복사나 정렬 없이 잘라 읽습니다.
+_date_orders: dict[tuple[str, str], list[tuple[str, str]]] = {("", "all"): _date_order}
+# (만료 시각, 인증키, deletedAt) 최소 힙. 복원/변경된 항목은 꺼낼 때 _deleted_at_index와 비교해 버립니다.
+_trash_heap: list[tuple[datetime, str, str]] = []
+_approval_index_codes: dict[str, str] = {}
+_approval_code_index: dict[str, dict[str, None]] = {}
+# 색인 시점의 레코드 사본(인증키마다 하나). 색인 때마다 새 dict로 교체하고 고쳐 쓰지 않으므로 얕은 복사로 충분합니다.
+# 인증키 잠금만 쥔 파일 전체 저장(_auth_writer), /list 본문(auth_db_snapshot), 관리자 목록 항목(_list_item)이
+# 모두 auth_db 대신 이 사본을 읽습니다.
+_auth_snapshot: dict[str, dict] = {}
+# 승인 알림 대상. kind는 "apns"(Apple 관리자 user_id 기준) / "android"(로그인 인증키 기준)입니다.
+# (kind, 권한) -> {토큰: {소유자: 환경}}, (kind, 토큰) -> {소유자: None}, (kind, 소유자) -> 색인한 (권한, 토큰, 환경) 목록.
+# 토큰 -> 소유자는 권한이 없는 소유자도 포함해, 만료 토큰을 지울 때 전체 레코드를 훑지 않게 합니다.
+_push_target_index: dict[tuple, dict[str, dict[str, Optional[str]]]] = {}
+_push_token_owners: dict[tuple, dict[str, None]] = {}
+_push_index_entries: dict[tuple, tuple] = {}
+# 부팅 중에는 권한 판단에 필요한 함수가 아직 없으므로, 부팅 마지막에 한 번에 만든 뒤부터 색인합니다.
+_push_index_ready = False
+
+
+def _auth_index_key(record: dict) -> tuple:
+    category = str(record.get("category") or "").strip() or "미지정"
+    deleted_at = record.get("deletedAt") or None
+    state = "deleted" if deleted_at else "active" if record.get("enabled", True) else "inactive"
+    return (record.get("name"), record.get("phone")), category, deleted_at, str(record.get("date") or ""), state
+
+
+def _date_order_buckets(key: tuple) -> tuple:
+    states = ("all", "deleted") if key[4] == "deleted" else ("all", "live", key[4])
+    return tuple((category, state) for category in ("", key[1]) for state in states)
+
+
+def _date_order_discard(key: tuple, code: str):
+    position = (key[3], code)
+    for bucket in _date_order_buckets(key):
+        order = _date_orders.get(bucket)
+        if order is None:
+            continue
+        pos = bisect.bisect_left(order, position)
+        if pos < len(order) and order[pos] == position:
+            del order[pos]
+        if not order and bucket != ("", "all"):
+            del _date_orders[bucket]
+
+
+def _rebuild_date_orders():
+    grouped: dict[tuple[str, str], list[tuple[str, str]]] = {}
+    for code, key in _auth_index_keys.items():
+        position = (key[3], code)
+        for bucket in _date_order_buckets(key):
+            grouped.setdefault(bucket, []).append(position)
+    _date_order[:] = sorted(grouped.pop(("", "all"), ()))
+    _date_orders.clear()
+    _date_orders[("", "all")] = _date_order
+    for bucket, positions in grouped.items():
+        positions.sort()
+        _date_orders[bucket] = positions
+
+
+def _list_item(code: str, record: dict) -> dict:
+    """관리자 목록 형식 항목. 미리 만들어 두지 않고 응답에 담을 항목만 그때 만듭니다."""
+    item = {"code": code, **record}
+    item["category"] = str(record.get("category") or "").strip() or "미지정"
+    item["enabled"] = bool(item.get("enabled", True))
+    return item
+
+
+def _index_add(index: dict, key, value: str):
+    index.setdefault(key, {})[value] = None
+
+
+def _index_discard(index: dict, key, value: str):
+    bucket = index.get(key)
+    if bucket is None:
+        return
+    bucket.pop(value, None)
+    if not bucket:
+        del index[key]
+
+
+def _push_trash_expiry(code: str, deleted_at: str):
+    try:
+        deleted = datetime.strptime(deleted_at, "%Y-%m-%d %H:%M")
+    except Exception:
+        return
+    heapq.heappush(_trash_heap, (deleted + timedelta(days=TRASH_RETENTION_DAYS), code, deleted_at))
+
+
+def build_auth_index(db: dict[str, dict]) -> dict:
+    """db 전체의 보조 인덱스를 새로 만듭니다. 전역 인덱스를 건드리지 않으므로 잠금 없이 미리 만들 수 있습니다."""
+    keys: dict[str, tuple] = {}
+    name_phone: dict[tuple, dict[str, None]] = {}
+    category_index: dict[str, dict[str, None]] = {}
+    deleted_at: dict[str, str] = {}
+    trash: list[tuple[datetime, str, str]] = []
+    grouped: dict[tuple[str, str], list[tuple[str, str]]] = {}
+    snapshot: dict[str, dict] = {}
+    for code, record in db.items():
+        key = _auth_index_key(record)
+        keys[code] = key
+        snapshot[code] = dict(record)
+        _index_add(name_phone, key[0], code)
+        _index_add(category_index, key[1], code)
+        # 버킷(최대 6개)마다 새 튜플을 만들지 않고 위치 튜플 하나를 함께 씁니다.
+        position = (key[3], code)
+        for bucket in _date_order_buckets(key):
+            grouped.setdefault(bucket, []).append(position)
+        if key[2]:
+            deleted_at[code] = key[2]
+            try:
+                expires = datetime.strptime(key[2], "%Y-%m-%d %H:%M") + timedelta(days=TRASH_RETENTION_DAYS)
+            except Exception:
+                continue
+            trash.append((expires, code, key[2]))
+    for positions in grouped.values():
+        positions.sort()
+    heapq.heapify(trash)
+    return {
+        "keys": keys,
+        "name_phone": name_phone,
+        "category": category_index,
+        "deleted_at": deleted_at,
+        "trash": trash,
+        "date_orders": grouped,
+        "snapshot": snapshot,
+    }
+
+
+def _install_auth_index_locked(built: dict):
+    for target, source in (
+        (_auth_index_keys, built["keys"]),
+        (_name_phone_index, built["name_phone"]),
+        (_category_index, built["category"]),
+        (_deleted_at_index, built["deleted_at"]),
+        (_auth_snapshot, built["snapshot"]),
+    ):
+        target.clear()
+        target.update(source)
+    _trash_heap[:] = built["trash"]
+    # ("", "all")은 _date_order 자신이어야 하므로 내용만 바꿉니다.
+    _date_order[:] = built["date_orders"].get(("", "all"), ())
+    _date_orders.clear()
+    _date_orders.update(built["date_orders"])
+    _date_orders[("", "all")] = _date_order
+
+
+def _reindex_auth(codes: Optional[tuple] = None, prebuilt: Optional[dict] = None, version: Optional[int] = None):
+    """codes만 다시 색인합니다. codes가 없으면 전체를 다시 만들고, prebuilt가 있으면
+    (복원처럼 잠금 밖에서 build_auth_index로 미리 만든 경우) 그것으로 교체만 합니다.
+    인증키 버전도 _index_lock 안에서 올리므로 _auth_snapshot과 ETag("auth")는 _index_lock만으로 함께 읽힙니다.
+    version은 다른 워커의 변경을 반영할 때 스탬프에 적힌 버전입니다."""
+    if codes is None and prebuilt is None:
+        prebuilt = build_auth_index(auth_db)
+    # 알림 대상 색인은 android_push_tokens도 읽으므로, 토큰 변경과 겹치지 않게 _android_push_lock을 먼저 잡습니다.
+    with _android_push_lock if _push_index_ready else nullcontext(), _index_lock:
+        full = codes is None
+        if full:
+            _install_auth_index_locked(prebuilt)
+            codes = ()
+        # 많은 코드를 한 번에 바꾸면 날짜 목록을 건별로 고치지 않고 끝에서 한 번 정렬합니다.
+        bulk = len(codes) > 256
+        for code in codes:
+            old = _auth_index_keys.pop(code, None)
+            if old is not None:
+                _index_discard(_name_phone_index, old[0], code)
+                _index_discard(_category_index, old[1], code)
+                _deleted_at_index.pop(code, None)
+                if not bulk:
+                    _date_order_discard(old, code)
+            record = auth_db.get(code)
+            if record is None:
+                _auth_snapshot.pop(code, None)
+                continue
+            _auth_snapshot[code] = dict(record)
+            key = _auth_index_key(record)
+            _auth_index_keys[code] = key
+            _index_add(_name_phone_index, key[0], code)
+            _index_add(_category_index, key[1], code)
+            if not bulk:
+                position = (key[3], code)
+                for bucket in _date_order_buckets(key):
+                    bisect.insort(_date_orders.setdefault(bucket, []), position)
+            if key[2]:
+                _deleted_at_index[code] = key[2]
+                if old is None or old[2] != key[2]:
+                    _push_trash_expiry(code, key[2])
+        if bulk:
+            _rebuild_date_orders()
+        _bump_version("auth", codes, version)
+        if _push_index_ready:
+            if full:
+                _reindex_push_targets_locked("android", None)
+            else:
+                android_codes = tuple(code for code in codes if code in android_push_tokens or ("android", code) in _push_index_entries)
+                if android_codes:
+                    _reindex_push_targets_locked("android", android_codes)
+
+
+def _reindex_approvals(request_ids: Optional[tuple] = None):
+    with _index_lock:
+        if request_ids is None:
+            _approval_index_codes.clear()
+            _approval_code_index.clear()
+            request_ids = tuple(approval_requests)
+        for request_id in request_ids:
+            old = _approval_index_codes.pop(request_id, None)
+            if old is not None:
+                _index_discard(_approval_code_index, old, request_id)
+            item = approval_requests.get(request_id)
+            if item is None:
+                continue
+            code = str(item.get("code") or "").strip()
+            _approval_index_codes[request_id] = code
+            _index_add(_approval_code_index, code, request_id)
+
+
+def _apns_index_entries(user_id: str) -> tuple:
+    """(권한, 토큰, 환경) 목록. 업로드 권한이 없으면 권한은 None이고 토큰 소유자로만 색인합니다."""
+    record = apple_admins.get(user_id)
+    if not record:
+        return ()
+    permission = record.get("allowedCategory") or None
+    entries = []
+    for token_info in record.get("pushTokens", []):
+        token = str(token_info.get("token") or "").strip().lower()
+        if token:
+            entries.append((permission, token, "sandbox" if token_info.get("environment") == "sandbox" else "production"))
+    return tuple(entries)
+
+
+def _android_index_entries(code: str) -> tuple:
+    tokens = android_push_tokens.get(code)
+    if not tokens:
+        return ()
+    record = auth_db.get(code)
+    # android_admin_profile_for_code와 같은 기준입니다(알림은 비활성 인증키의 세션에도 보냅니다).
+    if not record or record.get("deletedAt") or record.get("status") != "approved":
+        permission = None
+    else:
+        permission = "전체" if code in ANDROID_MASTER_KEYS else clean_category(record.get("category"))
+    return tuple((permission, token, None) for token in dict.fromkeys(tokens))
+
+
+def _reindex_push_targets_locked(kind: str, owners: Optional[tuple]):
+    if owners is None:
+        for key in [key for key in _push_target_index if key[0] == kind]:
+            del _push_target_index[key]
+        for key in [key for key in _push_token_owners if key[0] == kind]:
+            del _push_token_owners[key]
+        for key in [key for key in _push_index_entries if key[0] == kind]:
+            del _push_index_entries[key]
+        owners = tuple(apple_admins if kind == "apns" else android_push_tokens)
+    build = _apns_index_entries if kind == "apns" else _android_index_entries
+    for owner in owners:
+        for permission, token, _ in _push_index_entries.pop((kind, owner), ()):
+            bucket = _push_target_index.get((kind, permission)) if permission else None
+            if bucket is not None and token in bucket:
+                _index_discard(bucket, token, owner)
+                if not bucket:
+                    del _push_target_index[(kind, permission)]
+            _index_discard(_push_token_owners, (kind, token), owner)
+        entries = build(owner)
+        if not entries:
+            continue
+        _push_index_entries[(kind, owner)] = entries
+        for permission, token, environment in entries:
+            if permission:
+                _push_target_index.setdefault((kind, permission), {}).setdefault(token, {})[owner] = environment
+            _index_add(_push_token_owners, (kind, token), owner)
+
+
+def _reindex_push_targets(kind: str, owners: Optional[tuple] = None):
+    if not _push_index_ready:
+        return
+    with _index_lock:
+        _reindex_push_targets_locked(kind, owners)
+
+
+def build_push_target_index():
+    """부팅 마지막에 알림 대상 인덱스를 처음 만들고, 이후 저장 때마다 고치도록 켭니다."""
+    global _push_index_ready
+    with _index_lock:
+        _push_index_ready = True
+        _reindex_push_targets_locked("apns", None)
+        _reindex_push_targets_locked("android", None)
+
+
+def push_targets(kind: str, permission: str = "전체") -> list[tuple[str, Optional[str]]]:
+    """권한별 알림 대상 (토큰, 환경) 목록. 여러 소유자가 같은 토큰을 등록했어도 한 번만 나옵니다."""
+    with _index_lock:
+        bucket = _push_target_index.get((kind, permission), {})
+        return [(token, next(iter(owners.values()))) for token, owners in bucket.items()]
+
+
+def push_token_owners(kind: str, *tokens: str) -> list[str]:
+    with _index_lock:
+        owners: dict[str, None] = {}
+        for token in tokens:
+            owners.update(_push_token_owners.get((kind, token), {}))
+        return list(owners)
+
+
+def _codes_by_name_phone(name: str, phone: str) -> list[str]:
+    with _index_lock:
+        return list(_name_phone_index.get((name, phone), ()))
+
+
+def _codes_in_category(category: str) -> list[str]:
+    with _index_lock:
+        return list(_category_index.get(category, ()))
+
+
+def _deleted_codes() -> dict[str, str]:
+    with _index_lock:
+        return dict(_deleted_at_index)
+
+
+def _pop_expired_trash(now: datetime, limit: int) -> list[str]:
+    with _index_lock:
+        due = []
+        while _trash_heap and len(due) < limit and _trash_heap[0][0] <= now:
+            _, code, deleted_at = heapq.heappop(_trash_heap)
+            if _deleted_at_index.get(code) == deleted_at:
+                due.append(code)
+        return due
+
+
+def _next_trash_expiry() -> Optional[datetime]:
+    with _index_lock:
+        while _trash_heap and _deleted_at_index.get(_trash_heap[0][1]) != _trash_heap[0][2]:
+            heapq.heappop(_trash_heap)
+        return _trash_heap[0][0] if _trash_heap else None
+
+
+def _approval_request_ids_for_code(code: str) -> list[str]:
+    with _index_lock:
+        return list(_approval_code_index.get(code, ()))
+
+
+def check_index_consistency() -> list[str]:
+    """보조 인덱스를 원본 데이터로 새로 만든 결과와 비교합니다. 어긋난 항목 설명 목록을 돌려주며 비어 있으면 정상입니다."""
+    problems = []
+    with _all_auth_locks(), _approval_lock, _index_lock:
+        expected = {code: _auth_index_key(record) for code, record in auth_db.items()}
+        if _auth_index_keys != expected:
+            for code in set(_auth_index_keys) | set(expected):
+                if _auth_index_keys.get(code) != expected.get(code):
+                    problems.append(f"auth:{code}: {_auth_index_keys.get(code)!r} != {expected.get(code)!r}")
+        checks = (
+            ("name_phone", _name_phone_index, 0),
+            ("category", _category_index, 1),
+        )
+        for label, index, pos in checks:
+            rebuilt: dict = {}
+            for code, key in expected.items():
+                rebuilt.setdefault(key[pos], set()).add(code)
+            actual = {key: set(bucket) for key, bucket in index.items()}
+            if actual != rebuilt:
+                problems.append(f"{label}: index mismatch")
+        deleted = {code: key[2] for code, key in expected.items() if key[2]}
+        if _deleted_at_index != deleted:
+            problems.append("deletedAt: index mismatch")
+        if _date_order != sorted((key[3], code) for code, key in expected.items()):
+            problems.append("date_order: index mismatch")
+        rebuilt_orders: dict = {}
+        for code, key in expected.items():
+            for bucket in _date_order_buckets(key):
+                rebuilt_orders.setdefault(bucket, []).append((key[3], code))
+        rebuilt_orders.setdefault(("", "all"), [])
+        if _date_orders != {bucket: sorted(order) for bucket, order in rebuilt_orders.items()} or _date_orders[("", "all")] is not _date_order:
+            problems.append("date_orders: index mismatch")
+        for code, record in auth_db.items():
+            if _auth_snapshot.get(code) != record:
+                problems.append(f"snapshot:{code}: stale")
+        if set(_auth_snapshot) != set(auth_db):
+            problems.append("snapshot: index mismatch")
+
+        approvals: dict = {}
+        for request_id, item in approval_requests.items():
+            approvals.setdefault(str(item.get("code") or "").strip(), set()).add(request_id)
+        if {code: set(bucket) for code, bucket in _approval_code_index.items()} != approvals:
+            problems.append("approval_code: index mismatch")
+        if set(_approval_index_codes) != set(approval_requests):
+            problems.append("approval_request_ids: index mismatch")
+
+        if _push_index_ready:
+            expected_targets: dict = {}
+            expected_owners: dict = {}
+            for kind, owners, build in (
+                ("apns", apple_admins, _apns_index_entries),
+                ("android", android_push_tokens, _android_index_entries),
+            ):
+                for owner in owners:
+                    for permission, token, environment in build(owner):
+                        if permission:
+                            expected_targets.setdefault((kind, permission), {}).setdefault(token, {})[owner] = environment
+                        expected_owners.setdefault((kind, token), set()).add(owner)
+            if _push_target_index != expected_targets:
+                problems.append("push_targets: index mismatch")
+            if {key: set(bucket) for key, bucket in _push_token_owners.items()} != expected_owners:
+                problems.append("push_token_owners: index mismatch")
+    return problems
+
+
+# 기존 API 호환용 상태값. 새 iOS 앱은 비밀번호 요청에 code도 같이 보내 레이스를 방지합니다.
+last_admin_code: str | None = None
+last_app_code: str | None = None
+
+# 다중 프로세스 모드에서는 다른 워커가 저널을 합치는 중에 읽지 않도록 파일 잠금 안에서 읽습니다.
+with shared_section():
+    auth_db = load_data()
+    categories = load_categories()
+    apple_admins = load_apple_admins()
+    approval_requests = load_approval_requests()
+    android_push_tokens = load_android_push_tokens()
+    if AUTH_STORAGE == "journal":
+        _shared_journal_cursor = _journal_position()
+_reindex_auth()
+_reindex_approvals()
 
 
 def ensure_bootstrap_developer_key():
     # 운영 데이터 파일 자체가 없는 완전 초기 상태에서만 기본 관리자 인증키를 생성합니다.
     if DATA_FILE_EXISTED_AT_BOOT:
         return
-    with _db_lock:
+    with _auth_key_lock("kyh"), _category_lock:
+        if MULTI_PROCESS and auth_db:
+            # 함께 뜬 다른 워커가 먼저 만들었습니다.
+            return
         if "개발자" not in categories:
             categories.append("개발자")
         auth_db["kyh"] = {
@@ -278,15 +2295,13 @@ def ensure_bootstrap_developer_key():
             "enabled": True,
         }
         save_categories()
-        save_data()
+        save_data("kyh")
 
 
 ensure_bootstrap_developer_key()
 
-# 기존 API 호환용 상태값. 새 iOS 앱은 비밀번호 요청에 code도 같이 보내 레이스를 방지합니다.
-last_admin_code: str | None = None
-last_app_code: str | None = None
-
+if AUTH_STORAGE == "journal":
+    threading.Thread(target=_journal_compactor, daemon=True).start()
 
 # ============================================================
 #   요청 모델
@@ -295,6 +2310,10 @@ class CodeRequest(BaseModel):
     code: str
 
 
+class CodesRequest(BaseModel):
+    codes: list[str]
+
+
 class PasswordRequest(BaseModel):
     password: str
     code: Optional[str] = None
@@ -338,6 +2357,17 @@ class UpdateAuthRequest(BaseModel):
     category: str = "미지정"
 
 
+class BulkOperation(BaseModel):
+    action: str
+    codes: list[str]
+    # action이 category일 때만 씁니다. 미지정으로 되돌리려면 "미지정"을 직접 보냅니다.
+    category: Optional[str] = None
+
+
+class BulkRequest(BaseModel):
+    operations: list[BulkOperation]
+
+
 class FullRegisterRequest(BaseModel):
     name: str
     phoneLast4: str
@@ -418,7 +2448,7 @@ def manager_list_access_allowed(code: str) -> bool:
     code = (code or "").strip()
     if not code:
         return False
-    with _db_lock:
+    with _code_lock(code):
         data = auth_db.get(code)
         if not data:
             return False
@@ -442,7 +2472,7 @@ def validate_and_consume_kyh_code(code: str) -> dict:
     code = (code or "").strip()
     if not code or "kyh" not in code.lower():
         raise HTTPException(status_code=401, detail="invalid_registration_code")
-    with _db_lock:
+    with _code_lock(code):
         data = auth_db.get(code)
         if not data:
             raise HTTPException(status_code=401, detail="invalid_registration_code")
@@ -451,7 +2481,7 @@ def validate_and_consume_kyh_code(code: str) -> dict:
             raise HTTPException(status_code=401, detail="invalid_registration_code")
         if not _registration_code_uses_existing_exception_rule(code):
             data["enabled"] = False
-            save_data()
+            save_data(code)
         return dict(data)
 
 
@@ -520,7 +2550,7 @@ def require_apple_session_token(token: str) -> tuple[str, dict]:
     user_id = str(payload.get("userId") or "").strip() if isinstance(payload, dict) else ""
     if not user_id:
         raise HTTPException(status_code=401, detail="invalid_apple_session")
-    with _db_lock:
+    with _apple_admin_lock:
         if user_id not in apple_admins:
             raise HTTPException(status_code=401, detail="apple_admin_removed")
         return user_id, apple_admin_profile(user_id)
@@ -557,7 +2587,7 @@ def android_admin_profile_for_code(code: str, require_enabled: bool = True) -> d
     code = (code or "").strip()
     if not code:
         raise HTTPException(status_code=401, detail="invalid_android_login_code")
-    with _db_lock:
+    with _code_lock(code):
         data = auth_db.get(code)
         if not data:
             raise HTTPException(status_code=401, detail="invalid_android_login_code")
@@ -634,7 +2664,7 @@ def require_full_apple_admin(request: Request) -> tuple[str, dict]:
 
 
 def _approval_items_sorted() -> list[dict]:
-    with _db_lock:
+    with _approval_lock:
         items = [dict(item) for item in approval_requests.values()]
     items.sort(key=lambda x: x.get("requestedAt") or "", reverse=True)
     return items
@@ -652,12 +2682,11 @@ def create_approval_request(user_id: str, profile: dict, req: AppleAdminUploadRe
     validate_phone(req.phoneLast4)
     password = _effective_delete_password(req.deletePassword)
 
-    with _db_lock:
+    with _approval_lock:
         if code in auth_db:
             raise HTTPException(status_code=409, detail="code_already_exists")
-        for item in approval_requests.values():
-            if str(item.get("code") or "").strip() == code:
-                raise HTTPException(status_code=409, detail="approval_request_already_exists")
+        if _approval_request_ids_for_code(code):
+            raise HTTPException(status_code=409, detail="approval_request_already_exists")
 
         request_id = secrets.token_hex(12)
         item = {
@@ -672,17 +2701,17 @@ def create_approval_request(user_id: str, profile: dict, req: AppleAdminUploadRe
             "category": category,
         }
         approval_requests[request_id] = item
-        save_approval_requests()
+        save_approval_requests(request_id)
+    publish_event("approval.created", requestId=request_id, code=code, name=item["name"], category=category)
 
-    # 요청 저장이 성공한 뒤 푸시는 별도 스레드에서 전송합니다.
-    threading.Thread(target=send_approval_push_to_full_admins, args=(dict(item),), daemon=True).start()
-    threading.Thread(target=send_android_approval_push_to_full_admins, args=(dict(item),), daemon=True).start()
+    # 요청 저장이 성공한 뒤 푸시는 발송 대기열에 넣고 발송 스레드가 보냅니다.
+    enqueue_approval_push(item)
     return item
 
 
 def approve_pending_request(request_id: str) -> dict:
     request_id = (request_id or "").strip()
-    with _db_lock:
+    with _approval_lock:
         item = approval_requests.get(request_id)
         if not item:
             raise HTTPException(status_code=404, detail="approval_request_not_found")
@@ -696,20 +2725,41 @@ def approve_pending_request(request_id: str) -> dict:
     set_delete_pwd(PasswordRequest(password=_effective_delete_password(item.get("deletePassword")), code=item.get("code", "")))
     set_category_for_code(item.get("code", ""), clean_category(item.get("category")))
 
-    with _db_lock:
+    with _approval_lock:
         approval_requests.pop(request_id, None)
-        save_approval_requests()
+        save_approval_requests(request_id)
+    publish_event("approval.approved", requestId=request_id, code=item.get("code", ""))
     return item
 
 
+def _approve_pending(request_id: str) -> dict:
+    item = approve_pending_request(request_id)
+    return {"status": "ok", "code": item.get("code", "")}
+
+
 def delete_pending_request(request_id: str) -> dict:
     request_id = (request_id or "").strip()
-    with _db_lock:
+    with _approval_lock:
         item = approval_requests.pop(request_id, None)
         if not item:
             raise HTTPException(status_code=404, detail="approval_request_not_found")
-        save_approval_requests()
-        return dict(item)
+        save_approval_requests(request_id)
+    publish_event("approval.deleted", requestId=request_id, code=item.get("code", ""))
+    return dict(item)
+
+
+def approval_push_text(item: dict) -> tuple:
+    """승인 알림 제목과 본문. 대기열이 밀려 묶인 알림(digest)은 건수와 앞쪽 몇 건만 보여 줍니다."""
+    digest = item.get("digest")
+    if not digest:
+        return (
+            "인증키 승인 요청",
+            f"{item.get('name','')} · {item.get('phoneLast4','')} · {item.get('category','미지정')}\n{item.get('code','')}",
+        )
+    lines = [f"{x.get('name','')} · {x.get('phoneLast4','')} · {x.get('category','미지정')}" for x in digest[:PUSH_DIGEST_LINES]]
+    if len(digest) > PUSH_DIGEST_LINES:
+        lines.append(f"외 {len(digest) - PUSH_DIGEST_LINES}건")
+    return f"인증키 승인 요청 {len(digest)}건", "\n".join(lines)
 
 
 _apns_token_lock = threading.RLock()
@@ -726,39 +2776,168 @@ def _apns_private_key_text() -> str:
     return APNS_PRIVATE_KEY.replace("\\n", "\n").strip()
 
 
-def _apns_provider_token() -> Optional[str]:
-    global _apns_cached_provider_token, _apns_cached_provider_iat
+@functools.lru_cache(maxsize=None)
+def _apns_signing_key():
+    """APNs .p8 키를 처음 한 번만 읽어 서명 키 객체로 보관합니다. 설정이 없거나 잘못되었으면 None."""
     private_key = _apns_private_key_text()
     if not APNS_KEY_ID or not APNS_TEAM_ID or not private_key:
         return None
+    try:
+        return load_pem_private_key(private_key.encode("utf-8"), password=None)
+    except Exception as exc:
+        print(f"[APNS] invalid APNS_PRIVATE_KEY: {type(exc).__name__}", flush=True)
+        return None
+
+
+def _refresh_apns_provider_token() -> Optional[str]:
+    global _apns_cached_provider_token, _apns_cached_provider_iat
+    key = _apns_signing_key()
+    if key is None:
+        return None
     now = int(time.time())
+    token = jwt.encode(
+        {"iss": APNS_TEAM_ID, "iat": now},
+        key,
+        algorithm="ES256",
+        headers={"kid": APNS_KEY_ID},
+    )
+    if isinstance(token, bytes):
+        token = token.decode("utf-8")
     with _apns_token_lock:
-        if _apns_cached_provider_token and now - _apns_cached_provider_iat < 50 * 60:
-            return _apns_cached_provider_token
-        token = jwt.encode(
-            {"iss": APNS_TEAM_ID, "iat": now},
-            private_key,
-            algorithm="ES256",
-            headers={"kid": APNS_KEY_ID},
-        )
-        if isinstance(token, bytes):
-            token = token.decode("utf-8")
         _apns_cached_provider_token = token
         _apns_cached_provider_iat = now
-        return token
+    return token
 
 
-def _remove_stale_push_token(device_token: str):
-    changed = False
-    with _db_lock:
-        for record in apple_admins.values():
+def _apns_provider_token() -> Optional[str]:
+    with _apns_token_lock:
+        if _apns_cached_provider_token and int(time.time()) - _apns_cached_provider_iat < 50 * 60:
+            return _apns_cached_provider_token
+    # 평소에는 백그라운드에서 미리 갱신해 두므로, 갱신이 실패했을 때만 여기서 만듭니다.
+    return _refresh_apns_provider_token()
+
+
+def _remove_stale_push_token(*device_tokens: str):
+    stale = set(device_tokens)
+    changed = []
+    with _apple_admin_lock:
+        for user_id in push_token_owners("apns", *stale):
+            record = apple_admins.get(user_id)
+            if not record:
+                continue
             _normalize_apple_admin(record)
             before = len(record.get("pushTokens", []))
-            record["pushTokens"] = [x for x in record.get("pushTokens", []) if x.get("token") != device_token]
+            record["pushTokens"] = [x for x in record.get("pushTokens", []) if x.get("token") not in stale]
             if len(record["pushTokens"]) != before:
-                changed = True
+                changed.append(user_id)
         if changed:
-            save_apple_admins()
+            save_apple_admins(*changed, wait=False)
+
+
+# APNs/FCM 연결은 전용 이벤트 루프 스레드("push") 하나에서만 다룹니다.
+# 연결은 승인 요청 사이에 재사용하고, 토큰별 발송은 그 위에서 동시에 나갑니다.
+_push_loop: Optional[asyncio.AbstractEventLoop] = None
+_push_loop_lock = threading.Lock()
+_push_clients: dict = {}
+
+
+def _push_event_loop() -> asyncio.AbstractEventLoop:
+    global _push_loop
+    with _push_loop_lock:
+        if _push_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="push", daemon=True).start()
+            _push_loop = loop
+        return _push_loop
+
+
+def run_push(coro):
+    """발송 코루틴을 push 루프에서 실행하고 끝날 때까지 기다립니다."""
+    return asyncio.run_coroutine_threadsafe(coro, _push_event_loop()).result()
+
+
+async def _push_close_clients():
+    clients = list(_push_clients.values())
+    _push_clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
+
+
+def _close_push_clients():
+    if _push_loop is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_push_close_clients(), _push_loop).result(timeout=5)
+    except Exception:
+        pass
+
+
+atexit.register(_close_push_clients)
+
+
+APNS_HOSTS = {
+    "sandbox": "https://api.sandbox.push.apple.com",
+    "production": "https://api.push.apple.com",
+}
+_apns_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _apns_client(environment: str) -> httpx.AsyncClient:
+    """환경(sandbox/production)별 HTTP/2 연결 하나를 계속 재사용합니다."""
+    client = _push_clients.get(("apns", environment))
+    if client is None:
+        client = httpx.AsyncClient(
+            http2=True,
+            base_url=APNS_HOSTS[environment],
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=1, max_keepalive_connections=1, keepalive_expiry=None),
+        )
+        _push_clients[("apns", environment)] = client
+    return client
+
+
+async def _apns_send_one(device_token: str, environment: str, headers: dict, body: bytes) -> bool:
+    """토큰 하나에 발송하고, 더 이상 유효하지 않은 토큰이면 True를 돌려줍니다."""
+    masked = f"{device_token[:6]}...{device_token[-6:]}" if len(device_token) >= 12 else "***"
+    async with _apns_semaphore:
+        for attempt in range(2):
+            try:
+                response = await _apns_client(environment).post(f"/3/device/{device_token}", headers=headers, content=body)
+                break
+            except httpx.TimeoutException as exc:
+                print(f"[APNS] send timeout env={environment} token={masked}: {type(exc).__name__}", flush=True)
+                return False
+            except httpx.TransportError as exc:
+                # 오래 쉬던 연결이 끊겨 있었으면 새 연결로 한 번만 다시 보냅니다.
+                if attempt == 0:
+                    continue
+                print(f"[APNS] send exception env={environment}: {type(exc).__name__}: {exc}", flush=True)
+                return False
+            except Exception as exc:
+                print(f"[APNS] send exception env={environment}: {type(exc).__name__}: {exc}", flush=True)
+                return False
+    reason = ""
+    try:
+        reason = str(response.json().get("reason") or "")
+    except Exception:
+        pass
+    print(f"[APNS] env={environment} token={masked} status={response.status_code} reason={reason or '-'}", flush=True)
+    if response.status_code == 410:
+        return True
+    return response.status_code == 400 and reason in ("BadDeviceToken", "DeviceTokenNotForTopic", "Unregistered")
+
+
+async def _apns_send_all(targets: list, headers: dict, body: bytes) -> list:
+    global _apns_semaphore
+    if _apns_semaphore is None:
+        _apns_semaphore = asyncio.Semaphore(APNS_CONCURRENCY)
+    results = await asyncio.gather(
+        *(_apns_send_one(device_token, environment, headers, body) for device_token, environment in targets)
+    )
+    return [device_token for (device_token, _), stale in zip(targets, results) if stale]
 
 
 def send_approval_push_to_full_admins(item: dict):
@@ -767,18 +2946,7 @@ def send_approval_push_to_full_admins(item: dict):
         print("[APNS] provider token unavailable: check APNS_KEY_ID / APNS_TEAM_ID / APNS_PRIVATE_KEY(_BASE64)", flush=True)
         return
 
-    targets = []
-    with _db_lock:
-        for record in apple_admins.values():
-            _normalize_apple_admin(record)
-            if record.get("allowedCategory") != "전체":
-                continue
-            for token_info in record.get("pushTokens", []):
-                token = str(token_info.get("token") or "").strip().lower()
-                env = str(token_info.get("environment") or "production").strip().lower()
-                if token:
-                    targets.append((token, "sandbox" if env == "sandbox" else "production"))
-
+    targets = push_targets("apns")
     if not targets:
         print("[APNS] no full-admin push targets registered", flush=True)
         return
@@ -787,11 +2955,12 @@ def send_approval_push_to_full_admins(item: dict):
     production_count = sum(1 for _, env in targets if env == "production")
     print(f"[APNS] sending approval push: targets={len(targets)} sandbox={sandbox_count} production={production_count}", flush=True)
 
+    title, text = approval_push_text(item)
     payload = {
         "aps": {
             "alert": {
-                "title": "인증키 승인 요청",
-                "body": f"{item.get('name','')} · {item.get('phoneLast4','')} · {item.get('category','미지정')}\n{item.get('code','')}",
+                "title": title,
+                "body": text,
             },
             "sound": "default",
             "category": "AUTH_UPLOAD_APPROVAL",
@@ -799,6 +2968,10 @@ def send_approval_push_to_full_admins(item: dict):
         },
         "approvalRequestId": item.get("requestId", ""),
     }
+    if item.get("digest"):
+        # 묶음 알림은 요청 하나를 가리키지 않으므로 승인/거절 버튼 없이 보냅니다.
+        payload["aps"].pop("category")
+        payload["approvalCount"] = len(item["digest"])
     headers = {
         "authorization": f"bearer {provider_token}",
         "apns-topic": APNS_BUNDLE_ID,
@@ -806,57 +2979,31 @@ def send_approval_push_to_full_admins(item: dict):
         "apns-priority": "10",
         "content-type": "application/json",
     }
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
 
     try:
-        with httpx.Client(http2=True, timeout=10.0) as client:
-            for device_token, environment in targets:
-                host = "api.sandbox.push.apple.com" if environment == "sandbox" else "api.push.apple.com"
-                try:
-                    response = client.post(f"https://{host}/3/device/{device_token}", headers=headers, json=payload)
-                    reason = ""
-                    try:
-                        reason = str(response.json().get("reason") or "")
-                    except Exception:
-                        pass
-                    masked = f"{device_token[:6]}...{device_token[-6:]}" if len(device_token) >= 12 else "***"
-                    print(f"[APNS] env={environment} token={masked} status={response.status_code} reason={reason or '-'}", flush=True)
-                    if response.status_code in (400, 410):
-                        if response.status_code == 410 or reason in ("BadDeviceToken", "DeviceTokenNotForTopic", "Unregistered"):
-                            _remove_stale_push_token(device_token)
-                except Exception as exc:
-                    print(f"[APNS] send exception env={environment}: {type(exc).__name__}: {exc}", flush=True)
-                    continue
+        stale = run_push(_apns_send_all(targets, headers, body))
     except Exception as exc:
         print(f"[APNS] client exception: {type(exc).__name__}: {exc}", flush=True)
         return
+    if stale:
+        _remove_stale_push_token(*stale)
 
 
 
 # Android 승인 알림 토큰은 운영 인증키 DB와 분리하여 저장합니다.
-def load_android_push_tokens():
-    if not os.path.exists(ANDROID_PUSH_FILE):
-        return {}
-    try:
-        with open(ANDROID_PUSH_FILE, "r", encoding="utf-8") as f:
-            raw = json.load(f)
-        if not isinstance(raw, dict):
-            return {}
-        return {str(k): [str(x) for x in v if str(x).strip()] for k, v in raw.items() if isinstance(v, list)}
-    except Exception:
-        return {}
-
+def save_android_push_tokens(*source_codes: str, wait: bool = True):
+    _reindex_push_targets("android", source_codes or None)
+    _commit("android_push", source_codes, wait)
 
-def save_android_push_tokens():
-    with _db_lock:
-        _atomic_json_save(ANDROID_PUSH_FILE, android_push_tokens)
 
-
-android_push_tokens = load_android_push_tokens()
 _fcm_token_lock = threading.RLock()
+_fcm_refresh_lock = threading.Lock()
 _fcm_cached_access_token: Optional[str] = None
 _fcm_cached_access_token_until = 0
 
 
+@functools.lru_cache(maxsize=None)
 def _fcm_service_account() -> Optional[dict]:
     if not FCM_SERVICE_ACCOUNT_JSON_BASE64:
         return None
@@ -867,8 +3014,9 @@ def _fcm_service_account() -> Optional[dict]:
         return None
 
 
-def _fcm_access_token() -> Optional[str]:
-    global _fcm_cached_access_token, _fcm_cached_access_token_until
+@functools.lru_cache(maxsize=None)
+def _fcm_credentials() -> Optional[dict]:
+    """서비스 계정 JSON을 처음 한 번만 풀어 발송에 필요한 값과 서명 키 객체를 보관합니다."""
     account = _fcm_service_account()
     if not account:
         return None
@@ -878,26 +3026,51 @@ def _fcm_access_token() -> Optional[str]:
     token_uri = str(account.get("token_uri") or "https://oauth2.googleapis.com/token").strip()
     if not project_id or not client_email or not private_key:
         return None
-    now = int(time.time())
+    try:
+        key = load_pem_private_key(private_key.encode("utf-8"), password=None)
+    except Exception as exc:
+        print(f"[FCM] invalid service account private_key: {type(exc).__name__}", flush=True)
+        return None
+    return {"projectId": project_id, "clientEmail": client_email, "tokenUri": token_uri, "key": key}
+
+
+def _fcm_valid_cached_token(margin: int) -> Optional[str]:
+    """만료까지 margin초보다 많이 남은 캐시 토큰. 없으면 None입니다."""
     with _fcm_token_lock:
-        if _fcm_cached_access_token and now < _fcm_cached_access_token_until - 60:
+        if _fcm_cached_access_token and int(time.time()) < _fcm_cached_access_token_until - margin:
             return _fcm_cached_access_token
+    return None
+
+
+def _refresh_fcm_access_token(margin: int = 60) -> Optional[str]:
+    """토큰을 새로 교환합니다. 잠금을 기다리는 동안 다른 스레드가 갱신해 만료까지 margin초보다 많이
+    남았으면 교환하지 않고 그 토큰을 돌려줍니다."""
+    global _fcm_cached_access_token, _fcm_cached_access_token_until
+    credentials = _fcm_credentials()
+    if not credentials:
+        return None
+    # 토큰 교환은 한 번에 하나만 합니다. 발송 쪽은 _fcm_token_lock만 잡으므로 교환을 기다리지 않습니다.
+    with _fcm_refresh_lock:
+        cached = _fcm_valid_cached_token(margin)
+        if cached:
+            return cached
+        now = int(time.time())
         assertion = jwt.encode(
             {
-                "iss": client_email,
+                "iss": credentials["clientEmail"],
                 "scope": "https://www.googleapis.com/auth/firebase.messaging",
-                "aud": token_uri,
+                "aud": credentials["tokenUri"],
                 "iat": now,
                 "exp": now + 3600,
             },
-            private_key,
+            credentials["key"],
             algorithm="RS256",
         )
         if isinstance(assertion, bytes):
             assertion = assertion.decode("utf-8")
         try:
             response = httpx.post(
-                token_uri,
+                credentials["tokenUri"],
                 data={
                     "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
                     "assertion": assertion,
@@ -910,69 +3083,307 @@ def _fcm_access_token() -> Optional[str]:
             expires = int(body.get("expires_in") or 3600)
             if not token:
                 return None
+        except Exception as exc:
+            print(f"[FCM] access token refresh failed: {type(exc).__name__}: {exc}", flush=True)
+            return None
+        with _fcm_token_lock:
             _fcm_cached_access_token = token
             _fcm_cached_access_token_until = now + expires
-            return token
-        except Exception:
-            return None
+        return token
+
+
+def _fcm_access_token() -> Optional[str]:
+    cached = _fcm_valid_cached_token(60)
+    if cached:
+        return cached
+    # 평소에는 백그라운드에서 미리 갱신해 두므로, 갱신이 실패했을 때만 여기서 교환합니다.
+    return _refresh_fcm_access_token()
+
+
+# APNs provider JWT와 FCM access token은 만료 전에 백그라운드에서 다시 만들어 둡니다.
+# APNs는 20분보다 자주 새로 만들면 거절하고 60분이 지나면 만료되므로 40분마다 갱신합니다.
+APNS_TOKEN_REFRESH_SECONDS = 40 * 60
+FCM_TOKEN_REFRESH_MARGIN_SECONDS = 5 * 60
+PUSH_CREDENTIAL_RETRY_SECONDS = 30
+
+
+def _push_credential_loop():
+    while True:
+        now = time.time()
+        waits = []
+        if _apns_signing_key() is not None:
+            with _apns_token_lock:
+                due = _apns_cached_provider_iat + APNS_TOKEN_REFRESH_SECONDS if _apns_cached_provider_token else 0
+            if now >= due:
+                due = now + (APNS_TOKEN_REFRESH_SECONDS if _refresh_apns_provider_token() else PUSH_CREDENTIAL_RETRY_SECONDS)
+            waits.append(due - now)
+        if _fcm_credentials() is not None:
+            with _fcm_token_lock:
+                due = _fcm_cached_access_token_until - FCM_TOKEN_REFRESH_MARGIN_SECONDS if _fcm_cached_access_token else 0
+            if now >= due:
+                if _refresh_fcm_access_token(FCM_TOKEN_REFRESH_MARGIN_SECONDS):
+                    with _fcm_token_lock:
+                        due = max(now + PUSH_CREDENTIAL_RETRY_SECONDS, _fcm_cached_access_token_until - FCM_TOKEN_REFRESH_MARGIN_SECONDS)
+                else:
+                    due = now + PUSH_CREDENTIAL_RETRY_SECONDS
+            waits.append(due - now)
+        if not waits:
+            return
+        time.sleep(max(1.0, min(waits)))
+
+
+def start_push_credentials() -> bool:
+    """부팅 시 키를 미리 읽고, 설정된 것이 있으면 갱신 스레드를 띄웁니다."""
+    if _apns_signing_key() is None and _fcm_credentials() is None:
+        return False
+    threading.Thread(target=_push_credential_loop, name="push-credentials", daemon=True).start()
+    return True
+
+
+def push_credential_stats() -> dict:
+    now = int(time.time())
+    with _apns_token_lock:
+        apns_age = now - _apns_cached_provider_iat if _apns_cached_provider_token else None
+    with _fcm_token_lock:
+        fcm_left = _fcm_cached_access_token_until - now if _fcm_cached_access_token else None
+    return {
+        "apnsConfigured": _apns_signing_key() is not None,
+        "apnsTokenAgeSeconds": apns_age,
+        "fcmConfigured": _fcm_credentials() is not None,
+        "fcmTokenExpiresInSeconds": fcm_left,
+    }
+
+
+def _remove_stale_android_push_token(*tokens: str):
+    stale = set(tokens)
+    changed = []
+    with _android_push_lock:
+        for code in push_token_owners("android", *stale):
+            if code not in android_push_tokens:
+                continue
+            before = len(android_push_tokens.get(code, []))
+            android_push_tokens[code] = [x for x in android_push_tokens.get(code, []) if x not in stale]
+            if not android_push_tokens[code]:
+                android_push_tokens.pop(code, None)
+            if len(android_push_tokens.get(code, [])) != before:
+                changed.append(code)
+        if changed:
+            save_android_push_tokens(*changed, wait=False)
+
+
+_fcm_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _fcm_client() -> httpx.AsyncClient:
+    client = _push_clients.get(("fcm",))
+    if client is None:
+        client = httpx.AsyncClient(
+            http2=True,
+            base_url=FCM_HOST,
+            timeout=FCM_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=FCM_CONCURRENCY, max_keepalive_connections=FCM_CONCURRENCY, keepalive_expiry=300),
+        )
+        _push_clients[("fcm",)] = client
+    return client
+
+
+def _fcm_retry_delay(response: Optional[httpx.Response], attempt: int) -> float:
+    """Retry-After가 있으면 따르고, 없으면 0.5초부터 두 배씩(지터 포함) 기다립니다."""
+    if response is not None:
+        try:
+            return min(30.0, max(0.0, float(response.headers.get("retry-after") or "")))
+        except ValueError:
+            pass
+    return min(30.0, 0.5 * (2 ** attempt)) * (0.5 + random.random() / 2)
+
+
+async def _fcm_send_one(path: str, headers: dict, target: str, data: dict) -> bool:
+    """토큰 하나에 발송하고, 더 이상 등록되지 않은 토큰이면 True를 돌려줍니다."""
+    payload = {
+        "message": {
+            "token": target,
+            "data": data,
+            "android": {"priority": "high"},
+        }
+    }
+    async with _fcm_semaphore:
+        for attempt in range(FCM_MAX_RETRIES + 1):
+            response = None
+            try:
+                response = await _fcm_client().post(path, headers=headers, json=payload)
+            except httpx.TimeoutException:
+                return False
+            except httpx.TransportError:
+                pass
+            except Exception:
+                return False
+            if response is not None and response.status_code != 429 and response.status_code < 500:
+                if response.status_code in (400, 404):
+                    body = response.text
+                    return "UNREGISTERED" in body or "registration-token-not-registered" in body
+                return False
+            if attempt < FCM_MAX_RETRIES:
+                await asyncio.sleep(_fcm_retry_delay(response, attempt))
+    return False
 
 
-def _remove_stale_android_push_token(token: str):
-    changed = False
-    with _db_lock:
-        for code in list(android_push_tokens.keys()):
-            before = len(android_push_tokens.get(code, []))
-            android_push_tokens[code] = [x for x in android_push_tokens.get(code, []) if x != token]
-            if not android_push_tokens[code]:
-                android_push_tokens.pop(code, None)
-            if len(android_push_tokens.get(code, [])) != before:
-                changed = True
-        if changed:
-            save_android_push_tokens()
+async def _fcm_send_all(path: str, headers: dict, targets: list, data: dict) -> list:
+    global _fcm_semaphore
+    if _fcm_semaphore is None:
+        _fcm_semaphore = asyncio.Semaphore(FCM_CONCURRENCY)
+    results = await asyncio.gather(*(_fcm_send_one(path, headers, target, data) for target in targets))
+    return [target for target, stale in zip(targets, results) if stale]
 
 
 def send_android_approval_push_to_full_admins(item: dict):
+    credentials = _fcm_credentials()
     access_token = _fcm_access_token()
-    account = _fcm_service_account()
-    project_id = FCM_PROJECT_ID or (str(account.get("project_id") or "").strip() if account else "")
-    if not access_token or not project_id:
+    if not access_token or not credentials:
         return
-    with _db_lock:
-        targets = []
-        for source_code, tokens in android_push_tokens.items():
-            try:
-                profile = android_admin_profile_for_code(source_code, require_enabled=False)
-            except HTTPException:
-                continue
-            if profile.get("allowedCategory") == "전체":
-                targets.extend(tokens)
+    project_id = credentials["projectId"]
+    targets = [token for token, _ in push_targets("android")]
     if not targets:
         return
-    url = f"https://fcm.googleapis.com/v1/projects/{project_id}/messages:send"
+    path = f"/v1/projects/{project_id}/messages:send"
+    title, text = approval_push_text(item)
     headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
     data = {
         "type": "auth_upload_approval",
         "requestId": str(item.get("requestId") or ""),
-        "title": "인증키 승인 요청",
-        "body": f"{item.get('name','')} · {item.get('phoneLast4','')} · {item.get('category','미지정')}\n{item.get('code','')}",
+        "title": title,
+        "body": text,
         "requesterLabel": str(item.get("requesterLabel") or ""),
     }
-    for target in list(dict.fromkeys(targets)):
-        payload = {
-            "message": {
-                "token": target,
-                "data": data,
-                "android": {"priority": "high"},
-            }
-        }
-        try:
-            response = httpx.post(url, headers=headers, json=payload, timeout=10.0)
-            if response.status_code in (400, 404):
-                body = response.text
-                if "UNREGISTERED" in body or "registration-token-not-registered" in body:
-                    _remove_stale_android_push_token(target)
-        except Exception:
-            continue
+    if item.get("digest"):
+        data["count"] = str(len(item["digest"]))
+    try:
+        stale = run_push(_fcm_send_all(path, headers, targets, data))
+    except Exception:
+        return
+    if stale:
+        _remove_stale_android_push_token(*stale)
+
+# ============================================================
+#   승인 알림 발송 대기열
+#   업로드마다 스레드를 만들지 않고 크기가 정해진 대기열에 넣어 고정된 발송 스레드가 보냅니다.
+#   발송이 밀려 대기열에 PUSH_DIGEST_BACKLOG건보다 많이 쌓이면 한 번에 꺼내 "N건" 묶음 알림 하나로 보냅니다.
+#   묶음 알림에는 건별 승인/거절 버튼이 없으므로, 거의 동시에 온 몇 건은 건별로 보냅니다.
+# ============================================================
+_push_queue: deque = deque()
+_push_cv = threading.Condition()
+_push_threads: list = []
+_push_stopping = False
+_push_busy = 0
+_push_stats = {
+    "enqueued": 0,
+    "dropped": 0,
+    "sent": 0,
+    "digests": 0,
+    "coalesced": 0,
+    "failed": 0,
+    "maxDepth": 0,
+}
+
+
+def enqueue_approval_push(item: dict) -> bool:
+    """대기열이 가득 찼거나 종료 중이면 버리고 False를 돌려줍니다."""
+    with _push_cv:
+        if _push_stopping or len(_push_queue) >= PUSH_QUEUE_SIZE:
+            _push_stats["dropped"] += 1
+            print(f"[PUSH] queue full, dropped approval push requestId={item.get('requestId','')}", flush=True)
+            return False
+        _push_queue.append(dict(item))
+        _push_stats["enqueued"] += 1
+        _push_stats["maxDepth"] = max(_push_stats["maxDepth"], len(_push_queue))
+        if not _push_threads:
+            for index in range(PUSH_WORKERS):
+                thread = threading.Thread(target=_push_worker, name=f"push-dispatch-{index}", daemon=True)
+                thread.start()
+                _push_threads.append(thread)
+        _push_cv.notify()
+        return True
+
+
+def _next_push_batch() -> Optional[list]:
+    global _push_busy
+    with _push_cv:
+        while not _push_queue:
+            if _push_stopping:
+                return None
+            _push_cv.wait()
+        backed_up = len(_push_queue) > PUSH_DIGEST_BACKLOG
+        batch = [_push_queue.popleft()]
+        while backed_up and _push_queue and len(batch) < PUSH_DIGEST_MAX:
+            batch.append(_push_queue.popleft())
+        _push_busy += 1
+        return batch
+
+
+def _push_worker():
+    global _push_busy
+    while True:
+        batch = _next_push_batch()
+        if batch is None:
+            return
+        item = batch[0] if len(batch) == 1 else {"requestId": "", "digest": batch}
+        failed = False
+        for send in (send_approval_push_to_full_admins, send_android_approval_push_to_full_admins):
+            try:
+                send(item)
+            except Exception as exc:
+                failed = True
+                print(f"[PUSH] {send.__name__} failed: {type(exc).__name__}: {exc}", flush=True)
+        with _push_cv:
+            _push_busy -= 1
+            _push_stats["sent"] += 1
+            if len(batch) > 1:
+                _push_stats["digests"] += 1
+                _push_stats["coalesced"] += len(batch)
+            if failed:
+                _push_stats["failed"] += 1
+            _push_cv.notify_all()
+
+
+def drain_push_queue(timeout: float = None) -> bool:
+    """새 알림을 받지 않고 남은 대기열을 보낸 뒤 발송 스레드를 끝냅니다. 시간 안에 다 보냈으면 True."""
+    global _push_stopping
+    deadline = time.monotonic() + (PUSH_DRAIN_SECONDS if timeout is None else timeout)
+    with _push_cv:
+        _push_stopping = True
+        _push_cv.notify_all()
+        while _push_queue or _push_busy:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"[PUSH] shutdown with {len(_push_queue)} queued approval pushes unsent", flush=True)
+                return False
+            _push_cv.wait(remaining)
+    return True
+
+
+# 종료 시 발송 연결을 닫기 전에 대기열부터 비웁니다(atexit는 나중에 등록한 것부터 실행).
+atexit.register(drain_push_queue)
+
+
+def _finish_background_work():
+    """uvicorn은 SIGTERM을 받으면 정상 종료 후 같은 신호로 프로세스를 끝내 atexit가 돌지 않으므로,
+    lifespan 종료에서 atexit와 같은 순서로 정리합니다. 두 번 불려도 괜찮습니다."""
+    drain_push_queue()
+    _close_push_clients()
+    _flush_dirty()
+
+
+def push_dispatch_stats() -> dict:
+    with _push_cv:
+        stats = dict(_push_stats)
+        stats["depth"] = len(_push_queue)
+        stats["inFlight"] = _push_busy
+        stats["stopping"] = _push_stopping
+    stats["queueSize"] = PUSH_QUEUE_SIZE
+    stats["workers"] = PUSH_WORKERS
+    stats["digestMax"] = PUSH_DIGEST_MAX
+    stats["digestBacklog"] = PUSH_DIGEST_BACKLOG
+    stats["credentials"] = push_credential_stats()
+    return stats
 
 
 @app.get("/android-admin/push-config")
@@ -994,29 +3405,31 @@ def android_push_token(req: AndroidPushTokenRequest, request: Request):
     token = (req.deviceToken or "").strip()
     if not token:
         raise HTTPException(status_code=400, detail="invalid_device_token")
-    with _db_lock:
+    with _android_push_lock:
         tokens = [x for x in android_push_tokens.get(source_code, []) if x != token]
         tokens.append(token)
         android_push_tokens[source_code] = tokens[-5:]
-        save_android_push_tokens()
+        save_android_push_tokens(source_code)
     return {"status": "ok"}
 
 
 @app.get("/android-admin/approval-requests")
-def android_admin_approval_requests(request: Request):
+def android_admin_approval_requests(request: Request, response: Response):
     _, profile = require_android_session(request)
     if profile.get("allowedCategory") != "전체":
         raise HTTPException(status_code=403, detail="full_permission_required")
+    not_modified = _conditional(request, response, "approvals")
+    if not_modified:
+        return not_modified
     return {"items": _approval_items_sorted()}
 
 
 @app.post("/android-admin/approval-requests/approve")
-def android_admin_approval_approve(req: ApprovalActionRequest, request: Request):
+def android_admin_approval_approve(req: ApprovalActionRequest, request: Request, idempotency_key: IdempotencyKey = None):
     _, profile = require_android_session(request)
     if profile.get("allowedCategory") != "전체":
         raise HTTPException(status_code=403, detail="full_permission_required")
-    item = approve_pending_request(req.requestId)
-    return {"status": "ok", "code": item.get("code", "")}
+    return idempotent("approval-approve", idempotency_key, req.requestId, lambda: _approve_pending(req.requestId))
 
 
 @app.post("/android-admin/approval-requests/delete")
@@ -1028,6 +3441,14 @@ def android_admin_approval_delete(req: ApprovalActionRequest, request: Request):
     return {"status": "ok", "code": item.get("code", "")}
 
 
+@app.middleware("http")
+async def refresh_shared_state_before_request(request: Request, call_next):
+    # 다른 워커가 저장했으면 잠금 없이 읽는 조회도 최신 데이터를 보도록 먼저 반영합니다.
+    if shared_state_changed():
+        await run_in_threadpool(refresh_shared_state)
+    return await call_next(request)
+
+
 @app.middleware("http")
 async def enforce_registered_apple_admin_for_iphone_requests(request: Request, call_next):
     # 기존 앱은 이 헤더를 보내지 않으므로 기존 API 동작은 그대로 유지됩니다.
@@ -1043,36 +3464,86 @@ async def enforce_registered_apple_admin_for_iphone_requests(request: Request, c
 def move_to_trash(code):
     # 호환성을 위해 함수명은 유지하지만, 이제 삭제 요청은 서버에서 즉시 완전 삭제합니다.
     # 기존 API 경로와 호출부는 그대로 유지됩니다.
-    with _db_lock:
+    with _auth_key_lock(code):
         if code not in auth_db:
             return False
         del auth_db[code]
-        save_data()
+        save_data(code)
         return True
 
 
-def purge_trash():
+def purge_trash(limit: Optional[int] = None) -> int:
+    """만료된 휴지통 인증키를 최대 limit건 지우고 한 번에 저장합니다. 지운 건수를 돌려줍니다."""
     now = now_kst().replace(tzinfo=None)
-    remove = []
-    with _db_lock:
-        for code, d in auth_db.items():
-            deleted_at = d.get("deletedAt")
-            if not deleted_at:
-                continue
-            try:
-                deleted = datetime.strptime(deleted_at, "%Y-%m-%d %H:%M")
-            except Exception:
-                continue
-            if now - deleted > timedelta(days=180):
-                remove.append(code)
-        for code in remove:
-            del auth_db[code]
+    with _auth_lock:
+        remove = _pop_expired_trash(now, limit or len(auth_db) + 1)
+        with _code_locks(*remove):
+            for code in remove:
+                del auth_db[code]
         if remove:
-            save_data()
+            save_data(*remove)
+        return len(remove)
+
+
+_trash_stats_lock = threading.Lock()
+_trash_stats = {
+    "runs": 0,
+    "lastRunAt": None,
+    "lastPurged": 0,
+    "lastBatches": 0,
+    "lastDurationMs": 0,
+    "lastError": None,
+    "totalPurged": 0,
+}
+
+
+def run_trash_purge() -> dict:
+    """만료 항목이 남아 있는 동안 TRASH_PURGE_BATCH 단위로 정리하고 실행 통계를 남깁니다."""
+    started = time.monotonic()
+    purged = batches = 0
+    error = None
+    try:
+        while True:
+            count = purge_trash(TRASH_PURGE_BATCH)
+            if count:
+                purged += count
+                batches += 1
+            next_expiry = _next_trash_expiry()
+            if next_expiry is None or next_expiry > now_kst().replace(tzinfo=None):
+                break
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        print(f"[TRASH] purge failed: {error}", flush=True)
+    with _trash_stats_lock:
+        _trash_stats["runs"] += 1
+        _trash_stats["lastRunAt"] = now_kst().isoformat(timespec="seconds")
+        _trash_stats["lastPurged"] = purged
+        _trash_stats["lastBatches"] = batches
+        _trash_stats["lastDurationMs"] = int((time.monotonic() - started) * 1000)
+        _trash_stats["lastError"] = error
+        _trash_stats["totalPurged"] += purged
+        return dict(_trash_stats)
+
+
+def trash_purge_stats() -> dict:
+    with _trash_stats_lock:
+        stats = dict(_trash_stats)
+    next_expiry = _next_trash_expiry()
+    stats["pending"] = len(_deleted_codes())
+    stats["nextExpiry"] = next_expiry.strftime("%Y-%m-%d %H:%M") if next_expiry else None
+    stats["intervalSeconds"] = TRASH_PURGE_INTERVAL_SECONDS
+    stats["batchSize"] = TRASH_PURGE_BATCH
+    return stats
+
+
+def _trash_purge_loop():
+    while True:
+        time.sleep(TRASH_PURGE_INTERVAL_SECONDS)
+        run_trash_purge()
 
 
 def activate_code(code: str):
-    with _db_lock:
+    with _code_lock(code):
         if code not in auth_db:
             raise HTTPException(status_code=404, detail="code_not_found")
         data = auth_db[code]
@@ -1082,29 +3553,33 @@ def activate_code(code: str):
             data["status"] = "approved"
         if not data.get("token"):
             data["token"] = secrets.token_hex(32)
-        save_data()
+        save_data(code)
+        publish_event("key.status", code=code, enabled=True)
         return data
 
 
 def deactivate_code(code: str):
-    with _db_lock:
+    with _code_lock(code):
         if code not in auth_db:
             raise HTTPException(status_code=404, detail="code_not_found")
         auth_db[code]["enabled"] = False
-        save_data()
+        save_data(code)
+        publish_event("key.status", code=code, enabled=False)
         return auth_db[code]
 
 
 def set_category_for_code(code: str, category: str):
     category = clean_category(category)
-    with _db_lock:
+    with _code_lock(code):
         if code not in auth_db:
             raise HTTPException(status_code=404, detail="code_not_found")
         auth_db[code]["category"] = category
-        if category != "미지정" and category not in categories:
-            categories.append(category)
-            save_categories()
-        save_data()
+        with _category_lock:
+            if category != "미지정" and category not in categories:
+                categories.append(category)
+                save_categories()
+        save_data(code)
+        publish_event("key.category", code=code, category=category)
         return auth_db[code]
 
 
@@ -1123,28 +3598,38 @@ def rename_category_and_reassign(old_name: str, new_name: str) -> int:
     if old_name == new_name:
         return 0
 
-    with _db_lock:
+    # 인증키별 잠금은 카테고리/관리자 잠금보다 먼저 잡아야 하므로 인증키 저장을 먼저 끝냅니다.
+    with _auth_lock:
         if old_name not in categories:
             raise HTTPException(status_code=404, detail="category_not_found")
 
-        moved = 0
-        for data in auth_db.values():
-            if clean_category(data.get("category")) == old_name:
-                data["category"] = new_name
-                moved += 1
-
-        # 기존 카테고리는 제거하고, 새 이름이 없을 때만 추가합니다.
-        categories[:] = [c for c in categories if c != old_name]
-        if new_name not in categories:
-            categories.append(new_name)
-
-        for admin_record in apple_admins.values():
-            if admin_record.get("allowedCategory") == old_name:
-                admin_record["allowedCategory"] = new_name
-        save_data()
-        save_categories()
-        save_apple_admins()
-        return moved
+        moved = []
+        candidates = _codes_in_category(old_name)
+        with _code_locks(*candidates):
+            for code in candidates:
+                data = auth_db.get(code)
+                if data is not None and clean_category(data.get("category")) == old_name:
+                    data["category"] = new_name
+                    moved.append(code)
+        if moved:
+            save_data(*moved)
+
+        with _category_lock:
+            # 기존 카테고리는 제거하고, 새 이름이 없을 때만 추가합니다.
+            categories[:] = [c for c in categories if c != old_name]
+            if new_name not in categories:
+                categories.append(new_name)
+            save_categories()
+
+        with _apple_admin_lock:
+            reassigned_admins = []
+            for user_id, admin_record in apple_admins.items():
+                if admin_record.get("allowedCategory") == old_name:
+                    admin_record["allowedCategory"] = new_name
+                    reassigned_admins.append(user_id)
+            if reassigned_admins:
+                save_apple_admins(*reassigned_admins)
+        return len(moved)
 
 
 def delete_category_and_reassign(name: str) -> int:
@@ -1155,32 +3640,42 @@ def delete_category_and_reassign(name: str) -> int:
     if name == "미지정":
         raise HTTPException(status_code=400, detail="cannot_delete_unspecified")
 
-    with _db_lock:
+    with _auth_lock:
         if name not in categories:
             raise HTTPException(status_code=404, detail="category_not_found")
 
-        moved = 0
-        for data in auth_db.values():
-            if clean_category(data.get("category")) == name:
-                data["category"] = "미지정"
-                moved += 1
-
-        categories[:] = [c for c in categories if c != name]
+        moved = []
+        candidates = _codes_in_category(name)
+        with _code_locks(*candidates):
+            for code in candidates:
+                data = auth_db.get(code)
+                if data is not None and clean_category(data.get("category")) == name:
+                    data["category"] = "미지정"
+                    moved.append(code)
         # 먼저 인증키 데이터를 저장하고, 이후 카테고리 목록을 저장합니다.
         # 각 저장 함수는 기존 파일을 .bak로 남깁니다.
-        for admin_record in apple_admins.values():
-            if admin_record.get("allowedCategory") == name:
-                admin_record["allowedCategory"] = None
-        save_data()
-        save_categories()
-        save_apple_admins()
-        return moved
+        if moved:
+            save_data(*moved)
+
+        with _category_lock:
+            categories[:] = [c for c in categories if c != name]
+            save_categories()
+
+        with _apple_admin_lock:
+            reassigned_admins = []
+            for user_id, admin_record in apple_admins.items():
+                if admin_record.get("allowedCategory") == name:
+                    admin_record["allowedCategory"] = None
+                    reassigned_admins.append(user_id)
+            if reassigned_admins:
+                save_apple_admins(*reassigned_admins)
+        return len(moved)
 
 
 def build_full_backup_zip() -> bytes:
     """인증키/비밀번호/토큰/상태/카테고리 등 운영 데이터를 ZIP 하나로 백업합니다."""
-    with _db_lock:
-        auth_snapshot = {code: dict(data) for code, data in auth_db.items()}
+    with _all_auth_locks(), _category_lock, _apple_admin_lock, _approval_lock:
+        auth_snapshot = _auth_db_snapshot_locked()
         category_snapshot = list(categories)
         apple_admin_snapshot = {user_id: dict(data) for user_id, data in apple_admins.items()}
         approval_snapshot = {request_id: dict(data) for request_id, data in approval_requests.items()}
@@ -1286,7 +3781,9 @@ def restore_full_backup_zip(raw: bytes) -> tuple[int, int]:
             item["requestId"] = request_id
             normalized_approval_requests[request_id] = item
 
-    with _db_lock:
+    # 인덱스는 잠금 밖에서 미리 만들어, 모든 인증키 잠금을 쥔 동안에는 교체만 합니다.
+    index = build_auth_index(normalized_db)
+    with _all_auth_locks(), _category_lock, _apple_admin_lock, _approval_lock:
         auth_db.clear()
         auth_db.update(normalized_db)
         categories[:] = normalized_categories
@@ -1297,7 +3794,8 @@ def restore_full_backup_zip(raw: bytes) -> tuple[int, int]:
             approval_requests.clear()
             approval_requests.update(normalized_approval_requests)
         # _atomic_json_save가 현재 서버 파일을 .bak로 남긴 뒤 교체합니다.
-        save_data()
+        _reindex_auth(prebuilt=index)
+        _commit("auth", (), True, changed=False)
         save_categories()
         if normalized_apple_admins is not None:
             save_apple_admins()
@@ -1342,11 +3840,13 @@ def _normalize_restore_payload(incoming_db, incoming_categories=None) -> tuple[d
 
 def _replace_server_data(normalized_db: dict[str, dict], normalized_categories: list[str]) -> tuple[int, int]:
     """현재 운영 데이터를 백업 내용으로 전체 복원합니다. 저장 시 기존 파일은 .bak로 남습니다."""
-    with _db_lock:
+    index = build_auth_index(normalized_db)
+    with _all_auth_locks(), _category_lock:
         auth_db.clear()
         auth_db.update(normalized_db)
         categories[:] = normalized_categories
-        save_data()
+        _reindex_auth(prebuilt=index)
+        _commit("auth", (), True, changed=False)
         save_categories()
     return len(normalized_db), len(normalized_categories)
 
@@ -1397,7 +3897,7 @@ def update_code(req: UpdateAuthRequest):
     if not old_code or not new_code:
         raise HTTPException(status_code=400, detail="code_required")
 
-    with _db_lock:
+    with _auth_key_lock(old_code, new_code), _category_lock:
         if old_code not in auth_db:
             raise HTTPException(status_code=404, detail="code_not_found")
         if new_code != old_code and new_code in auth_db:
@@ -1420,40 +3920,477 @@ def update_code(req: UpdateAuthRequest):
             categories.append(data["category"])
             save_categories()
 
-        save_data()
+        save_data(old_code, new_code)
         return new_code, data
 
 
-def sorted_items(include_deleted: bool = True):
-    with _db_lock:
-        items = []
-        for code, data in auth_db.items():
-            if not include_deleted and data.get("deletedAt"):
+# ============================================================
+#   일괄 변경 (/admin/api/bulk, /manage/bulk)
+#   요청 전체를 먼저 검사한 뒤, 관련 인증키 잠금을 한 번만 잡고 모두 적용해 한 번에 저장합니다.
+#   없는 인증키는 해당 항목만 실패로 돌려주고 나머지는 그대로 적용합니다.
+# ============================================================
+BULK_ACTIONS = ("activate", "deactivate", "category", "delete")
+BULK_MAX_ITEMS = 5000
+_BULK_STATUS = {"activate": "active", "deactivate": "inactive", "category": "ok", "delete": "moved_to_trash"}
+
+
+def _bulk_plan(req: BulkRequest) -> list[tuple[str, str, str]]:
+    plan = []
+    for operation in req.operations:
+        action = operation.action.strip().lower()
+        if action not in BULK_ACTIONS:
+            raise HTTPException(status_code=400, detail=f"unknown_bulk_action: {operation.action}")
+        if action == "category" and not (operation.category or "").strip():
+            # 빠뜨린 카테고리를 미지정으로 바꿔 버리지 않도록 요청 전체를 거절합니다.
+            raise HTTPException(status_code=400, detail="category_required")
+        category = clean_category(operation.category)
+        for code in operation.codes:
+            code = code.strip()
+            if not code:
+                raise HTTPException(status_code=400, detail="code_required")
+            plan.append((action, code, category))
+    if not plan:
+        raise HTTPException(status_code=400, detail="operations_required")
+    if len(plan) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"too_many_bulk_items: max {BULK_MAX_ITEMS}")
+    return plan
+
+
+def apply_bulk(req: BulkRequest) -> dict:
+    """activate/deactivate/category/delete를 여러 인증키에 순서대로 적용하고 항목별 결과를 돌려줍니다."""
+    plan = _bulk_plan(req)
+    deletes = any(action == "delete" for action, _, _ in plan)
+    results = []
+    changed: set[str] = set()
+    with ExitStack() as stack:
+        if deletes:
+            # 삭제는 auth_db 구조를 바꾸므로 move_to_trash와 같이 전체 구조 잠금부터 잡습니다.
+            stack.enter_context(_auth_lock)
+        stack.enter_context(_code_locks(*{code for _, code, _ in plan}))
+        new_categories = []
+        for action, code, category in plan:
+            data = auth_db.get(code)
+            if data is None:
+                results.append({"action": action, "code": code, "status": "error", "detail": "code_not_found"})
                 continue
-            item = {"code": code, **dict(data)}
-            item["category"] = clean_category(item.get("category"))
-            item["enabled"] = bool(item.get("enabled", True))
-            items.append(item)
-    items.sort(key=lambda x: x.get("date") or "", reverse=True)
-    return items
+            if action == "activate":
+                data["deletedAt"] = None
+                data["enabled"] = True
+                if data.get("status") != "approved":
+                    data["status"] = "approved"
+                if not data.get("token"):
+                    data["token"] = secrets.token_hex(32)
+            elif action == "deactivate":
+                data["enabled"] = False
+            elif action == "category":
+                data["category"] = category
+                if category != "미지정" and category not in new_categories:
+                    new_categories.append(category)
+            else:
+                del auth_db[code]
+            changed.add(code)
+            item = {"action": action, "code": code, "status": _BULK_STATUS[action]}
+            if action == "category":
+                item["category"] = category
+            results.append(item)
+        if new_categories:
+            with _category_lock:
+                missing = [name for name in new_categories if name not in categories]
+                if missing:
+                    categories.extend(missing)
+                    save_categories()
+        if changed:
+            save_data(*changed)
+    failed = sum(1 for item in results if item["status"] == "error")
+    if changed:
+        # 항목마다 보내지 않고 한 번만 알립니다. 관리자 페이지는 목록을 다시 읽습니다.
+        publish_event("key.bulk", count=len(changed))
+    return {"status": "ok", "applied": len(results) - failed, "failed": failed, "results": results}
+
+
+# ============================================================
+#   인증키 일괄 가져오기 (CSV / XLSX)
+#   /tokens/export와 같은 열(날짜, 성함, 전화번호, 인증키, 비밀번호, 카테고리, 활성상태)을 읽습니다.
+#   업로드는 임시 파일에 나눠 받고, 행 단위로 검사한 뒤 통과한 행만 한 번에 저장합니다.
+# ============================================================
+IMPORT_COLUMNS = ("날짜", "성함", "전화번호", "인증키", "비밀번호", "카테고리", "활성상태")
+IMPORT_MAX_BYTES = 20 * 1024 * 1024
+IMPORT_MAX_ROWS = 50000
+# 행별 오류는 이 개수까지만 응답에 담고 나머지는 건수로만 알려줍니다.
+IMPORT_MAX_ERRORS = 1000
+
+
+async def spool_upload(request: Request, max_bytes: int = IMPORT_MAX_BYTES):
+    """요청 본문을 메모리에 모두 올리지 않고 임시 파일로 받습니다. 호출한 쪽에서 닫아야 합니다."""
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    size = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail="import_too_large")
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    if not size:
+        spool.close()
+        raise HTTPException(status_code=400, detail="empty_import")
+    spool.seek(0)
+    return spool
+
+
+def import_filename(request: Request) -> str:
+    """X-Import-Filename 헤더의 파일 이름입니다. 관리자 화면은 한글 이름을 encodeURIComponent로 보내므로 풀어서 씁니다."""
+    return urllib.parse.unquote(request.headers.get("X-Import-Filename", ""))
+
+
+def _import_kind(spool, filename: str, content_type: str) -> str:
+    head = spool.read(4)
+    spool.seek(0)
+    lowered = filename.lower()
+    if head.startswith(b"PK") or lowered.endswith(".xlsx") or "spreadsheetml" in content_type:
+        return "xlsx"
+    return "csv"
+
+
+def _iter_import_rows(spool, kind: str) -> Iterator[tuple[int, list]]:
+    if kind == "xlsx":
+        try:
+            wb = load_workbook(spool, read_only=True, data_only=True)
+        except Exception:
+            raise HTTPException(status_code=400, detail="invalid_xlsx")
+        try:
+            for number, row in enumerate(wb.active.iter_rows(values_only=True), start=1):
+                yield number, list(row)
+        finally:
+            wb.close()
+        return
+    # 엑셀에서 저장한 한글 CSV는 cp949인 경우가 많아, utf-8로 읽다가 실패하면 처음부터 다시 읽습니다.
+    for encoding in ("utf-8-sig", "cp949"):
+        spool.seek(0)
+        text = io.TextIOWrapper(spool, encoding=encoding, newline="")
+        number = 0
+        try:
+            for number, row in enumerate(csv.reader(text), start=1):
+                yield number, row
+            return
+        except UnicodeDecodeError:
+            if number:
+                raise HTTPException(status_code=400, detail=f"invalid_csv_encoding: row {number + 1}")
+        finally:
+            text.detach()
+    raise HTTPException(status_code=400, detail="invalid_csv_encoding")
+
+
+def _import_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M")
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _import_record(cells: dict, now_text: str) -> tuple[str, dict]:
+    name = cells.get("성함", "")
+    phone = cells.get("전화번호", "")
+    code = cells.get("인증키", "")
+    password = cells.get("비밀번호", "")
+    if not name:
+        raise ValueError("name_required")
+    if phone.isdigit() and len(phone) < 4:
+        # 엑셀이 숫자로 바꾸면서 앞자리 0이 빠진 경우입니다.
+        phone = phone.zfill(4)
+    if len(phone) != 4 or not phone.isdigit():
+        raise ValueError("phoneLast4 must be exactly 4 digits")
+    if not code:
+        raise ValueError("code_required")
+    if not password:
+        raise ValueError("delete_password_required")
+    enabled = cells.get("활성상태", "") not in ("비활성", "inactive", "false", "0")
+    return code, {
+        "date": cells.get("날짜") or now_text,
+        "name": name,
+        "phone": phone,
+        "status": "approved",
+        "token": secrets.token_hex(32),
+        "delete_password": password,
+        "deletedAt": None,
+        "category": clean_category(cells.get("카테고리")),
+        "enabled": enabled,
+    }
+
+
+def import_keys_file(spool, filename: str = "", content_type: str = "") -> dict:
+    """CSV/XLSX 행을 검사해 새 인증키로 등록합니다. 오류 행은 건너뛰고 행 번호와 사유를 돌려줍니다."""
+    kind = _import_kind(spool, filename, content_type)
+    now_text = now_kst().strftime("%Y-%m-%d %H:%M")
+    columns = None
+    pending: dict[str, dict] = {}
+    rows: dict[str, int] = {}
+    errors = []
+    failed = 0
+
+    def fail(number: int, code: str, detail: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({"row": number, "code": code, "detail": detail})
+
+    for number, row in _iter_import_rows(spool, kind):
+        values = [_import_cell(value) for value in row]
+        if not any(values):
+            continue
+        if columns is None:
+            if "인증키" in values:
+                # 머리글 행이 있으면 열 이름으로 찾으므로 열 순서가 달라도 됩니다.
+                columns = {name: values.index(name) for name in IMPORT_COLUMNS if name in values}
+                continue
+            columns = {name: index for index, name in enumerate(IMPORT_COLUMNS)}
+        cells = {name: values[index] for name, index in columns.items() if index < len(values)}
+        try:
+            code, record = _import_record(cells, now_text)
+        except ValueError as exc:
+            fail(number, cells.get("인증키", ""), str(exc))
+            continue
+        if code in pending:
+            fail(number, code, f"duplicate_code_in_file: row {rows[code]}")
+            continue
+        if code in auth_db:
+            # 잠금 없이 먼저 걸러 내고, 저장 직전에 잠금 안에서 한 번 더 확인합니다.
+            fail(number, code, "code_already_exists")
+            continue
+        if len(pending) >= IMPORT_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"too_many_import_rows: max {IMPORT_MAX_ROWS}")
+        pending[code] = record
+        rows[code] = number
+
+    imported = []
+    with _auth_key_lock(*pending):
+        for code, record in pending.items():
+            if code in auth_db:
+                fail(rows[code], code, "code_already_exists")
+                continue
+            auth_db[code] = record
+            imported.append(code)
+        new_categories = []
+        for code in imported:
+            category = auth_db[code]["category"]
+            if category != "미지정" and category not in new_categories:
+                new_categories.append(category)
+        if new_categories:
+            with _category_lock:
+                missing = [name for name in new_categories if name not in categories]
+                if missing:
+                    categories.extend(missing)
+                    save_categories()
+        if imported:
+            save_data(*imported)
+    if imported:
+        publish_event("key.bulk", count=len(imported))
+    errors.sort(key=lambda item: item["row"])
+    return {"status": "ok", "type": kind, "imported": len(imported), "failed": failed, "errors": errors}
+
+
+# 스트리밍 JSON 응답에서 한 번에 직렬화하는 인증키 수입니다.
+STREAM_CHUNK_RECORDS = 500
+
+
+def _json_text(value) -> str:
+    # FastAPI 기본 JSONResponse와 같은 형식입니다.
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def _auth_db_snapshot_locked() -> dict[str, dict]:
+    """_all_auth_locks 안에서 부릅니다. auth_db 한 시점의 사본을 돌려줍니다.
+    색인 사본(_auth_snapshot)의 레코드는 색인 때마다 새 dict로 바뀌고 고쳐 쓰지 않으므로
+    얕은 복사만으로 이후 변경과 분리되고, 레코드를 하나씩 복사하지 않아 잠금을 짧게 잡습니다."""
+    with _index_lock:
+        return dict(_auth_snapshot)
+
+
+def auth_db_snapshot() -> tuple[dict[str, dict], str]:
+    """마지막으로 색인된 시점의 인증키 사본과 그 시점의 ETag("auth")를 함께 돌려줍니다.
+    색인과 버전 증가가 같은 _index_lock 안에서 일어나므로 인증키 잠금 없이도 본문과 ETag가 어긋나지 않고,
+    /list 폴링이 진행 중인 /app/check와 서로 기다리지 않습니다."""
+    with _index_lock:
+        return dict(_auth_snapshot), data_etag("auth")
+
+
+def _iter_auth_db_json(snapshot: dict[str, dict]) -> Iterator[str]:
+    """사본을 {"code": record, ...} 형식으로 나눠서 만듭니다. DB 크기만큼 문자열을 쌓지 않습니다."""
+    yield "{"
+    items = list(snapshot.items())
+    for start in range(0, len(items), STREAM_CHUNK_RECORDS):
+        parts = [f"{_json_text(code)}:{_json_text(record)}" for code, record in items[start:start + STREAM_CHUNK_RECORDS]]
+        yield ("" if start == 0 else ",") + ",".join(parts)
+    yield "}"
+
+
+def stream_auth_db_json(snapshot: Optional[dict[str, dict]] = None) -> Iterator[str]:
+    if snapshot is None:
+        snapshot, _ = auth_db_snapshot()
+    return _iter_auth_db_json(snapshot)
+
+
+def stream_export_json() -> Iterator[str]:
+    """PC JSON 백업(exportedAt, auth_db, categories, apple_admins, approval_requests)을 나눠서 만듭니다.
+    모든 저장소를 한 번에 잠근 시점의 사본에서 만들므로 내보낸 파일은 그 시점 그대로입니다."""
+    with _all_auth_locks(), _category_lock, _apple_admin_lock, _approval_lock:
+        auth_snapshot = _auth_db_snapshot_locked()
+        category_snapshot = list(categories)
+        apple_admin_snapshot = {user_id: dict(data) for user_id, data in apple_admins.items()}
+        approval_snapshot = {request_id: dict(data) for request_id, data in approval_requests.items()}
+    exported_at = now_kst().isoformat(timespec="seconds")
+
+    yield '{"exportedAt":' + _json_text(exported_at) + ',"auth_db":'
+    yield from _iter_auth_db_json(auth_snapshot)
+    yield ',"categories":' + _json_text(category_snapshot)
+    yield ',"apple_admins":' + _json_text(apple_admin_snapshot)
+    yield ',"approval_requests":' + _json_text(approval_snapshot) + "}"
+
+
+def _json_stream_response(chunks: Iterator[str], response: Optional[Response] = None, headers: Optional[dict] = None) -> StreamingResponse:
+    merged = dict(headers or {})
+    if response is not None:
+        # _conditional이 넣은 ETag 등을 그대로 옮깁니다.
+        for name in ("etag", "cache-control"):
+            if name in response.headers:
+                merged[name] = response.headers[name]
+    return StreamingResponse(chunks, media_type="application/json", headers=merged)
+
+
+def _auth_db_json_response(request: Request, response: Response) -> Response:
+    """/list 형식 응답. 압축을 받는 클라이언트에는 버전별로 보관한 압축본을, 아니면 스트리밍 본문을 보냅니다."""
+    # 본문과 ETag를 같은 시점에 잡습니다. _conditional 뒤에 바뀐 내용이면 ETag도 새 버전으로 보냅니다.
+    snapshot, etag = auth_db_snapshot()
+    response.headers["etag"] = etag
+    encoding = accepted_encoding(request)
+    if encoding is None:
+        streamed = _json_stream_response(stream_auth_db_json(snapshot), response)
+        streamed.headers["Vary"] = "Accept-Encoding"
+        return streamed
+    body = cached_compressed("auth_db", etag, encoding, lambda: stream_auth_db_json(snapshot))
+    headers = {name: response.headers[name] for name in ("etag", "cache-control") if name in response.headers}
+    return compressed_response(body, encoding, "application/json", headers)
+
+
+def register_full(req: FullRegisterRequest):
+    """등록 -> 승인 -> 비밀번호 -> 카테고리 순서로 한 번에 등록합니다."""
+    validate_phone(req.phoneLast4)
+    register(RegisterRequest(name=req.name, phoneLast4=req.phoneLast4, code=req.code))
+    approve(CodeRequest(code=req.code))
+    set_delete_pwd(PasswordRequest(password=req.deletePassword, code=req.code))
+    set_category_for_code(req.code, req.category)
+
+
+LIST_STATUSES = ("all", "live", "active", "inactive", "deleted")
+LIST_MAX_LIMIT = 1000
+
+
+def _encode_list_cursor(position: tuple[str, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(position), ensure_ascii=False).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_list_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date, code = json.loads(raw.decode("utf-8"))
+        return str(date), str(code)
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail="invalid_cursor") from exc
+
+
+def list_page(
+    category: Optional[str] = None,
+    status: str = "all",
+    q: str = "",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> dict:
+    """날짜 인덱스를 최신순으로 읽어 조건에 맞는 인증키 한 페이지와 합계를 돌려줍니다.
+    limit이 없으면 조건에 맞는 전체를 돌려주며, cursor는 이전 페이지의 nextCursor입니다.
+    """
+    status = (status or "all").strip().lower()
+    if status not in LIST_STATUSES:
+        raise HTTPException(status_code=400, detail="invalid_status")
+    if limit is not None:
+        limit = max(1, min(int(limit), LIST_MAX_LIMIT))
+    q = (q or "").strip().lower()
+    category = (category or "").strip()
+    if category == "전체":
+        category = ""
+
+    position = _decode_list_cursor(cursor) if cursor else None
+    items = []
+    next_cursor = None
+    with _index_lock:
+        # 상태/카테고리별로 미리 정렬해 둔 목록을 복사하지 않고 커서 위치만 이분 탐색합니다.
+        order = _date_orders.get((category, status), ())
+        end = bisect.bisect_left(order, position) if position else len(order)
+        category_counts = {name: len(bucket) for name, bucket in _category_index.items()}
+        total_all = len(_auth_index_keys)
+        if not q:
+            total = len(order)
+            start = 0 if limit is None else max(0, end - limit)
+            # 레코드만 집어 두고 목록 항목은 잠금 밖에서 만듭니다.
+            picked = [(code, _auth_snapshot[code]) for _, code in reversed(order[start:end])]
+            if start > 0:
+                next_cursor = _encode_list_cursor(order[start])
+        else:
+            # 검색어가 있을 때만 합계를 위해 해당 목록을 끝까지 셉니다. 저장을 막지 않도록 잠금 밖에서 셉니다.
+            order = order[:]
+    if not q:
+        items = [_list_item(code, record) for code, record in picked]
+    else:
+        total = 0
+        last = None
+        for index in range(len(order) - 1, -1, -1):
+            code = order[index][1]
+            record = _auth_snapshot.get(code)
+            if record is None or not any(q in str(v or "").lower() for v in (code, record.get("name"), record.get("phone"))):
+                continue
+            total += 1
+            if index >= end:
+                continue
+            if limit is None or len(items) < limit:
+                items.append(_list_item(code, record))
+                last = order[index]
+            elif next_cursor is None:
+                next_cursor = _encode_list_cursor(last)
+    return {
+        "items": items,
+        "nextCursor": next_cursor,
+        "total": total,
+        "totalAll": total_all,
+        "categoryCounts": category_counts,
+    }
 
 
-purge_trash()
+run_trash_purge()
+if TRASH_PURGE_INTERVAL_SECONDS > 0:
+    threading.Thread(target=_trash_purge_loop, name="trash-purge", daemon=True).start()
+start_push_credentials()
+build_push_target_index()
 
 
 # ============================================================
 #   관리자 API (기존 경로/형식 유지)
 # ============================================================
 @app.post("/register")
-def register(req: RegisterRequest):
-    global last_admin_code
+def register(req: RegisterRequest, idempotency_key: IdempotencyKey = None):
     code = req.code.strip()
     validate_phone(req.phoneLast4)
     if not code:
         raise HTTPException(status_code=400, detail="code_required")
-    last_admin_code = code
+    remember_last_code("admin", code)
+    return idempotent("register", idempotency_key, req.model_dump(), lambda: _register_code(code, req))
 
-    with _db_lock:
+
+def _register_code(code: str, req: RegisterRequest) -> dict:
+    with _auth_key_lock(code):
         if code not in auth_db:
             auth_db[code] = {
                 "date": now_kst().strftime("%Y-%m-%d %H:%M"),
@@ -1466,19 +4403,22 @@ def register(req: RegisterRequest):
                 "category": "미지정",
                 "enabled": True,
             }
-            save_data()
+            save_data(code)
 
         _normalize_record(auth_db[code])
         return {"code": code, "status": auth_db[code]["status"]}
 
 
 @app.post("/approve")
-def approve(req: CodeRequest):
-    global last_admin_code
+def approve(req: CodeRequest, idempotency_key: IdempotencyKey = None):
     code = req.code.strip()
-    last_admin_code = code
+    remember_last_code("admin", code)
+    # 재시도마다 토큰이 새로 바뀌지 않도록 처음 발급한 토큰을 돌려줍니다.
+    return idempotent("approve", idempotency_key, code, lambda: _approve_code(code))
 
-    with _db_lock:
+
+def _approve_code(code: str) -> dict:
+    with _code_lock(code):
         if code not in auth_db:
             return {"error": "code_not_found"}
 
@@ -1486,15 +4426,17 @@ def approve(req: CodeRequest):
         auth_db[code]["status"] = "approved"
         auth_db[code]["token"] = token
         auth_db[code]["enabled"] = True
-        save_data()
+        save_data(code)
         return {"status": "approved", "token": token}
 
 
 @app.get("/list")
-def list_codes():
-    # 기존 반환 형식(dict[code] = payload)을 그대로 유지합니다.
-    with _db_lock:
-        return auth_db
+def list_codes(request: Request, response: Response):
+    not_modified = _conditional(request, response, "auth")
+    if not_modified:
+        return not_modified
+    # 기존 반환 형식(dict[code] = payload)을 그대로 유지하면서 나눠서 보냅니다.
+    return _auth_db_json_response(request, response)
 
 
 @app.post("/delete")
@@ -1502,7 +4444,7 @@ def delete(req: CodeRequest):
     code = req.code
 
     if code.lower() == "all":
-        with _db_lock:
+        with _all_auth_locks():
             auth_db.clear()
             save_data()
         # 기존 클라이언트 호환을 위해 응답 status 문자열은 유지합니다.
@@ -1515,70 +4457,105 @@ def delete(req: CodeRequest):
 
 @app.post("/delete_by_user")
 def delete_by_user(req: UserDeleteRequest):
-    with _db_lock:
-        for code, data in auth_db.items():
-            if data.get("name") == req.name and data.get("phone") == req.phoneLast4:
-                move_to_trash(code)
-                return {"status": "moved_to_trash"}
+    with _auth_lock:
+        for code in _codes_by_name_phone(req.name, req.phoneLast4):
+            move_to_trash(code)
+            return {"status": "moved_to_trash"}
     return {"status": "not_found"}
 
 
 @app.post("/set_delete_pwd")
 def set_delete_pwd(req: PasswordRequest):
-    global last_admin_code
-
     # 새 관리자 앱은 code를 함께 보내므로 동시 요청에서도 정확한 인증키에 비밀번호가 붙습니다.
     # 기존 앱이 password만 보내는 경우에는 기존 last_admin_code 방식으로 그대로 동작합니다.
     target_code = (req.code or last_admin_code or "").strip()
     if not target_code:
         return {"error": "no_last_code"}
 
-    with _db_lock:
+    with _code_lock(target_code):
         if target_code not in auth_db:
             return {"error": "code_not_found"}
         auth_db[target_code]["delete_password"] = req.password
-        last_admin_code = target_code
-        save_data()
+        remember_last_code("admin", target_code)
+        save_data(target_code)
         return {"status": "ok"}
 
 
 # ============================================================
 #   앱 인증 API (기존 로직 유지 + 명시적 비활성 상태 추가)
 # ============================================================
-@app.post("/app/check")
-def app_check(req: CodeRequest):
-    global last_app_code
-    code = req.code
+# 한 번의 /app/check-batch 요청에서 확인할 수 있는 최대 인증키 수입니다.
+CHECK_BATCH_MAX = 1000
 
-    with _db_lock:
-        if code not in auth_db:
-            return {"status": "invalid"}
 
-        data = auth_db[code]
-        _normalize_record(data)
+def _check_code_locked(code: str) -> tuple[dict, bool]:
+    """인증키 하나를 확인합니다. 호출한 쪽에서 인증키 잠금을 잡고, 소진(비활성화)됐으면 저장합니다."""
+    if code not in auth_db:
+        return {"status": "invalid"}, False
 
-        if data.get("deletedAt"):
-            return {"status": "deleted"}
+    data = auth_db[code]
+    _normalize_record(data)
 
-        if not data.get("enabled", True):
-            return {"status": "inactive"}
+    if data.get("deletedAt"):
+        return {"status": "deleted"}, False
+
+    if not data.get("enabled", True):
+        return {"status": "inactive"}, False
+
+    if data.get("status") == "approved" and data.get("token"):
+        remember_last_code("app", code)
+        result = {"status": "approved", "token": data["token"]}
+
+        # 일반 인증키만 인증 성공 즉시 비활성화합니다.
+        # 기존 예외 규칙은 그대로 유지합니다:
+        # - ALWAYS_ACTIVE_KEYS에 등록된 인증키
+        # - #으로 시작하는 인증키
+        # 위 예외 인증키는 인증 후에도 활성 상태를 유지합니다.
+        if code not in ALWAYS_ACTIVE_KEYS and not code.startswith("#"):
+            data["enabled"] = False
+            return result, True
+
+        return result, False
+
+    return {"status": data.get("status", "pending")}, False
 
-        if data.get("status") == "approved" and data.get("token"):
-            last_app_code = code
-            result = {"status": "approved", "token": data["token"]}
-
-            # 일반 인증키만 인증 성공 즉시 비활성화합니다.
-            # 기존 예외 규칙은 그대로 유지합니다:
-            # - ALWAYS_ACTIVE_KEYS에 등록된 인증키
-            # - #으로 시작하는 인증키
-            # 위 예외 인증키는 인증 후에도 활성 상태를 유지합니다.
-            if code not in ALWAYS_ACTIVE_KEYS and not code.startswith("#"):
-                data["enabled"] = False
-                save_data()
 
-            return result
+@app.post("/app/check")
+def app_check(req: CodeRequest, request: Request):
+    rate_limit(request, "app_check")
+    code = req.code
 
-        return {"status": data.get("status", "pending")}
+    with _code_lock(code):
+        result, consumed = _check_code_locked(code)
+        if consumed:
+            save_data(code)
+            publish_event("key.consumed", code=code)
+        return result
+
+
+@app.post("/app/check-batch")
+def app_check_batch(req: CodesRequest, request: Request):
+    """/app/check를 여러 인증키에 순서대로 적용합니다. 같은 인증키가 두 번 오면 두 번째는 inactive입니다."""
+    if len(req.codes) > CHECK_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"too_many_codes: max {CHECK_BATCH_MAX}")
+    # 인증키 하나를 /app/check 한 번으로 칩니다.
+    rate_limit(request, "app_check", cost=max(1, len(req.codes)))
+
+    results = []
+    consumed = []
+    with _code_locks(*req.codes):
+        for code in req.codes:
+            result, used = _check_code_locked(code)
+            if used:
+                consumed.append(code)
+            results.append({"code": code, **result})
+        if consumed:
+            save_data(*consumed)
+    if len(consumed) == 1:
+        publish_event("key.consumed", code=consumed[0])
+    elif consumed:
+        publish_event("key.bulk", count=len(consumed))
+    return {"results": results}
 
 
 @app.get("/app/delete_password")
@@ -1586,9 +4563,10 @@ def app_delete_password(code: Optional[str] = None):
     # 기존 호출은 파라미터 없이 그대로 사용 가능.
     # 새 호출은 code를 지정하면 전역 last_app_code 경쟁 없이 안전하게 조회 가능.
     target = code or last_app_code
-    with _db_lock:
-        if target and target in auth_db:
-            return {"password": auth_db[target].get("delete_password")}
+    if target:
+        with _code_lock(target):
+            if target in auth_db:
+                return {"password": auth_db[target].get("delete_password")}
     return {"password": None}
 
 
@@ -1598,7 +4576,7 @@ def app_delete_password(code: Optional[str] = None):
 @app.post("/apple-admin/login")
 def apple_admin_login(req: AppleIdentityRequest):
     user_id = verify_apple_identity_token(req.identityToken, req.nonce)
-    with _db_lock:
+    with _apple_admin_lock:
         if user_id not in apple_admins:
             return {"registered": False}
         profile = apple_admin_profile(user_id)
@@ -1612,7 +4590,7 @@ def apple_admin_register(req: AppleAdminRegisterRequest):
     if not label:
         raise HTTPException(status_code=400, detail="label_required")
     validate_and_consume_kyh_code(req.code)
-    with _db_lock:
+    with _apple_admin_lock:
         if user_id not in apple_admins:
             apple_admins[user_id] = {
                 "provider": "apple",
@@ -1622,7 +4600,7 @@ def apple_admin_register(req: AppleAdminRegisterRequest):
             }
         else:
             apple_admins[user_id]["label"] = label
-        save_apple_admins()
+        save_apple_admins(user_id)
         profile = apple_admin_profile(user_id)
     return {"status": "ok", "sessionToken": issue_apple_session(user_id), "profile": profile}
 
@@ -1651,7 +4629,7 @@ def apple_admin_add_upload_category(req: CategoryRequest, request: Request):
         raise HTTPException(status_code=403, detail="category_add_not_allowed")
     name = clean_category(req.name)
     if name != "미지정":
-        with _db_lock:
+        with _category_lock:
             if name not in categories:
                 categories.append(name)
                 save_categories()
@@ -1659,12 +4637,21 @@ def apple_admin_add_upload_category(req: CategoryRequest, request: Request):
 
 
 @app.post("/apple-admin/upload")
-def apple_admin_upload(req: AppleAdminUploadRequest, request: Request):
+def apple_admin_upload(req: AppleAdminUploadRequest, request: Request, idempotency_key: IdempotencyKey = None):
     user_id, profile = require_apple_session(request)
     validate_phone(req.phoneLast4)
     category = validate_upload_category(profile, req.category)
     password = _effective_delete_password(req.deletePassword)
+    # 재시도로 승인 요청과 관리자 푸시가 두 번 만들어지지 않게 합니다.
+    return idempotent(
+        "apple-upload",
+        idempotency_key,
+        {"user": user_id, **req.model_dump()},
+        lambda: _apple_admin_upload(req, user_id, profile, category, password),
+    )
+
 
+def _apple_admin_upload(req: AppleAdminUploadRequest, user_id: str, profile: dict, category: str, password: str) -> dict:
     # 전체 권한은 기존과 동일하게 즉시 등록합니다.
     if profile.get("allowedCategory") == "전체":
         register(RegisterRequest(name=req.name, phoneLast4=req.phoneLast4, code=req.code))
@@ -1692,7 +4679,7 @@ def apple_admin_push_token(req: ApplePushTokenRequest, request: Request):
         environment = "production"
     if not token or any(ch not in "0123456789abcdef" for ch in token):
         raise HTTPException(status_code=400, detail="invalid_device_token")
-    with _db_lock:
+    with _apple_admin_lock:
         record = apple_admins.get(user_id)
         if not record:
             raise HTTPException(status_code=401, detail="apple_admin_not_registered")
@@ -1703,23 +4690,25 @@ def apple_admin_push_token(req: ApplePushTokenRequest, request: Request):
             "environment": environment,
             "updatedAt": now_kst().isoformat(timespec="seconds"),
         })
-        save_apple_admins()
+        save_apple_admins(user_id)
     masked = f"{token[:6]}...{token[-6:]}" if len(token) >= 12 else "***"
     print(f"[APNS] device token registered user={user_id[:10]}... env={environment} token={masked}", flush=True)
     return {"status": "ok"}
 
 
 @app.get("/apple-admin/approval-requests")
-def apple_admin_approval_requests(request: Request):
+def apple_admin_approval_requests(request: Request, response: Response):
     require_full_apple_admin(request)
+    not_modified = _conditional(request, response, "approvals")
+    if not_modified:
+        return not_modified
     return {"items": _approval_items_sorted()}
 
 
 @app.post("/apple-admin/approval-requests/approve")
-def apple_admin_approval_approve(req: ApprovalActionRequest, request: Request):
+def apple_admin_approval_approve(req: ApprovalActionRequest, request: Request, idempotency_key: IdempotencyKey = None):
     require_full_apple_admin(request)
-    item = approve_pending_request(req.requestId)
-    return {"status": "ok", "code": item.get("code", "")}
+    return idempotent("approval-approve", idempotency_key, req.requestId, lambda: _approve_pending(req.requestId))
 
 
 @app.post("/apple-admin/approval-requests/delete")
@@ -1740,7 +4729,7 @@ def apple_admin_manage_access(req: AppleAdminManageAccessRequest, request: Reque
 def apple_admin_list(request: Request):
     user_id, _ = require_apple_session(request)
     require_manage_token(request, user_id)
-    with _db_lock:
+    with _apple_admin_lock:
         items = [apple_admin_profile(uid) for uid in apple_admins.keys()]
     items.sort(key=lambda x: x.get("registeredAt") or "", reverse=True)
     return {"items": items}
@@ -1760,12 +4749,12 @@ def apple_admin_update(req: AppleAdminUpdateRequest, request: Request):
             allowed = None
     if allowed not in (None, "전체", "미지정") and allowed not in categories:
         raise HTTPException(status_code=400, detail="category_not_found")
-    with _db_lock:
+    with _apple_admin_lock:
         if req.userId not in apple_admins:
             raise HTTPException(status_code=404, detail="apple_admin_not_found")
         apple_admins[req.userId]["label"] = label
         apple_admins[req.userId]["allowedCategory"] = allowed
-        save_apple_admins()
+        save_apple_admins(req.userId)
         profile = apple_admin_profile(req.userId)
     return {"status": "ok", "profile": profile}
 
@@ -1774,11 +4763,11 @@ def apple_admin_update(req: AppleAdminUpdateRequest, request: Request):
 def apple_admin_delete(req: AppleAdminDeleteRequest, request: Request):
     user_id, _ = require_apple_session(request)
     require_manage_token(request, user_id)
-    with _db_lock:
+    with _apple_admin_lock:
         if req.userId not in apple_admins:
             raise HTTPException(status_code=404, detail="apple_admin_not_found")
         del apple_admins[req.userId]
-        save_apple_admins()
+        save_apple_admins(req.userId)
     return {"status": "ok", "deletedSelf": req.userId == user_id}
 
 
@@ -1787,7 +4776,8 @@ def apple_admin_delete(req: AppleAdminDeleteRequest, request: Request):
 #   기존 Apple API와 분리되어 iPhone 동작은 그대로 유지됩니다.
 # ============================================================
 @app.post("/android-admin/login")
-def android_admin_login(req: CodeRequest):
+def android_admin_login(req: CodeRequest, request: Request):
+    rate_limit(request, "login")
     code = (req.code or "").strip()
     profile = android_admin_profile_for_code(code, require_enabled=True)
     session_token = issue_android_session(code)
@@ -1796,9 +4786,9 @@ def android_admin_login(req: CodeRequest):
     # 일반 인증키는 Android 로그인 성공 즉시 비활성화하고,
     # ALWAYS_ACTIVE_KEYS 및 #으로 시작하는 인증키는 기존처럼 활성 상태를 유지합니다.
     if not _registration_code_uses_existing_exception_rule(code):
-        with _db_lock:
+        with _code_lock(code):
             auth_db[code]["enabled"] = False
-            save_data()
+            save_data(code)
 
     return {"status": "ok", "sessionToken": session_token, "profile": profile}
 
@@ -1829,7 +4819,7 @@ def android_admin_add_upload_category(req: CategoryRequest, request: Request):
         raise HTTPException(status_code=403, detail="category_add_not_allowed")
     name = clean_category(req.name)
     if name != "미지정":
-        with _db_lock:
+        with _category_lock:
             if name not in categories:
                 categories.append(name)
                 save_categories()
@@ -1837,12 +4827,21 @@ def android_admin_add_upload_category(req: CategoryRequest, request: Request):
 
 
 @app.post("/android-admin/upload")
-def android_admin_upload(req: AppleAdminUploadRequest, request: Request):
+def android_admin_upload(req: AppleAdminUploadRequest, request: Request, idempotency_key: IdempotencyKey = None):
     source_code, profile = require_android_session(request)
     validate_phone(req.phoneLast4)
     category = validate_upload_category(profile, req.category)
     password = _effective_delete_password(req.deletePassword)
+    # 재시도로 승인 요청과 관리자 푸시가 두 번 만들어지지 않게 합니다.
+    return idempotent(
+        "android-upload",
+        idempotency_key,
+        {"user": source_code, **req.model_dump()},
+        lambda: _android_admin_upload(req, source_code, profile, category, password),
+    )
+
 
+def _android_admin_upload(req: AppleAdminUploadRequest, source_code: str, profile: dict, category: str, password: str) -> dict:
     # 전체 권한은 기존 로직 그대로 즉시 서버 등록합니다.
     if profile.get("allowedCategory") == "전체":
         register(RegisterRequest(name=req.name, phoneLast4=req.phoneLast4, code=req.code))
@@ -1872,7 +4871,7 @@ def android_admin_manage_access(req: AppleAdminManageAccessRequest, request: Req
 def android_apple_admin_list(request: Request):
     source_code, _ = require_android_session(request)
     require_android_manage_token(request, source_code)
-    with _db_lock:
+    with _apple_admin_lock:
         items = [apple_admin_profile(uid) for uid in apple_admins.keys()]
     items.sort(key=lambda x: x.get("registeredAt") or "", reverse=True)
     return {"items": items}
@@ -1890,12 +4889,12 @@ def android_apple_admin_update(req: AppleAdminUpdateRequest, request: Request):
         allowed = str(allowed).strip() or None
     if allowed not in (None, "전체", "미지정") and allowed not in categories:
         raise HTTPException(status_code=400, detail="category_not_found")
-    with _db_lock:
+    with _apple_admin_lock:
         if req.userId not in apple_admins:
             raise HTTPException(status_code=404, detail="apple_admin_not_found")
         apple_admins[req.userId]["label"] = label
         apple_admins[req.userId]["allowedCategory"] = allowed
-        save_apple_admins()
+        save_apple_admins(req.userId)
         profile = apple_admin_profile(req.userId)
     return {"status": "ok", "profile": profile}
 
@@ -1904,11 +4903,11 @@ def android_apple_admin_update(req: AppleAdminUpdateRequest, request: Request):
 def android_apple_admin_delete(req: AppleAdminDeleteRequest, request: Request):
     source_code, _ = require_android_session(request)
     require_android_manage_token(request, source_code)
-    with _db_lock:
+    with _apple_admin_lock:
         if req.userId not in apple_admins:
             raise HTTPException(status_code=404, detail="apple_admin_not_found")
         del apple_admins[req.userId]
-        save_apple_admins()
+        save_apple_admins(req.userId)
     return {"status": "ok"}
 
 
@@ -1921,19 +4920,22 @@ def require_manager(admin: str):
 
 
 @app.post("/manage/access-check")
-def manage_access_check(req: CodeRequest):
+def manage_access_check(req: CodeRequest, request: Request):
+    rate_limit(request, "login")
     if not manager_list_access_allowed(req.code):
         raise HTTPException(status_code=401, detail="access_denied")
     return {"status": "ok"}
 
 
 @app.get("/manage/list-secure")
-def manage_list_secure(access: str):
+def manage_list_secure(access: str, request: Request, response: Response):
     if not manager_list_access_allowed(access):
         raise HTTPException(status_code=401, detail="access_denied")
+    not_modified = _conditional(request, response, "auth")
+    if not_modified:
+        return not_modified
     # 기존 /list와 같은 dict[code] = payload 형식을 유지합니다.
-    with _db_lock:
-        return {code: dict(data) for code, data in auth_db.items()}
+    return _auth_db_json_response(request, response)
 
 
 @app.get("/manage/categories")
@@ -1948,7 +4950,7 @@ def manage_add_category(req: CategoryRequest, admin: str):
     name = clean_category(req.name)
     if name == "미지정":
         return {"status": "ok", "category": "미지정"}
-    with _db_lock:
+    with _category_lock:
         if name not in categories:
             categories.append(name)
             save_categories()
@@ -1991,15 +4993,30 @@ def manage_delete(req: CodeRequest, admin: str):
     raise HTTPException(status_code=404, detail="code_not_found")
 
 
+@app.post("/manage/bulk")
+def manage_bulk(req: BulkRequest, admin: str):
+    require_manager(admin)
+    return apply_bulk(req)
+
+
+@app.post("/manage/import-keys")
+async def manage_import_keys(request: Request, admin: str):
+    """CSV/XLSX 본문을 그대로 보냅니다. 파일 이름은 X-Import-Filename 헤더로 받습니다."""
+    require_manager(admin)
+    spool = await spool_upload(request)
+    try:
+        return await run_blocking(
+            import_keys_file, spool, import_filename(request), request.headers.get("Content-Type", "")
+        )
+    finally:
+        spool.close()
+
+
 @app.post("/manage/full_register")
 def manage_full_register(req: FullRegisterRequest, admin: str):
     """웹 관리자용. 내부 처리 순서는 기존과 동일: 등록 -> 승인 -> 비밀번호 -> 카테고리."""
     require_manager(admin)
-    validate_phone(req.phoneLast4)
-    register(RegisterRequest(name=req.name, phoneLast4=req.phoneLast4, code=req.code))
-    approve(CodeRequest(code=req.code))
-    set_delete_pwd(PasswordRequest(password=req.deletePassword, code=req.code))
-    set_category_for_code(req.code, req.category)
+    register_full(req)
     return {"status": "ok", "code": req.code}
 
 
@@ -2009,8 +5026,8 @@ def manage_import_backup(req: BackupImportRequest, admin: str):
     기본은 병합이며 replace=true일 때만 기존 DB를 비웁니다.
     """
     require_manager(admin)
-    imported = 0
-    with _db_lock:
+    imported = []
+    with _all_auth_locks(), _category_lock:
         if req.replace:
             auth_db.clear()
 
@@ -2023,12 +5040,15 @@ def manage_import_backup(req: BackupImportRequest, admin: str):
             category = clean_category(record.get("category"))
             if category != "미지정" and category not in categories:
                 categories.append(category)
-            imported += 1
+            imported.append(code)
 
         save_categories()
-        save_data()
+        if req.replace:
+            save_data()
+        else:
+            save_data(*imported)
 
-    return {"status": "ok", "imported": imported, "total": len(auth_db)}
+    return {"status": "ok", "imported": len(imported), "total": len(auth_db)}
 
 
 # ============================================================
@@ -2044,7 +5064,7 @@ def export_excel(admin: str):
     ws.title = "PocketBlackbox"
     ws.append(["날짜", "성함", "전화번호", "인증키", "비밀번호", "카테고리", "활성상태"])
 
-    with _db_lock:
+    with _auth_lock:
         for code, d in auth_db.items():
             if d.get("deletedAt"):
                 continue
@@ -2074,8 +5094,8 @@ def export_excel(admin: str):
 def trash(admin: str):
     if admin != ADMIN_PASSWORD:
         return {"error": "unauthorized"}
-    with _db_lock:
-        return {c: d for c, d in auth_db.items() if d.get("deletedAt")}
+    with _auth_lock:
+        return {c: auth_db[c] for c in _deleted_codes() if c in auth_db}
 
 
 @app.get("/restore")
@@ -2099,7 +5119,7 @@ def restore(code: str, admin: str):
 #   기존 관리자 페이지 (/tokens) 유지
 # ============================================================
 @app.get("/tokens", response_class=HTMLResponse)
-def admin_page(admin: str = None):
+def admin_page(request: Request, admin: str = None):
     if admin != ADMIN_PASSWORD:
         return """
         <html><meta charset="UTF-8">
@@ -2112,6 +5132,15 @@ def admin_page(admin: str = None):
         </body></html>
         """
 
+    encoding = accepted_encoding(request)
+    if encoding is None:
+        return HTMLResponse(_tokens_page_html(), headers={"Vary": "Accept-Encoding"})
+    # 데이터가 그대로면 이전에 압축한 페이지를 그대로 보냅니다.
+    body = cached_compressed("tokens", data_etag("auth"), encoding, lambda: [_tokens_page_html()])
+    return compressed_response(body, encoding, "text/html; charset=utf-8")
+
+
+def _tokens_page_html() -> str:
     html = """
     <html><head><meta charset="UTF-8"><title>Pocket Blackbox Admin</title>
     <style>
@@ -2127,7 +5156,7 @@ def admin_page(admin: str = None):
     <th>날짜</th><th>성함</th><th>전화번호</th><th>인증키</th><th>비밀번호</th><th>카테고리</th><th>상태</th>
     </tr>
     """
-    with _db_lock:
+    with _auth_lock:
         for code, d in auth_db.items():
             if d.get("deletedAt"):
                 continue
@@ -2147,6 +5176,17 @@ def admin_page(admin: str = None):
 #   새 PC 웹 관리자 (/admin)
 #   로그인: 모바일/웹 공통 서버 검증 규칙 사용
 # ============================================================
+# 아래 핸들러는 async이므로 잠금/디스크/압축이 필요한 작업은 run_blocking으로
+# 전용 스레드 풀에서 실행합니다. 이벤트 루프를 막으면 같은 워커의 /app/check 등
+# 다른 요청이 모두 멈춥니다.
+_admin_executor = ThreadPoolExecutor(max_workers=ADMIN_WORKERS, thread_name_prefix="admin-api")
+
+
+async def run_blocking(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_admin_executor, functools.partial(func, *args, **kwargs))
+
+
 def web_logged_in(request: Request) -> bool:
     code = request.session.get("admin_code")
     return manager_list_access_allowed(code or "")
@@ -2157,10 +5197,56 @@ def require_web_login(request: Request):
         raise HTTPException(status_code=401, detail="login_required")
 
 
+async def require_web_login_async(request: Request):
+    # 인증키 잠금을 잡으므로 복원 중에도 이벤트 루프가 기다리지 않게 합니다.
+    await run_blocking(require_web_login, request)
+
+
+def _add_category(name: str):
+    with _category_lock:
+        if name not in categories:
+            categories.append(name)
+            save_categories()
+
+
+def _reorder_categories(ordered: list[str]) -> list[str]:
+    with _category_lock:
+        if len(ordered) != len(categories) or set(ordered) != set(categories):
+            raise HTTPException(status_code=400, detail="invalid_category_order")
+        categories[:] = ordered
+        save_categories()
+        return ["미지정"] + list(categories)
+
+
+def _apple_admin_items() -> list[dict]:
+    with _apple_admin_lock:
+        items = [apple_admin_profile(uid) for uid in apple_admins.keys()]
+    items.sort(key=lambda x: x.get("registeredAt") or "", reverse=True)
+    return items
+
+
+def _update_apple_admin(user_id: str, label: str, allowed: Optional[str]):
+    with _apple_admin_lock:
+        if user_id not in apple_admins:
+            raise HTTPException(status_code=404, detail="apple_admin_not_found")
+        apple_admins[user_id]["label"] = label
+        apple_admins[user_id]["allowedCategory"] = allowed
+        save_apple_admins(user_id)
+
+
+def _delete_apple_admin(user_id: str):
+    with _apple_admin_lock:
+        if user_id not in apple_admins:
+            raise HTTPException(status_code=404, detail="apple_admin_not_found")
+        del apple_admins[user_id]
+        save_apple_admins(user_id)
+
+
 @app.post("/admin/api/login")
 async def web_login(req: CodeRequest, request: Request):
+    rate_limit(request, "login")
     code = req.code.strip()
-    if not manager_list_access_allowed(code):
+    if not await run_blocking(manager_list_access_allowed, code):
         raise HTTPException(status_code=401, detail="login_failed")
     request.session["admin_code"] = code
     return {"status": "ok"}
@@ -2174,37 +5260,171 @@ async def web_logout(request: Request):
 
 @app.get("/admin/api/session")
 async def web_session(request: Request):
-    return {"loggedIn": web_logged_in(request)}
+    return {"loggedIn": await run_blocking(web_logged_in, request)}
 
 
 @app.get("/admin/api/list")
-async def web_list(request: Request):
-    require_web_login(request)
-    return {"items": sorted_items(include_deleted=True)}
+async def web_list(
+    request: Request,
+    response: Response,
+    category: Optional[str] = None,
+    status: str = "all",
+    q: str = "",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    await require_web_login_async(request)
+    not_modified = _conditional(request, response, "auth")
+    if not_modified:
+        return not_modified
+    # 변경분 동기화(/admin/api/changes)의 시작점이므로 목록을 읽기 전에 버전을 잡습니다.
+    etag = response.headers["etag"]
+    version = etag.strip('"')
+
+    def build_page() -> dict:
+        # 파라미터 없이 부르면 기존처럼 휴지통 포함 전체 목록을 최신순으로 돌려줍니다.
+        page = list_page(category=category, status=status, q=q, limit=limit, cursor=cursor)
+        page["version"] = version
+        return page
+
+    encoding = accepted_encoding(request)
+    if encoding is None:
+        response.headers["Vary"] = "Accept-Encoding"
+        return await run_blocking(build_page)
+    body = await run_blocking(
+        cached_compressed,
+        f"admin-list?{request.url.query}",
+        etag,
+        encoding,
+        lambda: [_json_text(build_page())],
+    )
+    return compressed_response(body, encoding, "application/json", {"ETag": etag, "Cache-Control": "no-cache"})
+
+
+@app.get("/admin/api/changes")
+async def web_changes(request: Request, since: str = ""):
+    """마지막으로 받은 version 이후 추가/수정/삭제된 인증키만 돌려줍니다.
+    resync가 true면 변경 로그로 이어 줄 수 없으므로 /admin/api/list로 전체를 다시 받아야 합니다.
+    """
+    await require_web_login_async(request)
+    boot_id, _, number = since.strip().rpartition("-")
+    try:
+        since_version = int(number)
+    except ValueError:
+        since_version = -1
+    if boot_id != _BOOT_ID:
+        since_version = -1
+    return await run_blocking(_changes_payload, since_version)
+
+
+def _changes_payload(since_version: int) -> dict:
+    version, codes = auth_changes_since(since_version)
+    token = f"{_BOOT_ID}-{version}"
+    if codes is None:
+        return {"version": token, "resync": True, "upserts": [], "removed": []}
+    upserts = []
+    removed = []
+    for code in codes:
+        record = _auth_snapshot.get(code)
+        if record is None:
+            removed.append(code)
+        else:
+            upserts.append(_list_item(code, record))
+    return {"version": token, "resync": False, "upserts": upserts, "removed": removed}
+
+
+@app.get("/admin/api/events")
+async def web_events(request: Request):
+    """승인 요청 생성/승인/삭제, 인증키 사용·활성 상태·카테고리 변경을 Server-Sent Events로 보냅니다."""
+    await require_web_login_async(request)
+    queue = _subscribe_events()
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            # 다중 프로세스 모드에서는 다른 워커의 이벤트가 스탬프로 오므로 조용할 때도 주기적으로 확인합니다.
+            timeout = EVENT_SHARED_POLL_SECONDS if MULTI_PROCESS else EVENT_KEEPALIVE_SECONDS
+            idle = 0.0
+            while not _shutdown_event.is_set():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    if _shutdown_event.is_set() or await request.is_disconnected():
+                        return
+                    if shared_state_changed():
+                        await run_in_threadpool(refresh_shared_state)
+                    idle += timeout
+                    if idle >= EVENT_KEEPALIVE_SECONDS:
+                        idle = 0.0
+                        yield ": keepalive\n\n"
+                    continue
+                idle = 0.0
+                if message is None:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                yield message
+        finally:
+            _unsubscribe_events(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/admin/api/trash-purge-stats")
+async def web_trash_purge_stats(request: Request):
+    await require_web_login_async(request)
+    return await run_blocking(trash_purge_stats)
+
+
+@app.get("/admin/api/rate-limit-stats")
+async def web_rate_limit_stats(request: Request):
+    await require_web_login_async(request)
+    return rate_limit_stats()
+
+
+@app.get("/admin/api/idempotency-stats")
+async def web_idempotency_stats(request: Request):
+    await require_web_login_async(request)
+    return idempotency_stats()
+
+
+@app.get("/admin/api/push-stats")
+async def web_push_stats(request: Request):
+    await require_web_login_async(request)
+    return push_dispatch_stats()
+
+
+@app.get("/admin/api/shared-state")
+async def web_shared_state(request: Request):
+    await require_web_login_async(request)
+    return shared_state_stats()
 
 
 @app.get("/admin/api/categories")
-async def web_categories(request: Request):
-    require_web_login(request)
+async def web_categories(request: Request, response: Response):
+    await require_web_login_async(request)
+    not_modified = _conditional(request, response, "categories")
+    if not_modified:
+        return not_modified
     return {"categories": ["미지정"] + categories}
 
 
 @app.post("/admin/api/categories")
 async def web_add_category(req: CategoryRequest, request: Request):
-    require_web_login(request)
+    await require_web_login_async(request)
     name = clean_category(req.name)
     if name != "미지정":
-        with _db_lock:
-            if name not in categories:
-                categories.append(name)
-                save_categories()
+        await run_blocking(_add_category, name)
     return {"status": "ok", "category": name}
 
 
 @app.post("/admin/api/categories/rename")
 async def web_rename_category(req: CategoryRenameRequest, request: Request):
-    require_web_login(request)
-    moved = rename_category_and_reassign(req.oldName, req.newName)
+    await require_web_login_async(request)
+    moved = await run_blocking(rename_category_and_reassign, req.oldName, req.newName)
     return {
         "status": "ok",
         "oldCategory": req.oldName.strip(),
@@ -2215,84 +5435,78 @@ async def web_rename_category(req: CategoryRenameRequest, request: Request):
 
 @app.post("/admin/api/categories/delete")
 async def web_delete_category(req: CategoryRequest, request: Request):
-    require_web_login(request)
-    moved = delete_category_and_reassign(req.name)
+    await require_web_login_async(request)
+    moved = await run_blocking(delete_category_and_reassign, req.name)
     return {"status": "ok", "deletedCategory": req.name.strip(), "movedToUnspecified": moved}
 
 
 @app.post("/admin/api/categories/reorder")
 async def web_reorder_categories(req: CategoryOrderRequest, request: Request):
-    require_web_login(request)
+    await require_web_login_async(request)
     ordered = [clean_category(name) for name in req.categories]
     ordered = [name for name in ordered if name != "미지정"]
-    if len(ordered) != len(categories) or set(ordered) != set(categories):
-        raise HTTPException(status_code=400, detail="invalid_category_order")
-    with _db_lock:
-        categories[:] = ordered
-        save_categories()
-    return {"status": "ok", "categories": ["미지정"] + list(categories)}
+    return {"status": "ok", "categories": await run_blocking(_reorder_categories, ordered)}
 
 
 @app.post("/admin/api/register")
 async def web_register(req: FullRegisterRequest, request: Request):
-    require_web_login(request)
-    validate_phone(req.phoneLast4)
+    await require_web_login_async(request)
     # 기존 순서 그대로
-    register(RegisterRequest(name=req.name, phoneLast4=req.phoneLast4, code=req.code))
-    approve(CodeRequest(code=req.code))
-    set_delete_pwd(PasswordRequest(password=req.deletePassword, code=req.code))
-    set_category_for_code(req.code, req.category)
+    await run_blocking(register_full, req)
     return {"status": "ok", "code": req.code}
 
 
 @app.post("/admin/api/category")
 async def web_category(req: CodeCategoryRequest, request: Request):
-    require_web_login(request)
-    data = set_category_for_code(req.code, req.category)
+    await require_web_login_async(request)
+    data = await run_blocking(set_category_for_code, req.code, req.category)
     return {"status": "ok", "category": data.get("category")}
 
 
 @app.post("/admin/api/activate")
 async def web_activate(req: CodeRequest, request: Request):
-    require_web_login(request)
-    activate_code(req.code)
+    await require_web_login_async(request)
+    await run_blocking(activate_code, req.code)
     return {"status": "active"}
 
 
 @app.post("/admin/api/deactivate")
 async def web_deactivate(req: CodeRequest, request: Request):
-    require_web_login(request)
-    deactivate_code(req.code)
+    await require_web_login_async(request)
+    await run_blocking(deactivate_code, req.code)
     return {"status": "inactive"}
 
 
 @app.post("/admin/api/update")
 async def web_update(req: UpdateAuthRequest, request: Request):
-    require_web_login(request)
-    new_code, _ = update_code(req)
+    await require_web_login_async(request)
+    new_code, _ = await run_blocking(update_code, req)
     return {"status": "ok", "code": new_code}
 
 
 @app.post("/admin/api/delete")
 async def web_delete(req: CodeRequest, request: Request):
-    require_web_login(request)
-    if not move_to_trash(req.code):
+    await require_web_login_async(request)
+    if not await run_blocking(move_to_trash, req.code):
         raise HTTPException(status_code=404, detail="code_not_found")
     return {"status": "moved_to_trash"}
 
 
+@app.post("/admin/api/bulk")
+async def web_bulk(req: BulkRequest, request: Request):
+    await require_web_login_async(request)
+    return await run_blocking(apply_bulk, req)
+
+
 @app.get("/admin/api/apple-admins")
 async def web_apple_admins(request: Request):
-    require_web_login(request)
-    with _db_lock:
-        items = [apple_admin_profile(uid) for uid in apple_admins.keys()]
-    items.sort(key=lambda x: x.get("registeredAt") or "", reverse=True)
-    return {"items": items}
+    await require_web_login_async(request)
+    return {"items": await run_blocking(_apple_admin_items)}
 
 
 @app.post("/admin/api/apple-admins/update")
 async def web_apple_admin_update(req: AppleAdminUpdateRequest, request: Request):
-    require_web_login(request)
+    await require_web_login_async(request)
     label = (req.label or "").strip()
     if not label:
         raise HTTPException(status_code=400, detail="label_required")
@@ -2301,67 +5515,56 @@ async def web_apple_admin_update(req: AppleAdminUpdateRequest, request: Request)
         allowed = str(allowed).strip() or None
     if allowed not in (None, "전체", "미지정") and allowed not in categories:
         raise HTTPException(status_code=400, detail="category_not_found")
-    with _db_lock:
-        if req.userId not in apple_admins:
-            raise HTTPException(status_code=404, detail="apple_admin_not_found")
-        apple_admins[req.userId]["label"] = label
-        apple_admins[req.userId]["allowedCategory"] = allowed
-        save_apple_admins()
+    await run_blocking(_update_apple_admin, req.userId, label, allowed)
     return {"status": "ok"}
 
 
 @app.post("/admin/api/apple-admins/delete")
 async def web_apple_admin_delete(req: AppleAdminDeleteRequest, request: Request):
-    require_web_login(request)
-    with _db_lock:
-        if req.userId not in apple_admins:
-            raise HTTPException(status_code=404, detail="apple_admin_not_found")
-        del apple_admins[req.userId]
-        save_apple_admins()
+    await require_web_login_async(request)
+    await run_blocking(_delete_apple_admin, req.userId)
     return {"status": "ok"}
 
 
 @app.get("/admin/api/approval-requests")
-async def web_approval_requests(request: Request):
-    require_web_login(request)
-    return {"items": _approval_items_sorted()}
+async def web_approval_requests(request: Request, response: Response):
+    await require_web_login_async(request)
+    not_modified = _conditional(request, response, "approvals")
+    if not_modified:
+        return not_modified
+    return {"items": await run_blocking(_approval_items_sorted)}
 
 
 @app.post("/admin/api/approval-requests/approve")
-async def web_approval_approve(req: ApprovalActionRequest, request: Request):
-    require_web_login(request)
-    item = approve_pending_request(req.requestId)
-    return {"status": "ok", "code": item.get("code", "")}
+async def web_approval_approve(req: ApprovalActionRequest, request: Request, idempotency_key: IdempotencyKey = None):
+    await require_web_login_async(request)
+    return await run_blocking(
+        idempotent, "approval-approve", idempotency_key, req.requestId, lambda: _approve_pending(req.requestId)
+    )
 
 
 @app.post("/admin/api/approval-requests/delete")
 async def web_approval_delete(req: ApprovalActionRequest, request: Request):
-    require_web_login(request)
-    item = delete_pending_request(req.requestId)
+    await require_web_login_async(request)
+    item = await run_blocking(delete_pending_request, req.requestId)
     return {"status": "ok", "code": item.get("code", "")}
 
 
 @app.get("/admin/api/export-json")
 async def web_export_json(request: Request):
     # 기존 직접 호출 호환을 위해 경로는 유지하지만 PC UI에서는 ZIP 백업을 사용합니다.
-    require_web_login(request)
-    payload = {
-        "exportedAt": now_kst().isoformat(timespec="seconds"),
-        "auth_db": auth_db,
-        "categories": categories,
-        "apple_admins": apple_admins,
-        "approval_requests": approval_requests,
-    }
-    return JSONResponse(
-        payload,
+    await require_web_login_async(request)
+    # 본문은 StreamingResponse가 스레드 풀에서 묶음 단위로 만듭니다.
+    return _json_stream_response(
+        stream_export_json(),
         headers={"Content-Disposition": "attachment; filename=PoketAuth_Backup.json"},
     )
 
 
 @app.get("/admin/api/backup-zip")
 async def web_backup_zip(request: Request):
-    require_web_login(request)
-    raw = build_full_backup_zip()
+    await require_web_login_async(request)
+    raw = await run_blocking(build_full_backup_zip)
     stamp = now_kst().strftime("%Y%m%d_%H%M%S")
     return StreamingResponse(
         io.BytesIO(raw),
@@ -2372,20 +5575,32 @@ async def web_backup_zip(request: Request):
 
 @app.post("/admin/api/restore-backup")
 async def web_restore_backup(request: Request):
-    require_web_login(request)
+    await require_web_login_async(request)
     raw = await request.body()
     filename = request.headers.get("X-Backup-Filename", "")
     content_type = request.headers.get("Content-Type", "")
-    records, category_count, backup_type = restore_backup_auto(raw, filename, content_type)
+    records, category_count, backup_type = await run_blocking(restore_backup_auto, raw, filename, content_type)
     return {"status": "ok", "records": records, "categories": category_count, "type": backup_type}
 
 
+@app.post("/admin/api/import-keys")
+async def web_import_keys(request: Request):
+    await require_web_login_async(request)
+    spool = await spool_upload(request)
+    try:
+        return await run_blocking(
+            import_keys_file, spool, import_filename(request), request.headers.get("Content-Type", "")
+        )
+    finally:
+        spool.close()
+
+
 # 이전 ZIP 전용 경로도 호환을 위해 유지합니다.
 @app.post("/admin/api/restore-zip")
 async def web_restore_zip(request: Request):
-    require_web_login(request)
+    await require_web_login_async(request)
     raw = await request.body()
-    records, category_count = restore_full_backup_zip(raw)
+    records, category_count = await run_blocking(restore_full_backup_zip, raw)
     return {"status": "ok", "records": records, "categories": category_count, "type": "zip"}
 
 
@@ -2405,41 +5620,48 @@ label{display:block;font-size:13px;color:#aaa;margin:10px 0 5px}h1,h2,h3{margin-
 <body><div class="wrap">
 <div id="loginCard" class="card"><h2>🔐 관리자 로그인</h2><div class="row"><input id="loginCode" class="grow" type="password" placeholder="인증키"><button class="primary" onclick="login()">로그인</button></div><p id="loginMsg" class="deleted"></p></div>
 <div id="app" class="hidden">
-<div class="row" style="justify-content:space-between;align-items:center"><h1>코드노트 인증키</h1><div class="row"><button onclick="openBackupModal()">백업 / 복원</button><input id="restoreBackup" type="file" class="hidden" onchange="restoreBackupFile(this)"><button onclick="logout()">로그아웃</button></div></div>
+<div class="row" style="justify-content:space-between;align-items:center"><h1>코드노트 인증키</h1><div class="row"><button onclick="openBackupModal()">백업 / 복원</button><input id="restoreBackup" type="file" class="hidden" onchange="restoreBackupFile(this)"><input id="importKeys" type="file" accept=".csv,.xlsx" class="hidden" onchange="importKeysFile(this)"><button onclick="logout()">로그아웃</button></div></div>
 <div class="card"><h2>인증키 등록</h2><div class="row"><input id="rName" class="grow" placeholder="성함"><input id="rPhone" class="grow" inputmode="numeric" maxlength="4" placeholder="전화번호 끝 4자리"></div><div class="row" style="margin-top:10px"><select id="rCategory" class="grow"></select><button onclick="addCategory()">+ 카테고리 추가</button></div><div class="row" style="margin-top:10px"><input id="rCode" class="grow" placeholder="인증키"><input id="rPwd" class="grow" placeholder="삭제 비밀번호"></div><div class="row" style="margin-top:10px"><button class="primary" onclick="registerCode()">서버 업로드</button><button onclick="clearRegister()">입력값 지우기</button></div></div>
-<div class="card"><div class="row" style="justify-content:space-between;align-items:center"><h2>인증키 목록</h2><div class="row"><button onclick="refresh()">새로고침</button><button onclick="addCategory()">카테고리 추가</button><button onclick="openCategoryManager()">카테고리 위치조정</button><button onclick="openApprovalManager()">승인목록</button><button onclick="openAppleAdminManager()">인증 등록 내역</button></div></div><div id="tabs" class="tabs"></div><input id="search" style="width:100%;margin:8px 0 12px" placeholder="🔍 이름 / 전화번호 / 인증키 검색" oninput="renderList()"><div id="list" class="list"></div></div>
+<div class="card"><div class="row" style="justify-content:space-between;align-items:center"><h2>인증키 목록</h2><div class="row"><button onclick="refresh()">새로고침</button><button onclick="addCategory()">카테고리 추가</button><button onclick="openCategoryManager()">카테고리 위치조정</button><button onclick="openApprovalManager()">승인목록</button><button onclick="openAppleAdminManager()">인증 등록 내역</button></div></div><div id="tabs" class="tabs"></div><input id="search" style="width:100%;margin:8px 0 12px" placeholder="🔍 이름 / 전화번호 / 인증키 검색" oninput="onSearch()"><div id="list" class="list"></div></div>
 </div></div>
 <div id="modal" class="modal hidden"><div class="modalbox"><div class="row" style="justify-content:space-between"><h2>인증키 상세</h2><button onclick="closeModal()">닫기</button></div><div id="detail"></div><div class="actions" id="detailActions"><button onclick="changeCategory()">카테고리</button><button onclick="activateSelected()">활성화</button><button onclick="deactivateSelected()">비활성화</button><button onclick="editSelected()">수정</button><button class="danger" onclick="deleteSelected()">삭제</button></div></div></div>
 <div id="editAuthModal" class="modal hidden"><div class="modalbox"><div class="row" style="justify-content:space-between;align-items:center"><h2>인증키 수정</h2><button onclick="closeEditAuthModal()">닫기</button></div><label>성함</label><input id="eName" style="width:100%"><label>전화번호 끝 4자리</label><input id="ePhone" style="width:100%" inputmode="numeric" maxlength="4"><label>인증키</label><input id="eCode" style="width:100%"><label>삭제 비밀번호</label><input id="ePwd" style="width:100%"><label>카테고리</label><select id="eCategory" style="width:100%"></select><div class="row" style="margin-top:16px"><button class="primary grow" onclick="saveEditSelected()">저장</button><button class="grow" onclick="closeEditAuthModal()">취소</button></div></div></div>
 <div id="categoryModal" class="modal hidden"><div class="modalbox"><div class="row" style="justify-content:space-between;align-items:center"><h2>카테고리 관리</h2><button onclick="closeCategoryManager()">닫기</button></div><div id="categoryManageList" class="list"></div><div class="row" style="margin-top:14px"><button class="primary grow" onclick="saveCategoryOrder()">순서 저장</button></div><p class="muted" style="margin:14px 0 0">카테고리를 삭제하면 인증키는 삭제되지 않고 미지정으로 이동합니다.</p></div></div>
-<div id="backupModal" class="modal hidden"><div class="modalbox"><div class="row" style="justify-content:space-between;align-items:center"><h2>백업 / 복원</h2><button onclick="closeBackupModal()">닫기</button></div><div class="row"><button class="primary grow" onclick="location.href='/admin/api/backup-zip'">ZIP 백업</button><button class="grow" onclick="document.getElementById('restoreBackup').click()">ZIP 복원</button></div></div></div>
+<div id="backupModal" class="modal hidden"><div class="modalbox"><div class="row" style="justify-content:space-between;align-items:center"><h2>백업 / 복원</h2><button onclick="closeBackupModal()">닫기</button></div><div class="row"><button class="primary grow" onclick="location.href='/admin/api/backup-zip'">ZIP 백업</button><button class="grow" onclick="document.getElementById('restoreBackup').click()">ZIP 복원</button></div><div class="row" style="margin-top:10px"><button class="grow" onclick="document.getElementById('importKeys').click()">CSV / 엑셀 가져오기</button></div></div></div>
 <div id="appleAdminModal" class="modal hidden"><div class="modalbox"><div class="row" style="justify-content:space-between;align-items:center"><h2>인증 등록 내역</h2><button onclick="closeAppleAdminManager()">닫기</button></div><div id="appleAdminList" class="list"></div></div></div>
 <div id="approvalModal" class="modal hidden"><div class="modalbox"><div class="row" style="justify-content:space-between;align-items:center"><h2>승인목록</h2><div class="row"><button onclick="openApprovalManager()">새로고침</button><button onclick="closeApprovalManager()">닫기</button></div></div><div id="approvalList" class="list"></div></div></div>
 <script>
-let items=[], categories=['미지정'], selectedCategory='전체', selected=null;
+let items=[], categories=['미지정'], selectedCategory='전체', selected=null, nextCursor=null, listTotal=0, categoryCounts={}, listSeq=0, searchTimer=null;
 async function api(path,opt={}){let r=await fetch(path,{headers:{'Content-Type':'application/json',...(opt.headers||{})},...opt});let text=await r.text();let data={};try{data=JSON.parse(text)}catch{data={detail:text}}if(!r.ok)throw new Error(data.detail||('HTTP '+r.status));return data}
 async function boot(){try{let s=await api('/admin/api/session');if(s.loggedIn){showApp();await refresh()}}catch(e){}}
-function showApp(){loginCard.classList.add('hidden');app.classList.remove('hidden')}
+function showApp(){loginCard.classList.add('hidden');app.classList.remove('hidden');startEvents()}
+let eventSource=null,eventTimer=null;
+function startEvents(){if(eventSource||!window.EventSource)return;eventSource=new EventSource('/admin/api/events');let later=()=>{clearTimeout(eventTimer);eventTimer=setTimeout(()=>refresh().catch(()=>{}),300)};['key.consumed','key.status','key.category','key.bulk','category.changed','resync'].forEach(n=>eventSource.addEventListener(n,later));['approval.created','approval.approved','approval.deleted'].forEach(n=>eventSource.addEventListener(n,()=>{if(!approvalModal.classList.contains('hidden'))openApprovalManager()}))}
 async function login(){try{await api('/admin/api/login',{method:'POST',body:JSON.stringify({code:loginCode.value.trim()})});loginMsg.textContent='';showApp();await refresh()}catch(e){loginMsg.textContent='로그인 실패';}}
 async function logout(){await api('/admin/api/logout',{method:'POST'});location.reload()}
-async function refresh(){let [l,c]=await Promise.all([api('/admin/api/list'),api('/admin/api/categories')]);items=l.items||[];categories=c.categories||['미지정'];fillCategories();renderTabs();renderList()}
+async function refresh(){let seq=++listSeq;let [l,c]=await Promise.all([api(listQuery(null)),api('/admin/api/categories')]);categories=c.categories||['미지정'];if(seq===listSeq)applyPage(l,false);fillCategories();renderTabs();renderList()}
+function listQuery(cursor){let p=new URLSearchParams({status:'live',limit:'100'});if(selectedCategory!=='전체')p.set('category',selectedCategory);let q=search.value.trim();if(q)p.set('q',q);if(cursor)p.set('cursor',cursor);return '/admin/api/list?'+p}
+function applyPage(l,append){items=append?items.concat(l.items||[]):(l.items||[]);nextCursor=l.nextCursor||null;listTotal=l.total||0;categoryCounts=l.categoryCounts||{}}
+async function reloadList(){let seq=++listSeq;let l=await api(listQuery(null));if(seq!==listSeq)return;applyPage(l,false);renderList()}
+async function loadMore(){if(!nextCursor)return;let seq=listSeq;let l=await api(listQuery(nextCursor));if(seq!==listSeq)return;applyPage(l,true);renderList()}
+function onSearch(){clearTimeout(searchTimer);searchTimer=setTimeout(reloadList,250)}
 function fillCategories(){rCategory.innerHTML=categories.map(c=>`<option>${esc(c)}</option>`).join('')}
 function renderTabs(){let names=['전체','미지정',...categories.filter(c=>c!=='미지정')];tabs.innerHTML=names.map(c=>`<button class="tab ${selectedCategory===c?'active':''}" onclick="selectCat('${js(c)}')">${esc(c)}</button>`).join('')+`<button class="tab" onclick="addCategory()">＋</button>`}
-function selectCat(c){selectedCategory=c;renderTabs();renderList()}
-function filtered(){let q=search.value.trim().toLowerCase();return items.filter(x=>{if(x.deletedAt)return false;if(selectedCategory!=='전체'&&(x.category||'미지정')!==selectedCategory)return false;return !q||[x.code,x.name,x.phone].some(v=>(v||'').toLowerCase().includes(q))})}
-function renderList(){let a=filtered();list.innerHTML=a.length?a.map(x=>`<div class="item" onclick="openItem('${js(x.code)}')"><div class="itemtop"><b>${esc(x.name||'')}</b><span class="badge ${(x.deletedAt?'deleted':(!x.enabled?'inactive':''))}">${x.deletedAt?'삭제됨':(x.enabled?'활성':'비활성')}</span></div><div class="muted">${esc(x.phone||'')} · ${esc(x.category||'미지정')} · ${esc(x.date||'')}</div><div class="code">${esc(x.code)}</div></div>`).join(''):'<p class="muted">표시할 인증키가 없습니다.</p>'}
+function selectCat(c){selectedCategory=c;renderTabs();reloadList()}
+function renderList(){let a=items;list.innerHTML=(a.length?a.map(x=>`<div class="item" onclick="openItem('${js(x.code)}')"><div class="itemtop"><b>${esc(x.name||'')}</b><span class="badge ${(x.deletedAt?'deleted':(!x.enabled?'inactive':''))}">${x.deletedAt?'삭제됨':(x.enabled?'활성':'비활성')}</span></div><div class="muted">${esc(x.phone||'')} · ${esc(x.category||'미지정')} · ${esc(x.date||'')}</div><div class="code">${esc(x.code)}</div></div>`).join(''):'<p class="muted">표시할 인증키가 없습니다.</p>')+(nextCursor?`<button onclick="loadMore()">더 보기 (${a.length} / ${listTotal})</button>`:'')}
 function openItem(code){selected=items.find(x=>x.code===code);if(!selected)return;detail.innerHTML=`<label>성함</label><div>${esc(selected.name||'')}</div><label>전화번호</label><div>${esc(selected.phone||'')}</div><label>인증키</label><div class="code">${esc(selected.code)}</div><label>삭제 비밀번호</label><div>${esc(selected.delete_password||'')}</div><label>카테고리</label><div>${esc(selected.category||'미지정')}</div><label>등록일</label><div>${esc(selected.date||'')}</div><label>상태</label><div>${selected.deletedAt?'삭제됨':(selected.enabled?'활성':'비활성')}</div>`;modal.classList.remove('hidden')}
 function closeModal(){modal.classList.add('hidden');selected=null}
 async function addCategory(){let n=prompt('추가할 카테고리 이름');if(!n||!n.trim())return;await api('/admin/api/categories',{method:'POST',body:JSON.stringify({name:n.trim()})});await refresh();rCategory.value=n.trim()}
 function openCategoryManager(){renderCategoryManager();categoryModal.classList.remove('hidden')}
 function closeCategoryManager(){categoryModal.classList.add('hidden')}
-function categoryCount(name){return items.filter(x=>(x.category||'미지정')===name).length}
+function categoryCount(name){return categoryCounts[name]||0}
 function renderCategoryManager(){let names=['미지정',...categories.filter(c=>c!=='미지정')];categoryManageList.innerHTML=names.map((n,i)=>{let isDefault=n==='미지정';let movableIndex=i-1;let customCount=categories.filter(c=>c!=='미지정').length;return `<div class="item" style="cursor:default"><div class="row" style="justify-content:space-between;align-items:center"><div><b>${esc(n)}</b><div class="muted">인증키 ${categoryCount(n)}개</div></div><div class="row">${isDefault?'<span class="muted">기본 카테고리</span>':`<button onclick="moveCategory(${movableIndex},-1)" ${movableIndex<=0?'disabled':''}>↑</button><button onclick="moveCategory(${movableIndex},1)" ${movableIndex>=customCount-1?'disabled':''}>↓</button><button onclick="renameCategory('${js(n)}')">수정</button><button class="danger" onclick="deleteCategory('${js(n)}')">삭제</button>`}</div></div></div>`}).join('')}
 function moveCategory(index,delta){let custom=categories.filter(c=>c!=='미지정');let target=index+delta;if(index<0||target<0||target>=custom.length)return;[custom[index],custom[target]]=[custom[target],custom[index]];categories=['미지정',...custom];fillCategories();renderTabs();renderCategoryManager()}
 async function saveCategoryOrder(){try{let ordered=categories.filter(c=>c!=='미지정');await api('/admin/api/categories/reorder',{method:'POST',body:JSON.stringify({categories:ordered})});await refresh();renderCategoryManager();alert('카테고리 순서가 저장되었습니다.')}catch(e){alert('카테고리 순서 저장 실패: '+e.message)}}
 async function renameCategory(oldName){let n=prompt('새 카테고리 이름',oldName);if(n===null)return;n=n.trim();if(!n||n===oldName)return;try{let r=await api('/admin/api/categories/rename',{method:'POST',body:JSON.stringify({oldName:oldName,newName:n})});if(selectedCategory===oldName)selectedCategory=n;await refresh();renderCategoryManager();alert('카테고리 수정 완료\n인증키 '+(r.moved||0)+'개가 '+n+' 카테고리로 이동했습니다.')}catch(e){alert('카테고리 수정 실패: '+e.message)}}
 async function deleteCategory(n){if(!n||n==='미지정')return;if(!confirm('카테고리 '+n+' 을(를) 삭제할까요?\n안에 있는 인증키는 삭제되지 않고 미지정으로 이동합니다.'))return;try{let r=await api('/admin/api/categories/delete',{method:'POST',body:JSON.stringify({name:n})});if(selectedCategory===n)selectedCategory='전체';await refresh();renderCategoryManager();alert('카테고리 삭제 완료\n인증키 '+(r.movedToUnspecified||0)+'개가 미지정으로 이동했습니다.')}catch(e){alert('카테고리 삭제 실패: '+e.message)}}
 async function restoreBackupFile(input){let f=input.files&&input.files[0];if(!f)return;try{if(!confirm('선택한 백업 ZIP 내부 JSON 기준으로 전체 서버 내용을 복원할까요?\n현재 서버 내용은 백업 내용으로 교체됩니다.')){input.value='';return}let raw=await f.arrayBuffer();let r=await fetch('/admin/api/restore-backup',{method:'POST',headers:{'Content-Type':f.type||'application/octet-stream','X-Backup-Filename':f.name},body:raw});let text=await r.text();let data={};try{data=JSON.parse(text)}catch{data={detail:text}}if(!r.ok)throw new Error(data.detail||('HTTP '+r.status));alert((data.type==='json'?'JSON':'ZIP')+' 복원 완료\n인증키 '+(data.records||0)+'개 / 카테고리 '+(data.categories||0)+'개');await refresh()}catch(e){alert('백업 복원 실패: '+e.message)}finally{input.value=''}}
+async function importKeysFile(input){let f=input.files&&input.files[0];if(!f)return;try{let r=await fetch('/admin/api/import-keys',{method:'POST',headers:{'Content-Type':f.type||'application/octet-stream','X-Import-Filename':encodeURIComponent(f.name)},body:f});let text=await r.text();let data={};try{data=JSON.parse(text)}catch{data={detail:text}}if(!r.ok)throw new Error(data.detail||('HTTP '+r.status));let lines=(data.errors||[]).slice(0,20).map(e=>e.row+'행 '+(e.code||'')+': '+e.detail);alert('가져오기 완료\n등록 '+(data.imported||0)+'개 / 실패 '+(data.failed||0)+'개'+(lines.length?'\n\n'+lines.join('\n'):''));await refresh()}catch(e){alert('가져오기 실패: '+e.message)}finally{input.value=''}}
 async function changeCategory(){if(!selected)return;let n=prompt('변경할 카테고리\n현재: '+(selected.category||'미지정')+'\n\n기존 카테고리: '+categories.join(', '),selected.category||'미지정');if(n===null)return;n=n.trim()||'미지정';if(n!=='미지정'&&!categories.includes(n))await api('/admin/api/categories',{method:'POST',body:JSON.stringify({name:n})});await api('/admin/api/category',{method:'POST',body:JSON.stringify({code:selected.code,category:n})});closeModal();await refresh()}
 async function activateSelected(){if(!selected)return;await api('/admin/api/activate',{method:'POST',body:JSON.stringify({code:selected.code})});closeModal();await refresh()}
 async function deactivateSelected(){if(!selected)return;await api('/admin/api/deactivate',{method:'POST',body:JSON.stringify({code:selected.code})});closeModal();await refresh()}
@@ -2468,5 +5690,10 @@ boot();
 
 
 @app.get("/admin", response_class=HTMLResponse)
-def web_admin_page():
-    return HTMLResponse(ADMIN_HTML)
+def web_admin_page(request: Request):
+    encoding = accepted_encoding(request)
+    if encoding is None:
+        return HTMLResponse(ADMIN_HTML, headers={"Vary": "Accept-Encoding"})
+    # 페이지 내용은 고정이므로 서버가 떠 있는 동안 한 번만 압축합니다.
+    body = cached_compressed("admin-html", _BOOT_ID, encoding, lambda: [ADMIN_HTML])
+    return compressed_response(body, encoding, "text/html; charset=utf-8")
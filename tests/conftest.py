@@ -0,0 +1,55 @@
+"""server.py는 import 시점에 환경변수로 저장 경로를 정하므로, 임시 폴더를 먼저 지정한 뒤 불러옵니다."""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = tempfile.mkdtemp(prefix="auth-test-")
+
+os.environ["AUTH_DATA_FILE"] = os.path.join(DATA_DIR, "auth_data.json")
+os.environ["AUTH_CATEGORY_FILE"] = os.path.join(DATA_DIR, "auth_categories.json")
+os.environ["APPLE_ADMIN_FILE"] = os.path.join(DATA_DIR, "apple_admins.json")
+# 테스트는 모두 같은 IP(testclient)에서 보내므로 속도 제한을 끕니다.
+os.environ["AUTH_RATE_LIMIT_APP_CHECK_PER_MINUTE"] = "0"
+os.environ["AUTH_RATE_LIMIT_LOGIN_PER_MINUTE"] = "0"
+sys.path.insert(0, str(ROOT))
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def srv():
+    return server
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    c = TestClient(server.app, base_url="https://testserver")
+    assert c.post("/admin/api/login", json={"code": "kyh"}).status_code == 200
+    return c
+
+
+def seed_keys(count: int, prefix: str = "k", **fields) -> list[str]:
+    """검사용 인증키를 바로 넣고 한 번에 저장합니다."""
+    codes = [f"{prefix}{i}" for i in range(count)]
+    with server._auth_lock:
+        for i, code in enumerate(codes):
+            record = {
+                "name": f"n{i % 97}",
+                "phone": f"{i % 10000:04d}",
+                "status": "approved",
+                "token": "t",
+                "date": f"2026-01-{i % 28 + 1:02d} {i % 24:02d}:{i % 60:02d}",
+                "enabled": True,
+                "category": "미지정",
+                "deletedAt": None,
+            }
+            record.update(fields)
+            server.auth_db[code] = server._normalize_record(record)
+        server.save_data(*codes)
+    return codes
@@ -0,0 +1,60 @@
+"""일괄 변경: 없는 인증키는 항목만 실패하고, 여러 동작을 한 번에 저장하며, 카테고리 없는 category 동작은 거절합니다."""
+from conftest import seed_keys
+
+
+def test_mixed_actions_with_missing_codes_save_once(srv, client, monkeypatch):
+    codes = seed_keys(4, prefix="bulk-mix")
+    saves = []
+    save_data = srv.save_data
+    monkeypatch.setattr(srv, "save_data", lambda *changed, **kw: saves.append(set(changed)) or save_data(*changed, **kw))
+
+    r = client.post(
+        "/admin/api/bulk",
+        json={
+            "operations": [
+                {"action": "deactivate", "codes": [codes[0], "bulk-missing"]},
+                {"action": "category", "codes": [codes[1]], "category": "일괄반"},
+                {"action": "Activate", "codes": [codes[0]]},
+                {"action": "delete", "codes": [codes[2]]},
+            ]
+        },
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["applied"], body["failed"]) == (4, 1)
+    assert [(x["code"], x["status"]) for x in body["results"]] == [
+        (codes[0], "inactive"),
+        ("bulk-missing", "error"),
+        (codes[1], "ok"),
+        (codes[0], "active"),
+        (codes[2], "moved_to_trash"),
+    ]
+    assert body["results"][1]["detail"] == "code_not_found"
+    assert saves == [{codes[0], codes[1], codes[2]}]
+
+    # 같은 요청 안에서는 순서대로 적용합니다.
+    assert srv.auth_db[codes[0]]["enabled"] is True
+    assert srv.auth_db[codes[1]]["category"] == "일괄반"
+    assert codes[2] not in srv.auth_db
+    assert srv.auth_db[codes[3]]["category"] == "미지정"
+    assert "일괄반" in srv.categories
+
+
+def test_category_action_requires_category(srv, client, monkeypatch):
+    codes = seed_keys(2, prefix="bulk-cat", category="기존반")
+    saves = []
+    monkeypatch.setattr(srv, "save_data", lambda *changed, **kw: saves.append(changed))
+
+    for operation in ({"action": "category", "codes": codes}, {"action": "category", "codes": codes, "category": "  "}):
+        r = client.post("/admin/api/bulk", json={"operations": [{"action": "deactivate", "codes": codes}, operation]})
+        assert r.status_code == 400
+        assert r.json()["detail"] == "category_required"
+    # 검사에서 거절하면 앞선 동작도 적용하지 않습니다.
+    assert saves == []
+    assert all(srv.auth_db[c]["category"] == "기존반" and srv.auth_db[c]["enabled"] for c in codes)
+
+    # 미지정으로 되돌리려면 직접 보냅니다.
+    monkeypatch.undo()
+    r = client.post("/admin/api/bulk", json={"operations": [{"action": "category", "codes": codes, "category": "미지정"}]})
+    assert r.status_code == 200
+    assert all(srv.auth_db[c]["category"] == "미지정" for c in codes)
@@ -0,0 +1,50 @@
+import threading
+import time
+
+import pytest
+
+
+def _save_in_thread(srv, code, results):
+    def run():
+        try:
+            with srv._code_lock(code):
+                srv.auth_db[code]["name"] = f"saved-{time.monotonic()}"
+                srv.save_data(code)
+            results.append("ok")
+        except Exception as exc:
+            results.append(exc)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_saves_finish_after_failed_flush(srv, monkeypatch):
+    """저장이 한 번 실패해도 커밋 스레드가 살아 있어 이후 저장이 끝나야 합니다."""
+    from conftest import seed_keys
+
+    if srv.COMMIT_WINDOW_MS <= 0:
+        pytest.skip("그룹 커밋을 쓰지 않는 설정")
+    code = seed_keys(1, prefix="flushfail")[0]
+    original = srv._atomic_json_save
+    calls = {"n": 0}
+
+    def failing_save(path, data):
+        if path == srv.DATA_FILE and calls["n"] == 0:
+            calls["n"] += 1
+            raise OSError("disk full")
+        return original(path, data)
+
+    monkeypatch.setattr(srv, "_atomic_json_save", failing_save)
+    results = []
+    _save_in_thread(srv, code, results).join(10)
+    assert len(results) == 1 and isinstance(results[0], RuntimeError)
+
+    # 실패한 변경만 남은 채로 다음 주기가 돌면 기다리는 요청이 없어 티켓도 없습니다.
+    time.sleep(1.5)
+    for _ in range(3):
+        results = []
+        thread = _save_in_thread(srv, code, results)
+        thread.join(10)
+        assert not thread.is_alive(), "commit thread stopped: save never finished"
+        assert results == ["ok"]
+    assert srv._commit_thread.is_alive()
@@ -0,0 +1,101 @@
+"""관리자 이벤트 스트림(SSE)이 열려 있어도 uvicorn이 SIGTERM으로 정상 종료되고, 종료 정리가 도는지 확인합니다."""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_open_event_stream_does_not_block_graceful_shutdown():
+    data_dir = tempfile.mkdtemp(prefix="auth-events-")
+    env = dict(
+        os.environ,
+        AUTH_DATA_FILE=os.path.join(data_dir, "auth_data.json"),
+        AUTH_CATEGORY_FILE=os.path.join(data_dir, "auth_categories.json"),
+        APPLE_ADMIN_FILE=os.path.join(data_dir, "apple_admins.json"),
+        AUTH_RATE_LIMIT_LOGIN_PER_MINUTE="0",
+    )
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                if httpx.get(base_url + "/list", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            assert proc.poll() is None and time.time() < deadline, "서버가 뜨지 않았습니다"
+            time.sleep(0.1)
+
+        with httpx.Client(base_url=base_url, timeout=30) as c:
+            login = c.post("/admin/api/login", json={"code": "kyh"})
+            assert login.status_code == 200
+        # 세션 쿠키는 https 전용이라 평문 http 로는 직접 실어 보냅니다.
+        cookie = {"Cookie": f"session={login.cookies['session']}"}
+
+        lines = []
+        opened = threading.Event()
+
+        def listen():
+            with httpx.Client(base_url=base_url, timeout=None) as c:
+                with c.stream("GET", "/admin/api/events", headers=cookie) as r:
+                    opened.set()
+                    for line in r.iter_lines():
+                        lines.append(line)
+
+        listener = threading.Thread(target=listen, daemon=True)
+        listener.start()
+        assert opened.wait(30)
+        time.sleep(0.5)
+
+        proc.terminate()
+        output, _ = proc.communicate(timeout=15)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+    listener.join(5)
+    assert not listener.is_alive()
+    assert "event: resync" in lines
+    # lifespan 종료까지 갔으면 열린 연결을 기다리다 멈추지 않은 것입니다.
+    assert "Application shutdown complete" in output
+    # uvicorn은 정상 종료를 마친 뒤 받은 신호를 다시 보내 끝납니다.
+    assert proc.returncode in (0, -signal.SIGTERM)
+
+
+def test_lifespan_shutdown_runs_exit_cleanup(srv, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    calls = []
+    monkeypatch.setattr(srv, "_shutdown_event", threading.Event())
+    monkeypatch.setattr(srv, "drain_push_queue", lambda: calls.append("push"))
+    monkeypatch.setattr(srv, "_close_push_clients", lambda: calls.append("clients"))
+    monkeypatch.setattr(srv, "_flush_dirty", lambda: calls.append("flush"))
+    with TestClient(srv.app):
+        assert calls == []
+    assert calls == ["push", "clients", "flush"]
+    assert srv._shutdown_event.is_set()
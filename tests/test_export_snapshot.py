@@ -0,0 +1,102 @@
+import json
+import threading
+
+from conftest import seed_keys
+
+
+def test_export_is_point_in_time(srv):
+    codes = seed_keys(3000, prefix="snap")
+    first, last = codes[0], codes[-1]
+    stop = threading.Event()
+
+    def writer():
+        # 두 인증키를 항상 같은 값으로 함께 바꿉니다. 한 시점의 사본이면 둘이 어긋날 수 없습니다.
+        value = 0
+        while not stop.is_set():
+            value += 1
+            with srv._code_locks(first, last):
+                srv.auth_db[first]["name"] = f"pair{value}"
+                srv.auth_db[last]["name"] = f"pair{value}"
+                srv.save_data(first, last, wait=False)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(20):
+            exported = json.loads("".join(srv.stream_export_json()))
+            assert exported["auth_db"][first]["name"] == exported["auth_db"][last]["name"]
+            listed = json.loads("".join(srv.stream_auth_db_json()))
+            assert listed[first]["name"] == listed[last]["name"]
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_list_etag_matches_body(srv, client, monkeypatch):
+    code = seed_keys(1, prefix="etag")[0]
+    conditional = srv._conditional
+
+    def conditional_then_change(*args):
+        # _conditional이 ETag를 정한 뒤, 본문을 만들기 전에 다른 요청이 값을 바꾼 경우입니다.
+        result = conditional(*args)
+        with srv._code_lock(code):
+            srv.auth_db[code]["name"] = "changed"
+            srv.save_data(code)
+        return result
+
+    monkeypatch.setattr(srv, "_conditional", conditional_then_change)
+    r = client.get("/list", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    body = r.json()
+    assert body[code]["name"] == "changed"
+    assert r.headers["etag"] == srv._encoded_etag(srv.data_etag("auth"), "gzip")
+    monkeypatch.setattr(srv, "_conditional", conditional)
+    assert client.get("/list", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+
+
+def test_list_does_not_wait_for_key_locks(srv, client):
+    code = seed_keys(1, prefix="busy")[0]
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        # /app/check 처럼 인증키 잠금을 쥐고 오래 걸리는 요청입니다.
+        with srv._auth_lock, srv._code_lock(code):
+            held.set()
+            release.wait(10)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait()
+    try:
+        result = {}
+        reader = threading.Thread(target=lambda: result.update(r=client.get("/list")))
+        reader.start()
+        reader.join(5)
+        assert not reader.is_alive()
+        assert result["r"].status_code == 200
+        assert code in result["r"].json()
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_compressed_list_has_its_own_etag(srv, client):
+    seed_keys(1, prefix="enc")
+    plain = client.get("/list", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/list", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert plain.headers["etag"] == srv.data_etag("auth")
+    assert gzipped.headers["etag"] == plain.headers["etag"][:-1] + '-gz"'
+
+    # 어느 표현의 ETag를 보내도 같은 버전이면 304이고, 보낸 ETag를 그대로 돌려줍니다.
+    for etag in (plain.headers["etag"], gzipped.headers["etag"]):
+        for encoding in ("identity", "gzip"):
+            r = client.get("/list", headers={"Accept-Encoding": encoding, "If-None-Match": etag})
+            assert r.status_code == 304
+            assert r.headers["etag"] == etag
+
+    page = client.get("/admin/api/list", headers={"Accept-Encoding": "gzip"})
+    assert page.headers["etag"] == gzipped.headers["etag"]
+    assert page.json()["version"] == srv.data_etag("auth").strip('"')
@@ -0,0 +1,109 @@
+"""FCM messages:send를 httpx 모의 전송으로 대신해 재시도와 만료 토큰 정리를 확인합니다."""
+import collections
+import json
+
+import httpx
+
+from conftest import seed_keys
+
+
+def test_fcm_send_retries_and_removes_stale_tokens(srv, monkeypatch):
+    codes = seed_keys(3, prefix="fcm")
+    tokens = {
+        codes[0]: ["ok-1", "dead-1"],
+        codes[1]: ["flaky-1", "rl-1"],
+        codes[2]: ["down-1", "dead-2"],
+    }
+    seen = collections.Counter()
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        token = json.loads(request.content)["message"]["token"]
+        seen[token] += 1
+        if token.startswith("dead"):
+            return httpx.Response(404, json={"error": {"status": "NOT_FOUND", "details": [{"errorCode": "UNREGISTERED"}]}})
+        if token.startswith("flaky") and seen[token] <= 2:
+            return httpx.Response(503, headers={"Retry-After": "0"})
+        if token.startswith("rl") and seen[token] == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if token.startswith("down"):
+            return httpx.Response(500, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"name": "projects/p/messages/1"})
+
+    monkeypatch.setattr(srv, "ANDROID_MASTER_KEYS", srv.ANDROID_MASTER_KEYS | set(codes))
+    monkeypatch.setattr(srv, "_fcm_credentials", lambda: {"projectId": "p"})
+    monkeypatch.setattr(srv, "_fcm_access_token", lambda: "access")
+    monkeypatch.setitem(
+        srv._push_clients, ("fcm",), httpx.AsyncClient(base_url=srv.FCM_HOST, transport=httpx.MockTransport(handler))
+    )
+    with srv._android_push_lock:
+        srv.android_push_tokens.update(tokens)
+        srv.save_android_push_tokens(*codes)
+    try:
+        srv.send_android_approval_push_to_full_admins({"requestId": "r1", "name": "n"})
+
+        assert seen["ok-1"] == 1
+        assert seen["dead-1"] == 1 and seen["dead-2"] == 1
+        assert seen["flaky-1"] == 3
+        assert seen["rl-1"] == 2
+        assert seen["down-1"] == srv.FCM_MAX_RETRIES + 1
+        request = requests[0]
+        assert f"{request.url.scheme}://{request.url.host}" == srv.FCM_HOST
+        assert request.url.path == "/v1/projects/p/messages:send"
+        assert request.headers["authorization"] == "Bearer access"
+        assert json.loads(request.content)["message"]["data"]["requestId"] == "r1"
+        # UNREGISTERED 토큰만 지우고, 일시 오류로 실패한 토큰은 남깁니다.
+        with srv._android_push_lock:
+            assert srv.android_push_tokens[codes[0]] == ["ok-1"]
+            assert srv.android_push_tokens[codes[1]] == ["flaky-1", "rl-1"]
+            assert srv.android_push_tokens[codes[2]] == ["down-1"]
+        assert srv.push_token_owners("android", "dead-1", "dead-2") == []
+    finally:
+        with srv._android_push_lock:
+            for code in codes:
+                srv.android_push_tokens.pop(code, None)
+            srv.save_android_push_tokens(*codes)
+
+
+def test_fcm_retry_delay(srv):
+    assert srv._fcm_retry_delay(httpx.Response(429, headers={"Retry-After": "2"}), 0) == 2.0
+    for attempt in range(4):
+        delay = srv._fcm_retry_delay(None, attempt)
+        assert 0.25 * 2 ** attempt <= delay <= 0.5 * 2 ** attempt
+
+
+def test_concurrent_token_misses_exchange_once(srv, monkeypatch):
+    import threading
+    import time
+
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    exchanges = []
+
+    def token_endpoint(url, data, timeout):
+        exchanges.append(data["assertion"])
+        # 교환이 느린 동안 다른 발송 스레드가 같은 토큰을 기다리게 합니다.
+        time.sleep(0.2)
+        return httpx.Response(200, json={"access_token": f"token-{len(exchanges)}", "expires_in": 3600}, request=httpx.Request("POST", url))
+
+    monkeypatch.setattr(srv, "_fcm_credentials", lambda: {"projectId": "p", "clientEmail": "e", "tokenUri": "https://oauth/token", "key": key})
+    monkeypatch.setattr(srv.httpx, "post", token_endpoint)
+    monkeypatch.setattr(srv, "_fcm_cached_access_token", None)
+    monkeypatch.setattr(srv, "_fcm_cached_access_token_until", 0)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(srv._fcm_access_token())) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["token-1"] * 5
+    assert len(exchanges) == 1
+
+    # 백그라운드 갱신은 만료 전 여유(FCM_TOKEN_REFRESH_MARGIN_SECONDS) 안에 들면 발송 쪽과 달리 새로 교환합니다.
+    monkeypatch.setattr(srv, "_fcm_cached_access_token_until", int(time.time()) + 120)
+    assert srv._fcm_access_token() == "token-1"
+    assert srv._refresh_fcm_access_token(srv.FCM_TOKEN_REFRESH_MARGIN_SECONDS) == "token-2"
+    assert len(exchanges) == 2
@@ -0,0 +1,101 @@
+"""인증키 일괄 가져오기: utf-8-sig/cp949 CSV, XLSX, 행 수 제한, 오류 행 보고를 확인합니다."""
+import io
+import urllib.parse
+
+from openpyxl import Workbook
+
+from conftest import seed_keys
+
+HEADER = ["날짜", "성함", "전화번호", "인증키", "비밀번호", "카테고리", "활성상태"]
+
+
+def _csv(rows: list, encoding: str) -> bytes:
+    return "\r\n".join(",".join(row) for row in rows).encode(encoding)
+
+
+def _import(client, body: bytes, filename: str, content_type: str = "application/octet-stream"):
+    headers = {"Content-Type": content_type, "X-Import-Filename": urllib.parse.quote(filename)}
+    return client.post("/admin/api/import-keys", content=body, headers=headers)
+
+
+def test_utf8_sig_csv_with_header(srv, client):
+    # 머리글이 있으면 열 순서가 달라도 이름으로 찾습니다.
+    rows = [["인증키", "성함", "전화번호", "비밀번호", "카테고리", "활성상태"]]
+    rows += [[f"iu{i}", f"홍길동{i}", "0123", "pw", "수입반", "비활성" if i == 0 else "활성"] for i in range(3)]
+    r = _import(client, _csv(rows, "utf-8-sig"), "목록.csv", "text/csv")
+    assert r.status_code == 200, r.text
+    assert (r.json()["type"], r.json()["imported"], r.json()["failed"]) == ("csv", 3, 0)
+    assert srv.auth_db["iu1"]["name"] == "홍길동1"
+    assert srv.auth_db["iu1"]["category"] == "수입반"
+    assert srv.auth_db["iu0"]["enabled"] is False
+    assert "수입반" in srv.categories
+
+
+def test_cp949_csv_without_header(srv, client):
+    # 머리글이 없으면 내보내기와 같은 열 순서로 읽습니다.
+    rows = [["2026-01-02 03:04", f"김철수{i}", "4567", f"ic{i}", "pw", "", ""] for i in range(2)]
+    r = _import(client, _csv(rows, "cp949"), "엑셀저장.csv", "text/csv")
+    assert r.status_code == 200, r.text
+    assert (r.json()["imported"], r.json()["failed"]) == (2, 0)
+    assert srv.auth_db["ic0"]["name"] == "김철수0"
+    assert srv.auth_db["ic0"]["date"] == "2026-01-02 03:04"
+    assert srv.auth_db["ic0"]["category"] == "미지정"
+
+
+def test_xlsx_with_encoded_filename(srv, client, monkeypatch):
+    seen = []
+    kind = srv._import_kind
+    monkeypatch.setattr(srv, "_import_kind", lambda spool, filename, content_type: seen.append(filename) or kind(spool, filename, content_type))
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADER)
+    # 엑셀이 숫자로 바꾼 전화번호는 앞자리 0을 채웁니다.
+    ws.append(["", "엑셀", 123, "ix0", "pw", "", ""])
+    ws.append(["", "엑셀", 4567, 1001, 2002, "", ""])
+    buf = io.BytesIO()
+    wb.save(buf)
+
+    r = _import(client, buf.getvalue(), "인증키 목록.xlsx")
+    assert r.status_code == 200, r.text
+    assert (r.json()["type"], r.json()["imported"]) == ("xlsx", 2)
+    assert seen == ["인증키 목록.xlsx"]
+    assert srv.auth_db["ix0"]["phone"] == "0123"
+    assert srv.auth_db["1001"]["delete_password"] == "2002"
+
+
+def test_error_rows_are_reported_and_skipped(srv, client):
+    seed_keys(1, "ie-existing")
+    rows = [
+        HEADER,
+        ["", "좋음", "1234", "ie0", "pw", "", ""],
+        ["", "", "1234", "ie1", "pw", "", ""],
+        ["", "번호", "12a4", "ie2", "pw", "", ""],
+        ["", "중복", "1234", "ie0", "pw", "", ""],
+        ["", "이미", "1234", "ie-existing0", "pw", "", ""],
+        ["", "비번", "1234", "ie3", "", "", ""],
+    ]
+    r = _import(client, _csv(rows, "utf-8"), "errors.csv")
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["imported"], body["failed"]) == (1, 5)
+    assert [(e["row"], e["code"], e["detail"]) for e in body["errors"]] == [
+        (3, "ie1", "name_required"),
+        (4, "ie2", "phoneLast4 must be exactly 4 digits"),
+        (5, "ie0", "duplicate_code_in_file: row 2"),
+        (6, "ie-existing0", "code_already_exists"),
+        (7, "ie3", "delete_password_required"),
+    ]
+    assert "ie0" in srv.auth_db and "ie1" not in srv.auth_db
+
+
+def test_row_cap_rejects_whole_file(srv, client, monkeypatch):
+    monkeypatch.setattr(srv, "IMPORT_MAX_ROWS", 3)
+    rows = [["", "제한", "1234", f"ir{i}", "pw", "", ""] for i in range(4)]
+    r = _import(client, _csv(rows, "utf-8"), "cap.csv")
+    assert r.status_code == 413
+    assert r.json()["detail"] == "too_many_import_rows: max 3"
+    assert not any(f"ir{i}" in srv.auth_db for i in range(4))
+
+    r = _import(client, _csv(rows[:3], "utf-8"), "cap.csv")
+    assert r.status_code == 200 and r.json()["imported"] == 3
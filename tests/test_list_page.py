@@ -0,0 +1,56 @@
+import itertools
+
+from conftest import seed_keys
+
+
+def _reference(srv, category, status, q):
+    rows = []
+    for code, record in srv.auth_db.items():
+        item = srv._list_item(code, record)
+        if category and item["category"] != category:
+            continue
+        if status != "all":
+            if item.get("deletedAt"):
+                if status != "deleted":
+                    continue
+            elif status == "deleted" or (status == "active" and not item["enabled"]) or (status == "inactive" and item["enabled"]):
+                continue
+        if q and not any(q in str(v or "").lower() for v in (code, item.get("name"), item.get("phone"))):
+            continue
+        rows.append((str(record.get("date") or ""), code))
+    return [code for _, code in sorted(rows, reverse=True)]
+
+
+def _all_pages(srv, **kwargs):
+    codes, cursor, totals = [], None, set()
+    while True:
+        page = srv.list_page(limit=7, cursor=cursor, **kwargs)
+        codes.extend(item["code"] for item in page["items"])
+        totals.add(page["total"])
+        cursor = page["nextCursor"]
+        if not cursor:
+            return codes, totals
+
+
+def test_list_page_matches_full_scan(srv):
+    codes = seed_keys(120, prefix="lp")
+    with srv._code_locks(*codes):
+        for i, code in enumerate(codes):
+            record = srv.auth_db[code]
+            record["category"] = ("A", "B", "미지정")[i % 3]
+            record["enabled"] = i % 4 != 0
+            record["deletedAt"] = "2026-02-01 00:00" if i % 5 == 0 else None
+        srv.save_data(*codes)
+    # 단건 변경도 목록 인덱스에 반영되는지 함께 봅니다.
+    srv.deactivate_code(codes[1])
+    srv.set_category_for_code(codes[2], "B")
+    srv.activate_code(codes[5])
+    assert srv.check_index_consistency() == []
+
+    for category, status, q in itertools.product(("", "A", "B", "없음"), srv.LIST_STATUSES, ("", "lp1", "n3")):
+        expected = _reference(srv, category, status, q)
+        got, totals = _all_pages(srv, category=category, status=status, q=q)
+        assert got == expected, (category, status, q)
+        assert totals == {len(expected)}, (category, status, q)
+        whole = srv.list_page(category=category, status=status, q=q)
+        assert [item["code"] for item in whole["items"]] == expected
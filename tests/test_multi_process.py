@@ -0,0 +1,200 @@
+"""AUTH_MULTI_PROCESS=1 로 uvicorn 워커 여러 개를 띄워, 저장 유실이 없고 ETag·Idempotency·관리자 이벤트가 워커끼리 맞는지 확인합니다."""
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+pytest.importorskip("fcntl")
+
+ROOT = Path(__file__).resolve().parents[1]
+WORKERS = 4
+CODES = 200
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _post(base_url: str, path: str, body: dict, headers: dict = None) -> httpx.Response:
+    # 요청마다 새 연결을 써서 커널이 워커들에 골고루 나눠 주게 합니다.
+    with httpx.Client(base_url=base_url, timeout=60) as c:
+        return c.post(path, json=body, headers=headers or {})
+
+
+def _run_all(target, args_list: list) -> list:
+    results = [None] * len(args_list)
+
+    def run(i, args):
+        try:
+            results[i] = target(*args)
+        except Exception as e:  # noqa: BLE001 - 실패도 결과로 모아 한 번에 확인합니다.
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, args)) for i, args in enumerate(args_list)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+@pytest.fixture(params=["json", "sqlite", "journal"])
+def workers(request):
+    data_dir = tempfile.mkdtemp(prefix="auth-multi-")
+    env = dict(
+        os.environ,
+        AUTH_DATA_FILE=os.path.join(data_dir, "auth_data.json"),
+        AUTH_CATEGORY_FILE=os.path.join(data_dir, "auth_categories.json"),
+        APPLE_ADMIN_FILE=os.path.join(data_dir, "apple_admins.json"),
+        AUTH_STORAGE=request.param,
+        AUTH_MULTI_PROCESS="1",
+        WEB_CONCURRENCY=str(WORKERS),
+        AUTH_RATE_LIMIT_APP_CHECK_PER_MINUTE="0",
+        AUTH_RATE_LIMIT_LOGIN_PER_MINUTE="0",
+    )
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                if httpx.get(base_url + "/list", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            assert proc.poll() is None and time.time() < deadline, "워커가 뜨지 않았습니다"
+            time.sleep(0.1)
+        # 첫 워커가 받은 뒤에도 나머지 워커가 뜰 때까지 잠시 기다립니다.
+        time.sleep(1.5)
+        yield base_url, env
+    finally:
+        # 열린 이벤트 스트림이 있어도 정상 종료가 기다리지 않아야 합니다.
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def _load_from_disk(env: dict) -> dict:
+    """새 단일 프로세스로 디스크에서 읽어 본 인증키 목록입니다.
+    읽는 쪽이 저널을 합치며 파일을 바꿀 수 있으므로 복사본에서 읽습니다."""
+    copy_dir = tempfile.mkdtemp(prefix="auth-multi-copy-")
+    shutil.copytree(os.path.dirname(env["AUTH_DATA_FILE"]), copy_dir, dirs_exist_ok=True)
+    script = "import json, server; print(json.dumps(server.auth_db))"
+    child_env = dict(
+        env,
+        AUTH_DATA_FILE=os.path.join(copy_dir, "auth_data.json"),
+        AUTH_CATEGORY_FILE=os.path.join(copy_dir, "auth_categories.json"),
+        APPLE_ADMIN_FILE=os.path.join(copy_dir, "apple_admins.json"),
+        AUTH_MULTI_PROCESS="0",
+        WEB_CONCURRENCY="1",
+    )
+    out = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=child_env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_no_lost_writes_and_shared_views(workers):
+    base_url, env = workers
+    with httpx.Client(base_url=base_url, timeout=60) as admin:
+        login = admin.post("/admin/api/login", json={"code": "kyh"})
+        assert login.status_code == 200
+    # 세션 쿠키는 https 전용이라 평문 http 로는 직접 실어 보냅니다.
+    cookie = {"Cookie": f"session={login.cookies['session']}"}
+
+    events = []
+    listening = threading.Event()
+
+    def listen():
+        with httpx.Client(base_url=base_url, timeout=None) as c:
+            with c.stream("GET", "/admin/api/events", headers=cookie) as r:
+                listening.set()
+                for line in r.iter_lines():
+                    if line.startswith("data: "):
+                        events.append(json.loads(line[6:]))
+
+    threading.Thread(target=listen, daemon=True).start()
+    assert listening.wait(30)
+
+    def register_and_approve(i):
+        code = f"mp{i:04d}"
+        r = _post(base_url, "/register", {"name": f"n{i}", "phoneLast4": "1234", "code": code})
+        assert r.status_code == 200, r.text
+        r = _post(base_url, "/approve", {"code": code})
+        assert r.status_code == 200, r.text
+        r = _post(base_url, "/admin/api/activate", {"code": code}, cookie)
+        assert r.status_code == 200, r.text
+
+    results = _run_all(register_and_approve, [(i,) for i in range(CODES)])
+    assert [r for r in results if r is not None] == []
+
+    codes = {f"mp{i:04d}" for i in range(CODES)}
+    on_disk = _load_from_disk(env)
+    assert codes <= set(on_disk)
+    assert all(on_disk[c]["status"] == "approved" and on_disk[c]["enabled"] for c in codes)
+
+    # 어느 워커가 받아도 같은 목록과 같은 ETag 를 돌려주고, 그 ETag 로 304 가 나와야 합니다.
+    def fetch_list():
+        with httpx.Client(base_url=base_url, timeout=60) as c:
+            r = c.get("/list")
+            return r.headers["etag"], set(r.json())
+
+    views = _run_all(fetch_list, [()] * 20)
+    etags = {etag for etag, _ in views}
+    assert len(etags) == 1
+    assert all(codes <= listed for _, listed in views)
+    etag = etags.pop()
+
+    def fetch_conditional():
+        with httpx.Client(base_url=base_url, timeout=60) as c:
+            return c.get("/list", headers={"If-None-Match": etag}).status_code
+
+    assert set(_run_all(fetch_conditional, [()] * 20)) == {304}
+
+    # 다른 워커가 저장한 인증키는 바뀐 것만 다시 읽어야 합니다(json 은 journal 로 바꿔 실행).
+    def fetch_shared_state():
+        with httpx.Client(base_url=base_url, timeout=60) as c:
+            return c.get("/admin/api/shared-state", headers=cookie).json()
+
+    states = {s["pid"]: s for s in _run_all(fetch_shared_state, [()] * 40)}
+    assert len(states) > 1
+    assert all(s["storage"] in ("journal", "sqlite") and s["fullReloads"] == 0 for s in states.values())
+    assert sum(s["keyReloads"] for s in states.values()) > 0
+
+    # 다른 워커에서 일어난 활성화도 모두 이벤트로 와야 합니다.
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        seen = {e.get("code") for e in events}
+        if codes <= seen:
+            break
+        time.sleep(0.2)
+    assert codes <= {e.get("code") for e in events}
+
+
+def test_idempotency_key_shared_across_workers(workers):
+    base_url, env = workers
+    assert _post(base_url, "/register", {"name": "i", "phoneLast4": "1234", "code": "idem1"}).status_code == 200
+    key = {"Idempotency-Key": "approve-idem1"}
+
+    responses = _run_all(lambda: _post(base_url, "/approve", {"code": "idem1"}, key), [()] * 20)
+    assert all(r.status_code == 200 for r in responses)
+    tokens = {r.json()["token"] for r in responses}
+    assert len(tokens) == 1
+    assert _load_from_disk(env)["idem1"]["token"] in tokens
+
+    reused = _post(base_url, "/approve", {"code": "other"}, key)
+    assert reused.status_code == 422
+    assert reused.json()["detail"] == "idempotency_key_reused"
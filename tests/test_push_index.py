@@ -0,0 +1,54 @@
+import threading
+
+from conftest import seed_keys
+
+
+def test_push_index_consistent_under_token_churn(srv):
+    codes = seed_keys(40, prefix="push")
+    stop = threading.Event()
+    errors = []
+
+    def churn_tokens():
+        # Android 로그인 기기가 토큰을 등록/교체/만료하는 흐름입니다.
+        n = 0
+        while not stop.is_set():
+            n += 1
+            code = codes[n % len(codes)]
+            with srv._android_push_lock:
+                if n % 3 == 0:
+                    srv.android_push_tokens.pop(code, None)
+                else:
+                    srv.android_push_tokens[code] = [f"tok-{code}-{n}"]
+                srv.save_android_push_tokens(code, wait=False)
+
+    def change_records():
+        # 같은 인증키의 권한(카테고리/삭제)을 바꾸면 save_data가 알림 대상도 다시 색인합니다.
+        n = 0
+        while not stop.is_set():
+            n += 1
+            code = codes[n % len(codes)]
+            try:
+                with srv._code_lock(code):
+                    srv.auth_db[code]["category"] = "A" if n % 2 else "B"
+                    srv.save_data(code, wait=False)
+                if n % 50 == 0:
+                    with srv._all_auth_locks():
+                        srv.save_data(wait=False)
+            except Exception as exc:  # pragma: no cover - 실패 내용을 본 스레드로 넘깁니다.
+                errors.append(exc)
+                return
+
+    threads = [threading.Thread(target=churn_tokens), threading.Thread(target=change_records)]
+    for thread in threads:
+        thread.start()
+    threading.Event().wait(3)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=30)
+        assert not thread.is_alive(), "잠금 순서가 어긋나 멈췄습니다"
+    assert errors == []
+    assert srv.check_index_consistency() == []
+    with srv._android_push_lock:
+        for code in codes:
+            srv.android_push_tokens.pop(code, None)
+        srv.save_android_push_tokens(*codes)
@@ -0,0 +1,103 @@
+"""승인 알림 발송 대기열: 가득 찼을 때 버리기, 밀렸을 때만 묶음 알림, 종료 시 대기열 비우기."""
+import threading
+from collections import deque
+
+import pytest
+
+
+@pytest.fixture
+def push_queue(srv, monkeypatch):
+    """새 대기열과 통계로 바꾸고, 발송 스레드는 테스트가 직접 띄웁니다."""
+    monkeypatch.setattr(srv, "_push_queue", deque())
+    monkeypatch.setattr(srv, "_push_cv", threading.Condition())
+    monkeypatch.setattr(srv, "_push_stats", dict.fromkeys(srv._push_stats, 0))
+    monkeypatch.setattr(srv, "_push_stopping", False)
+    monkeypatch.setattr(srv, "_push_busy", 0)
+    # 비어 있지 않으면 enqueue_approval_push가 스레드를 띄우지 않습니다.
+    monkeypatch.setattr(srv, "_push_threads", [None])
+    return srv
+
+
+def _item(i: int) -> dict:
+    return {"requestId": f"r{i}", "name": f"n{i}", "phoneLast4": "1234", "category": "미지정", "code": f"c{i}"}
+
+
+def test_queue_full_drops(push_queue, monkeypatch):
+    srv = push_queue
+    monkeypatch.setattr(srv, "PUSH_QUEUE_SIZE", 2)
+    assert srv.enqueue_approval_push(_item(0))
+    assert srv.enqueue_approval_push(_item(1))
+    assert not srv.enqueue_approval_push(_item(2))
+    stats = srv.push_dispatch_stats()
+    assert (stats["enqueued"], stats["dropped"], stats["depth"]) == (2, 1, 2)
+
+
+def test_digest_only_when_backed_up(push_queue, monkeypatch):
+    srv = push_queue
+    monkeypatch.setattr(srv, "PUSH_DIGEST_BACKLOG", 2)
+    monkeypatch.setattr(srv, "PUSH_DIGEST_MAX", 4)
+
+    # 거의 동시에 온 두 건은 건별로 보냅니다.
+    for i in range(2):
+        srv.enqueue_approval_push(_item(i))
+    assert [b[0]["requestId"] for b in (srv._next_push_batch(), srv._next_push_batch())] == ["r0", "r1"]
+
+    # 밀리면 PUSH_DIGEST_MAX건까지 묶고, 나머지는 다시 대기열 길이를 보고 정합니다.
+    for i in range(2, 8):
+        srv.enqueue_approval_push(_item(i))
+    assert [x["requestId"] for x in srv._next_push_batch()] == ["r2", "r3", "r4", "r5"]
+    assert len(srv._next_push_batch()) == 1
+    assert len(srv._next_push_batch()) == 1
+
+    digest = {"requestId": "", "digest": [_item(i) for i in range(7)]}
+    title, body = srv.approval_push_text(digest)
+    assert title == "인증키 승인 요청 7건"
+    assert body.splitlines()[-1] == "외 2건"
+    assert len(body.splitlines()) == srv.PUSH_DIGEST_LINES + 1
+
+
+def test_drain_sends_everything_then_stops(push_queue, monkeypatch):
+    srv = push_queue
+    sent = []
+    release = threading.Event()
+
+    def apns(item):
+        release.wait(5)
+        sent.append(item)
+
+    monkeypatch.setattr(srv, "send_approval_push_to_full_admins", apns)
+    monkeypatch.setattr(srv, "send_android_approval_push_to_full_admins", lambda item: None)
+    monkeypatch.setattr(srv, "PUSH_DIGEST_BACKLOG", 1)
+    for i in range(10):
+        srv.enqueue_approval_push(_item(i))
+    workers = [threading.Thread(target=srv._push_worker) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+
+    release.set()
+    assert srv.drain_push_queue(timeout=10)
+    for worker in workers:
+        worker.join(5)
+        assert not worker.is_alive()
+
+    delivered = [x["requestId"] for item in sent for x in item.get("digest") or [item]]
+    assert sorted(delivered) == sorted(f"r{i}" for i in range(10))
+    stats = srv.push_dispatch_stats()
+    assert stats["depth"] == 0 and stats["inFlight"] == 0 and stats["digests"] >= 1
+    # 종료가 시작된 뒤에는 새 알림을 받지 않습니다.
+    assert not srv.enqueue_approval_push(_item(99))
+
+
+def test_drain_times_out_with_stuck_sender(push_queue, monkeypatch):
+    srv = push_queue
+    release = threading.Event()
+    monkeypatch.setattr(srv, "send_approval_push_to_full_admins", lambda item: release.wait(5))
+    monkeypatch.setattr(srv, "send_android_approval_push_to_full_admins", lambda item: None)
+    srv.enqueue_approval_push(_item(0))
+    worker = threading.Thread(target=srv._push_worker)
+    worker.start()
+    try:
+        assert not srv.drain_push_queue(timeout=0.2)
+    finally:
+        release.set()
+        worker.join(5)
@@ -0,0 +1,63 @@
+"""/app/check 속도 제한: 429와 Retry-After, 일괄 확인 비용, X-Forwarded-For 단계 선택을 확인합니다."""
+import pytest
+
+
+@pytest.fixture
+def limited(srv, client, monkeypatch):
+    def set_limit(per_minute: int, hops: int = 0):
+        monkeypatch.setitem(srv.RATE_LIMIT_SCOPES, "app_check", per_minute)
+        monkeypatch.setattr(srv, "TRUSTED_PROXY_HOPS", hops)
+
+    monkeypatch.setattr(srv, "_rate_buckets", {})
+    return set_limit
+
+
+def test_429_with_retry_after(client, limited):
+    limited(3)
+    for _ in range(3):
+        assert client.post("/app/check", json={"code": "nope"}).status_code == 200
+    r = client.post("/app/check", json={"code": "nope"})
+    assert r.status_code == 429
+    assert r.json()["detail"] == "too_many_requests"
+    # 분당 3개면 토큰 하나가 차는 데 20초입니다.
+    assert 19 <= int(r.headers["Retry-After"]) <= 20
+
+
+def test_check_batch_costs_one_per_code(client, limited):
+    limited(5)
+    r = client.post("/app/check-batch", json={"codes": [f"b{i}" for i in range(10)]})
+    assert r.status_code == 200
+    # 남은 토큰 5개보다 큰 일괄 요청도 통과하고, 모자란 5개는 다음 요청이 기다려서 갚습니다.
+    r = client.post("/app/check", json={"code": "nope"})
+    assert r.status_code == 429
+    assert 71 <= int(r.headers["Retry-After"]) <= 72
+
+
+def test_forwarded_for_hop_selection(srv, client, limited):
+    limited(1, hops=1)
+    assert client.post("/app/check", json={"code": "n"}, headers={"X-Forwarded-For": "9.9.9.9, 1.1.1.1"}).status_code == 200
+    assert client.post("/app/check", json={"code": "n"}, headers={"X-Forwarded-For": "9.9.9.9, 2.2.2.2"}).status_code == 200
+    assert client.post("/app/check", json={"code": "n"}, headers={"X-Forwarded-For": "8.8.8.8, 1.1.1.1"}).status_code == 429
+    assert {ip for _, ip in srv._rate_buckets} == {"1.1.1.1", "2.2.2.2"}
+
+    limited(1, hops=2)
+    srv._rate_buckets.clear()
+    assert client.post("/app/check", json={"code": "n"}, headers={"X-Forwarded-For": "9.9.9.9, 1.1.1.1"}).status_code == 200
+    assert client.post("/app/check", json={"code": "n"}, headers={"X-Forwarded-For": "8.8.8.8, 1.1.1.1"}).status_code == 200
+    assert client.post("/app/check", json={"code": "n"}, headers={"X-Forwarded-For": "9.9.9.9, 2.2.2.2"}).status_code == 429
+    # 단계 수보다 짧으면 접속 IP를 씁니다.
+    assert client.post("/app/check", json={"code": "n"}, headers={"X-Forwarded-For": "7.7.7.7"}).status_code == 200
+    assert {ip for _, ip in srv._rate_buckets} == {"9.9.9.9", "8.8.8.8", "testclient"}
+
+
+def test_forwarded_for_without_trusted_hops_is_not_limited(srv, client, limited):
+    limited(1, hops=0)
+    skipped = srv.rate_limit_stats()["scopes"]["app_check"]["skipped"]
+    for _ in range(5):
+        r = client.post("/app/check", json={"code": "n"}, headers={"X-Forwarded-For": "1.1.1.1"})
+        assert r.status_code == 200
+    assert srv.rate_limit_stats()["scopes"]["app_check"]["skipped"] == skipped + 5
+    assert srv._rate_buckets == {}
+    # 프록시 없이 직접 붙은 연결은 그대로 제한합니다.
+    assert client.post("/app/check", json={"code": "n"}).status_code == 200
+    assert client.post("/app/check", json={"code": "n"}).status_code == 429
@@ -0,0 +1,85 @@
+"""큰 복원이 도는 동안에도 /app/check 응답 시간이 평소와 비슷한지 실제 uvicorn 서버로 확인합니다."""
+import json
+import socket
+import threading
+import time
+
+import httpx
+import uvicorn
+
+RESTORE_RECORDS = 100000
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _measure(base_url: str, stop: threading.Event, out: list):
+    with httpx.Client(base_url=base_url, timeout=60) as c:
+        while not stop.is_set():
+            started = time.perf_counter()
+            assert c.post("/app/check", json={"code": "#always"}).status_code == 200
+            out.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+
+def _p(values: list, ratio: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+def test_app_check_latency_flat_during_restore(srv):
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = uvicorn.Server(uvicorn.Config(srv.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    db = {
+        f"restore{i}": {"name": "n", "phone": "1234", "status": "approved", "token": "t", "date": "2026-01-01 00:00", "enabled": True}
+        for i in range(RESTORE_RECORDS)
+    }
+    db["kyh"] = {"name": "d", "phone": "0", "category": "개발자", "status": "approved", "token": "t", "enabled": True}
+    db["#always"] = {"name": "d", "phone": "0", "status": "approved", "token": "t", "enabled": True}
+    raw = json.dumps({"auth_db": db}).encode()
+    try:
+        with httpx.Client(base_url=base_url, timeout=120) as admin:
+            login = admin.post("/admin/api/login", json={"code": "kyh"})
+            assert login.status_code == 200
+            # 세션 쿠키는 https 전용이라 평문 http 로는 직접 실어 보냅니다.
+            headers = {"Content-Type": "application/json", "Cookie": f"session={login.cookies['session']}"}
+            assert admin.post("/admin/api/restore-backup", content=raw, headers=headers).status_code == 200
+
+            baseline, during = [], []
+            stop = threading.Event()
+            worker = threading.Thread(target=_measure, args=(base_url, stop, baseline))
+            worker.start()
+            time.sleep(1)
+            stop.set()
+            worker.join()
+
+            stop = threading.Event()
+            worker = threading.Thread(target=_measure, args=(base_url, stop, during))
+            worker.start()
+            started = time.perf_counter()
+            for _ in range(2):
+                r = admin.post("/admin/api/restore-backup", content=raw, headers=headers)
+                assert r.status_code == 200, r.text
+            restore_seconds = time.perf_counter() - started
+            stop.set()
+            worker.join()
+    finally:
+        server.should_exit = True
+
+    print(
+        f"restore x2 {restore_seconds:.2f}s, baseline p50={_p(baseline, .5) * 1000:.1f}ms, "
+        f"during p50={_p(during, .5) * 1000:.1f}ms p99={_p(during, .99) * 1000:.1f}ms max={max(during) * 1000:.1f}ms"
+    )
+    # 복원이 이벤트 루프를 막으면 /app/check 가 복원 시간 내내 멈춰 요청 수가 몇 개에 그치고 최대 지연이 복원 시간에 가까워집니다.
+    assert len(during) >= restore_seconds / 0.05
+    assert _p(during, 0.5) < max(0.05, _p(baseline, 0.5) * 10)
+    assert _p(during, 0.99) < restore_seconds / 4
+    assert max(during) < restore_seconds / 2
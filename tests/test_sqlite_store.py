@@ -0,0 +1,59 @@
+"""AUTH_STORAGE=sqlite 저장: 쓰지 않는 인덱스를 지우고, 인증키를 지정하지 않은 저장은 테이블을 통째로 바꿉니다."""
+import sqlite3
+
+import pytest
+
+OLD_INDEXES = {
+    "idx_auth_keys_name_phone": "auth_keys (name, phone)",
+    "idx_auth_keys_category": "auth_keys (category)",
+    "idx_auth_keys_status_enabled": "auth_keys (status, enabled)",
+    "idx_auth_keys_deleted_at": "auth_keys (deleted_at)",
+    "idx_approval_requests_code": "approval_requests (code)",
+}
+
+
+@pytest.fixture
+def sqlite_db(srv, tmp_path, monkeypatch):
+    path = tmp_path / "auth.sqlite3"
+    monkeypatch.setattr(srv, "SQLITE_FILE", str(path))
+    monkeypatch.setattr(srv, "_sqlite_conn", None)
+    yield path
+    if srv._sqlite_conn is not None:
+        srv._sqlite_conn.close()
+
+
+def _rows(path) -> dict:
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute("SELECT code, data FROM auth_keys").fetchall())
+
+
+def test_old_indexes_are_dropped(srv, sqlite_db):
+    with sqlite3.connect(sqlite_db) as conn:
+        conn.executescript(srv._SQLITE_SCHEMA)
+        for name, target in OLD_INDEXES.items():
+            conn.execute(f"CREATE INDEX {name} ON {target}")
+    srv._sqlite()
+    with sqlite3.connect(sqlite_db) as conn:
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")}
+    assert names == set()
+
+
+def test_keyed_and_keyless_saves(srv, sqlite_db):
+    records = {f"s{i}": {"name": f"n{i}", "phone": "1234", "status": "approved"} for i in range(5)}
+    srv._sqlite_save_store("auth", records)
+    assert set(_rows(sqlite_db)) == set(records)
+
+    statements = []
+    srv._sqlite().set_trace_callback(statements.append)
+    records["s1"] = {"name": "changed", "phone": "1234", "status": "approved"}
+    srv._sqlite_save_store("auth", records, ("s1",))
+    assert sum(s.startswith("INSERT") for s in statements) == 1
+
+    # 전체 교체는 기존 행을 읽어 비교하지 않고 내용만 바꿉니다.
+    statements.clear()
+    replaced = {"s1": records["s1"], "new": {"name": "x", "phone": "0000", "status": "pending"}}
+    srv._sqlite_save_store("auth", replaced)
+    assert not any(s.lstrip().upper().startswith("SELECT") for s in statements)
+    rows = _rows(sqlite_db)
+    assert set(rows) == {"s1", "new"}
+    assert '"changed"' in rows["s1"]
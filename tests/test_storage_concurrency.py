@@ -0,0 +1,46 @@
+import json
+import threading
+
+from conftest import seed_keys
+
+
+def test_keyed_save_while_other_thread_inserts(srv):
+    """인증키 잠금만 쥔 저장(비활성화)이 다른 스레드의 인증키 추가와 겹쳐도 실패하지 않아야 합니다."""
+    seed_keys(20000, prefix="race-bulk")
+    codes = seed_keys(15, prefix="race")
+    stop = threading.Event()
+    started = threading.Event()
+    inserted = []
+
+    def inserter():
+        i = 0
+        while not stop.is_set() and i < 50000:
+            code = f"race-new-{i}"
+            i += 1
+            with srv._auth_key_lock(code):
+                srv.auth_db[code] = srv._normalize_record({"name": "x", "phone": "0000", "status": "approved"})
+            inserted.append(code)
+            started.set()
+
+    thread = threading.Thread(target=inserter, daemon=True)
+    thread.start()
+    started.wait(10)
+    failures = []
+    try:
+        for code in codes:
+            try:
+                srv.deactivate_code(code)
+            except Exception as exc:
+                failures.append(exc)
+    finally:
+        stop.set()
+        thread.join(10)
+    assert failures == []
+
+    with srv._auth_lock:
+        srv.save_data(*inserted)
+    with open(srv.DATA_FILE, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert all(saved[code]["enabled"] is False for code in codes)
+    assert all(code in saved for code in inserted)
+    assert srv.check_index_consistency() == []